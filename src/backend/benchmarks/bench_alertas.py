@@ -0,0 +1,87 @@
+"""
+Benchmark do motor de alertas vetorizado contra a versão anterior com iterrows,
+em séries diárias com o tamanho do histórico completo da Selic e do Câmbio.
+
+Uso (a partir de src/backend):
+    python benchmarks/bench_alertas.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.alertas import alerta_variacao_diaria, alerta_valores_extremos
+
+
+def variacao_diaria_iterrows(df, nome_serie, percentual_limite=5.0):
+    """Implementação anterior, mantida aqui apenas como referência de desempenho."""
+    df = df.copy()
+    df['valor'] = df['valor'].astype(str).str.replace(",", ".").astype(float)
+    df = df.sort_values('data')
+    df['variacao_pct'] = df['valor'].pct_change() * 100
+    alertas = []
+    for idx, row in df.iterrows():
+        if abs(row['variacao_pct']) > percentual_limite:
+            alertas.append(
+                f"Alerta {nome_serie}: variação diária fora do comum em {row['data']} - "
+                f"variação de {row['variacao_pct']:.2f}%"
+            )
+    return alertas
+
+
+def valores_extremos_iterrows(df, nome_serie, desvio_limite=2):
+    """Implementação anterior, mantida aqui apenas como referência de desempenho."""
+    df = df.copy()
+    df['valor'] = df['valor'].astype(str).str.replace(",", ".").astype(float)
+    media = df['valor'].mean()
+    desvio = df['valor'].std()
+    alertas = []
+    for idx, row in df.iterrows():
+        if row['valor'] > media + desvio_limite * desvio:
+            alertas.append(f"Alerta {nome_serie}: valor muito alto em {row['data']} - {row['valor']:.2f}")
+        elif row['valor'] < media - desvio_limite * desvio:
+            alertas.append(f"Alerta {nome_serie}: valor muito baixo em {row['data']} - {row['valor']:.2f}")
+    return alertas
+
+
+def serie_diaria(inicio, seed):
+    datas = pd.date_range(inicio, pd.Timestamp.today(), freq="B")
+    rng = np.random.default_rng(seed)
+    valores = np.abs(10 + np.cumsum(rng.normal(0, 0.2, len(datas)))) + 0.01
+    return pd.DataFrame({"data": datas, "valor": valores})
+
+
+def cronometrar(func, repeticoes=5):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = func()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), resultado
+
+
+def main():
+    series = {"Selic": serie_diaria("1986-06-04", 1), "Câmbio": serie_diaria("1984-11-28", 2)}
+    casos = [
+        ("variação diária", variacao_diaria_iterrows, alerta_variacao_diaria, {"percentual_limite": 1.0}),
+        ("valores extremos", valores_extremos_iterrows, alerta_valores_extremos, {"desvio_limite": 2}),
+    ]
+
+    for nome, df in series.items():
+        print(f"{nome}: {len(df)} linhas")
+        for rotulo, antiga, nova, kwargs in casos:
+            t_antigo, r_antigo = cronometrar(lambda: antiga(df, nome, **kwargs), repeticoes=2)
+            t_novo, r_novo = cronometrar(lambda: nova(df, nome, **kwargs))
+            assert r_antigo == r_novo, f"Resultados divergentes em {rotulo}"
+            print(
+                f"  {rotulo:17s} iterrows {t_antigo * 1000:8.1f} ms | "
+                f"vetorizado {t_novo * 1000:7.1f} ms | {t_antigo / t_novo:6.1f}x "
+                f"({len(r_novo)} alertas)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark de inicialização fria (download + parsing do CSV) contra quente
+(leitura do armazenamento local) de `carregar_dados`.
+
+Uso (a partir de src/backend):
+    python benchmarks/bench_armazenamento.py          # CSV sintético, sem rede
+    python benchmarks/bench_armazenamento.py --rede   # API real do BCB
+"""
+import os
+import sys
+import tempfile
+import time
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import utils.dados as dados
+
+# Início aproximado de cada série e frequência de publicação no BCB
+SERIES_SINTETICAS = {
+    "selic": ("1986-06-04", "B"),
+    "cambio": ("1984-11-28", "B"),
+    "ipca": ("1980-01-01", "MS"),
+    "desemprego": ("2012-03-01", "MS"),
+    "pib": ("1990-01-01", "MS"),
+    "divida": ("2001-12-01", "MS"),
+}
+
+
+def gerar_csv_sintetico(inicio, freq):
+    datas = pd.date_range(inicio, pd.Timestamp.today(), freq=freq)
+    valores = np.round(np.random.default_rng(0).uniform(0.01, 30, len(datas)), 6)
+    linhas = [f'"{d:%d/%m/%Y}";"{str(v).replace(".", ",")}"' for d, v in zip(datas, valores)]
+    return '"data";"valor"\n' + "\n".join(linhas) + "\n"
+
+
+class _RespostaFalsa:
+    def __init__(self, texto):
+        self.status_code = 200
+        self.text = texto
+
+
+def _get_sintetico(csvs):
+    """Substitui Session.get respeitando a janela dataInicial/dataFinal da URL."""
+    series = {}
+    for nome, texto in csvs.items():
+        corpo = texto.splitlines()[1:]
+        datas = pd.to_datetime([l.split(";")[0].strip('"') for l in corpo], format="%d/%m/%Y")
+        series[dados.URLS[nome].split("?")[0]] = (datas, corpo)
+
+    def get(self, url, *args, **kwargs):
+        datas, corpo = series[url.split("?")[0]]
+        query = parse_qs(urlparse(url).query)
+        mascara = np.ones(len(datas), dtype=bool)
+        if "dataInicial" in query:
+            mascara &= datas >= pd.to_datetime(query["dataInicial"][0], format="%d/%m/%Y")
+        if "dataFinal" in query:
+            mascara &= datas <= pd.to_datetime(query["dataFinal"][0], format="%d/%m/%Y")
+        selecionadas = [l for l, m in zip(corpo, mascara) if m]
+        return _RespostaFalsa('"data";"valor"\n' + "\n".join(selecionadas) + "\n")
+
+    return get
+
+
+def cronometrar(func, repeticoes=1):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = func()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), resultado
+
+
+def main():
+    usar_rede = "--rede" in sys.argv
+    if not usar_rede:
+        csvs = {nome: gerar_csv_sintetico(*cfg) for nome, cfg in SERIES_SINTETICAS.items()}
+        dados.requests.Session.get = _get_sintetico(csvs)
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        # Frio: armazenamento vazio, tudo vem do BCB (ou do CSV sintético)
+        frio, resultado = cronometrar(lambda: dados.carregar_dados(diretorio=diretorio))
+        linhas = sum(len(df) for df in resultado.values())
+
+        # Quente: todas as séries já estão gravadas em disco
+        quente, _ = cronometrar(lambda: dados.carregar_dados(diretorio=diretorio), repeticoes=5)
+
+    origem = "API do BCB" if usar_rede else "CSV sintético (sem latência de rede)"
+    print(f"Origem: {origem} - {len(resultado)} séries, {linhas} linhas")
+    print(f"Inicialização fria:   {frio * 1000:9.1f} ms")
+    print(f"Inicialização quente: {quente * 1000:9.1f} ms")
+    print(f"Ganho: {frio / quente:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
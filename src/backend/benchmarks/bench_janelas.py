@@ -0,0 +1,86 @@
+"""
+Benchmark da montagem das janelas de treino: laço Python com fatias e np.array
+(implementação anterior de prepare_data, do ramo sklearn e do prepare_data_for_ml
+do frontend) contra sliding_windows (ml/windowing.py), que devolve visões sem cópia.
+Usa uma série sintética do tamanho do histórico diário completo da Selic (desde 1986).
+
+Mede o tempo e o pico de memória alocada (tracemalloc) de duas etapas:
+  - janelas: só a montagem de X e y;
+  - tensor: janelas + o array float32 contíguo entregue ao torch no DeepSeek.
+
+Uso (a partir de src/backend):
+    python benchmarks/bench_janelas.py
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from ml.windowing import sliding_windows
+
+
+def janelas_anterior(series, window_size):
+    """Implementação anterior, mantida aqui apenas como referência de desempenho."""
+    X, y = [], []
+    for i in range(len(series) - window_size):
+        X.append(series[i:i+window_size])
+        y.append(series[i+window_size])
+    return np.array(X), np.array(y)
+
+
+def tensor_anterior(series, window_size):
+    X, y = janelas_anterior(series, window_size)
+    return X.reshape(X.shape[0], X.shape[1], 1).astype(np.float32), y.astype(np.float32)
+
+
+def tensor_atual(series, window_size):
+    X, y = sliding_windows(series, window_size)
+    return np.ascontiguousarray(X[:, :, np.newaxis], dtype=np.float32), np.ascontiguousarray(y, dtype=np.float32)
+
+
+def serie_selic():
+    datas = pd.date_range("1986-06-04", pd.Timestamp.today(), freq="B")
+    valores = np.abs(10 + np.cumsum(np.random.default_rng(0).normal(0, 0.2, len(datas))))
+    # Já normalizada, como chega a prepare_data depois do MinMaxScaler
+    return (valores - valores.min()) / (valores.max() - valores.min())
+
+
+def medir(func, repeticoes=5):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = func()
+        tempos.append(time.perf_counter() - inicio)
+    del resultado
+
+    tracemalloc.start()
+    resultado = func()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(tempos), pico, resultado
+
+
+def main():
+    serie = serie_selic()
+    print(f"Série sintética: {len(serie)} dias úteis ({serie.nbytes / 1024:.0f} KiB)")
+
+    etapas = (("janelas", janelas_anterior, sliding_windows), ("tensor", tensor_anterior, tensor_atual))
+    for window_size in (15, 60):
+        for etapa, anterior, atual in etapas:
+            t_antigo, m_antigo, (X_antigo, y_antigo) = medir(lambda: anterior(serie, window_size))
+            t_novo, m_novo, (X_novo, y_novo) = medir(lambda: atual(serie, window_size))
+            np.testing.assert_array_equal(X_antigo, X_novo)
+            np.testing.assert_array_equal(y_antigo, y_novo)
+            print(
+                f"  janela {window_size:2d} {etapa:7s} anterior {t_antigo * 1000:7.2f} ms {m_antigo / 2**20:6.2f} MiB | "
+                f"sliding_windows {t_novo * 1000:6.2f} ms {m_novo / 2**20:6.2f} MiB | "
+                f"{t_antigo / t_novo:6.1f}x, {(m_antigo - m_novo) / 2**20:5.2f} MiB a menos"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark da leitura do CSV do BCB: etapa única (vírgula decimal no leitor, formato
+de data fixo, calendário categórico) contra o caminho anterior, com inferência de
+data, str.replace, month_name().map e apply por linha para o trimestre.
+Usa um CSV sintético do tamanho do histórico completo da Selic (desde 1986).
+
+Uso (a partir de src/backend):
+    python benchmarks/bench_leitura_csv.py
+"""
+import os
+import sys
+import time
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.dados import MAPA_MESES, _ler_csv_bcb, adicionar_colunas_calendario
+
+
+def ler_csv_anterior(texto, nome):
+    """Implementação anterior, mantida aqui apenas como referência de desempenho."""
+    df = pd.read_csv(StringIO(texto), sep=';', decimal='.')
+    df['data'] = pd.to_datetime(df['data'], errors='coerce', utc=False, dayfirst=True)
+    df = df.dropna(subset=['data'])
+    if not pd.api.types.is_numeric_dtype(df['valor']):
+        df['valor'] = df['valor'].str.replace(',', '.', regex=False).astype(float)
+    df['mes'] = df['data'].dt.month_name().map(MAPA_MESES)
+    df['ano'] = df['data'].dt.year.astype(str)
+    if nome == "pib":
+        df['trimestre'] = df['data'].dt.month.apply(lambda m: str((m - 1) // 3 + 1))
+    return df
+
+
+def ler_csv_atual(texto, nome):
+    return adicionar_colunas_calendario(_ler_csv_bcb(texto), nome)
+
+
+def csv_sintetico():
+    datas = pd.date_range("1986-06-04", pd.Timestamp.today(), freq="B")
+    valores = np.abs(10 + np.cumsum(np.random.default_rng(0).normal(0, 0.2, len(datas))))
+    linhas = [f'"{d:%d/%m/%Y}";"{v:.6f}"'.replace(".", ",") for d, v in zip(datas, valores)]
+    return '"data";"valor"\n' + "\n".join(linhas) + "\n", len(datas)
+
+
+def cronometrar(func, repeticoes=5):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = func()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), resultado
+
+
+def main():
+    texto, linhas = csv_sintetico()
+    print(f"CSV sintético: {linhas} linhas, {len(texto) / 1024:.0f} KiB")
+
+    # "pib" exercita também a coluna de trimestre
+    for nome in ("selic", "pib"):
+        t_antigo, antigo = cronometrar(lambda: ler_csv_anterior(texto, nome))
+        t_novo, novo = cronometrar(lambda: ler_csv_atual(texto, nome))
+        pd.testing.assert_frame_equal(
+            antigo.reset_index(drop=True), novo.astype({c: str for c in novo.columns[2:]}).reset_index(drop=True),
+            check_dtype=False,
+        )
+        print(
+            f"  {nome:6s} anterior {t_antigo * 1000:7.1f} ms | etapa única {t_novo * 1000:6.1f} ms | "
+            f"{t_antigo / t_novo:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
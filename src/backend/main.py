@@ -1,7 +1,40 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
-from routes import router as api_router
+from routes import (router as api_router, repositorio, estado_carga, trava_lider, model_registry, forecast_pool,
+                    forecast_jobs)
+from ml.model_registry import retrain_on_new_data
+from utils.dados import URLS
+from utils.publicacao import carregar_ultima_versao
+from utils.repositorio import manter_dados
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Serve de imediato a última versão gravada em disco (sem rede)
+    versao_manifesto, dados = carregar_ultima_versao(URLS)
+    if dados:
+        estado_carga.registrar(repositorio.publicar(dados), "disco")
+
+    # Completa e sincroniza os dados com o BCB em segundo plano, sem bloquear as requisições;
+    # workers que não são o líder só acompanham as versões que ele publica
+    tarefa = asyncio.create_task(
+        manter_dados(repositorio, estado_carga, trava=trava_lider, versao_vista=versao_manifesto)
+    )
+    # Retreina os modelos do /predict quando chegam dados novos (só no líder)
+    tarefa_modelos = asyncio.create_task(retrain_on_new_data(model_registry, repositorio, leader_lock=trava_lider))
+    forecast_jobs.start()
+    yield
+    await forecast_jobs.stop()
+    for t in (tarefa, tarefa_modelos):
+        t.cancel()
+        with suppress(asyncio.CancelledError):
+            await t
+    forecast_pool.shutdown()
+    trava_lider.liberar()
 
 
-app = FastAPI(title="Minha API")
+app = FastAPI(title="Minha API", lifespan=lifespan)
 
 app.include_router(api_router)  # Conecta todas as rotas
\ No newline at end of file
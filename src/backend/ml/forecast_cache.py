@@ -0,0 +1,76 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from .ml_models import prepare_history
+
+# Limites padrão do cache de previsões
+MAX_ENTRIES = 128
+TTL_SECONDS = 3600
+
+
+def forecast_key(historical_data, periods, window_size, model_type):
+    """
+    Impressão digital de um pedido de previsão: hash dos dados históricos já
+    normalizados (datas e valores, na ordem cronológica) e dos parâmetros.
+    Pedidos com o mesmo conteúdo geram a mesma chave, mesmo que os registros
+    cheguem em outra ordem ou com datas em outro formato.
+    """
+    df = prepare_history(historical_data)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(df['data'].to_numpy(dtype='datetime64[ns]').view(np.int64).tobytes())
+    digest.update(df['valor'].to_numpy(dtype=np.float64).tobytes())
+    digest.update(f"{int(periods)}|{int(window_size)}|{model_type}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ForecastCache:
+    """
+    Cache LRU com validade (TTL) das previsões já calculadas. Todo o conteúdo é
+    descartado quando a versão dos dados servidos pela API muda.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, ttl_seconds=TTL_SECONDS, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._data_version = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def sync_version(self, data_version):
+        """Invalida o cache se os dados da API mudaram desde a última chamada."""
+        with self._lock:
+            if data_version != self._data_version:
+                self._entries.clear()
+                self._data_version = data_version
+
+    def get(self, key):
+        """Retorna uma cópia da previsão guardada, ou None se ausente ou expirada."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, forecast_df = entry
+            if self._clock() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return forecast_df.copy()
+
+    def put(self, key, forecast_df):
+        with self._lock:
+            self._entries[key] = (self._clock(), forecast_df.copy())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,202 @@
+import asyncio
+import json
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import suppress
+from dataclasses import dataclass, field
+from functools import partial
+
+# Jobs mantidos na memória e por quanto tempo (em segundos) um job concluído continua consultável
+MAX_JOBS = 256
+JOB_TTL_SECONDS = 3600
+# Jobs na fila ou rodando aceitos ao mesmo tempo; acima disso submit recusa o pedido
+MAX_PENDING_JOBS = 64
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobQueueFull(Exception):
+    """Há jobs pendentes demais; o pedido deve ser refeito mais tarde."""
+
+
+@dataclass(eq=False)
+class ForecastJob:
+    """Pedido de previsão enfileirado, com estado, último progresso e resultado."""
+    id: str
+    key: str
+    indicator: str
+    # Parâmetros repassados ao runner (no /predict, o PredictionRequest)
+    params: object = field(repr=False)
+    version: object = None
+    status: str = QUEUED
+    progress: dict = None
+    result: object = field(default=None, repr=False)
+    error: str = None
+    # Tipo da exceção que fez o job falhar; None quando o runner só não devolveu resultado
+    error_type: type = None
+    created_at: float = 0.0
+    finished_at: float = None
+    subscribers: set = field(default_factory=set, repr=False)
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "indicator": self.indicator,
+            "status": self.status,
+            "progress": self.progress,
+            "error": self.error,
+        }
+
+    def notify(self, event, data):
+        for queue in self.subscribers:
+            queue.put_nowait((event, data))
+
+
+def sse_event(event, data):
+    """Formata um evento no padrão Server-Sent Events."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class ForecastJobQueue:
+    """
+    Fila de previsões dentro do processo da API. Cada pedido vira um job com id
+    próprio, executado por `workers` tarefas em segundo plano; pedidos idênticos
+    (mesma chave) enquanto o anterior está na fila, rodando ou concluído recebem
+    o mesmo job, desde que feitos sobre a mesma versão (ver submit). No máximo
+    `max_pending` jobs ficam pendentes ao mesmo tempo.
+    `runner(job, on_progress)` é a corrotina que gera a previsão.
+    """
+
+    def __init__(self, runner, workers=1, max_jobs=MAX_JOBS, ttl_seconds=JOB_TTL_SECONDS,
+                 max_pending=MAX_PENDING_JOBS, clock=time.monotonic):
+        self._runner = runner
+        self.workers = workers
+        self.max_jobs = max_jobs
+        self.ttl_seconds = ttl_seconds
+        self.max_pending = max_pending
+        self._clock = clock
+        self._jobs = OrderedDict()
+        self._by_key = {}
+        self._queue = None
+        self._tasks = []
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def start(self):
+        """Sobe as tarefas que consomem a fila (no event loop atual)."""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        for job in self._jobs.values():
+            if job.status == QUEUED:
+                self._queue.put_nowait(job)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+
+    @property
+    def pending(self):
+        return sum(1 for job in self._jobs.values() if not job.finished)
+
+    def submit(self, indicator, key, params, version=None):
+        """
+        Enfileira um pedido ou reaproveita o job idêntico já existente. Um job
+        concluído só é reaproveitado se tiver a mesma `version` (ex.: versão dos
+        dados e dos modelos); um pendente é sempre reaproveitado, pois ainda vai rodar.
+        Retorna (job, criado). Levanta JobQueueFull acima de max_pending jobs pendentes.
+        """
+        self._prune()
+        job = self._by_key.get(key)
+        if job is not None and (not job.finished or (job.status == DONE and job.version == version)):
+            return job, False
+        if self.pending >= self.max_pending:
+            raise JobQueueFull(f"Fila de previsões cheia ({self.max_pending} jobs pendentes)")
+
+        self.start()
+        job = ForecastJob(uuid.uuid4().hex, key, indicator, params, version, created_at=self._clock())
+        self._jobs[job.id] = job
+        self._by_key[key] = job
+        self._queue.put_nowait(job)
+        return job, True
+
+    def get(self, job_id):
+        self._prune()
+        return self._jobs.get(job_id)
+
+    def _remove(self, job):
+        del self._jobs[job.id]
+        if self._by_key.get(job.key) is job:
+            del self._by_key[job.key]
+
+    def _prune(self):
+        now = self._clock()
+        for job in [j for j in self._jobs.values() if j.finished and now - j.finished_at > self.ttl_seconds]:
+            self._remove(job)
+        # Acima do limite, descarta os concluídos mais antigos; os pendentes são limitados em submit
+        excess = len(self._jobs) - self.max_jobs
+        for job in [j for j in self._jobs.values() if j.finished][:max(0, excess)]:
+            self._remove(job)
+
+    def _on_progress(self, job, info):
+        job.progress = info
+        job.notify("progress", info)
+
+    def _set_status(self, job, status, error=None, error_type=None):
+        job.status = status
+        job.error = error
+        job.error_type = error_type
+        if job.finished:
+            job.finished_at = self._clock()
+        job.notify("status", job.to_dict())
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            self._set_status(job, RUNNING)
+            try:
+                result = await self._runner(job, partial(self._on_progress, job))
+            except asyncio.CancelledError:
+                self._set_status(job, FAILED, "Serviço encerrado antes do fim da previsão", asyncio.CancelledError)
+                raise
+            except Exception as e:
+                self._set_status(job, FAILED, str(e), type(e))
+                continue
+            if result is None:
+                self._set_status(job, FAILED, "Não foi possível gerar previsões")
+            else:
+                job.result = result
+                self._set_status(job, DONE)
+
+    async def events(self, job):
+        """
+        Eventos SSE de um job: o estado atual, cada progresso do treino (época e
+        loss) e as mudanças de estado, terminando quando o job conclui ou falha.
+        """
+        queue = asyncio.Queue()
+        job.subscribers.add(queue)
+        try:
+            yield sse_event("status", job.to_dict())
+            if job.finished:
+                return
+            while True:
+                event, data = await queue.get()
+                yield sse_event(event, data)
+                if event == "status" and data["status"] in (DONE, FAILED):
+                    return
+        finally:
+            job.subscribers.discard(queue)
@@ -0,0 +1,160 @@
+import asyncio
+import itertools
+import multiprocessing
+import os
+import threading
+from contextlib import suppress
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+# Processos dedicados ao treino de modelos pedido pelo /predict
+MAX_WORKERS = int(os.getenv("RELATAI_PROCESSOS_PREVISAO", str(min(2, os.cpu_count() or 1))))
+# Jobs aceitos ao mesmo tempo por worker da API; os demais esperam uma vaga
+MAX_CONCURRENT = int(os.getenv("RELATAI_PREVISOES_SIMULTANEAS", str(MAX_WORKERS)))
+# Tempo máximo (em segundos) de um job, incluindo a espera por vaga
+JOB_TIMEOUT_SECONDS = float(os.getenv("RELATAI_TEMPO_LIMITE_PREVISAO", "120"))
+
+
+class ForecastTimeout(Exception):
+    """O job não conseguiu vaga ou não terminou dentro do tempo limite."""
+
+
+# Fila pela qual os jobs informam o progresso do treino ao processo da API.
+# Nos processos do pool é recebida pelo initializer.
+_progress_queue = None
+
+
+def _init_worker(queue):
+    global _progress_queue
+    _progress_queue = queue
+
+
+def _send_progress(token, epoch, epochs, loss):
+    _progress_queue.put((token, {"epoch": epoch, "epochs": epochs, "loss": loss}))
+
+
+def _call_with_progress(token, fn, args, kwargs):
+    return fn(*args, progress=partial(_send_progress, token), **kwargs)
+
+
+def _default_executor(max_workers, initializer=None, initargs=()):
+    # spawn: os processos filhos não herdam as threads nem o estado do torch do processo da API
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=initializer, initargs=initargs)
+
+
+class ForecastPool:
+    """
+    Executa funções pesadas de CPU (treino de modelos) num pool de processos,
+    sem bloquear o event loop. O número de jobs simultâneos é limitado por um
+    semáforo e cada job tem um tempo limite. Um job que expira continua ocupando
+    sua vaga até o processo terminar, para que o pool nunca passe do limite.
+
+    Funções que aceitam o argumento progress podem informar o andamento do treino
+    ao processo da API (ver run com on_progress).
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, max_concurrent=MAX_CONCURRENT, timeout=JOB_TIMEOUT_SECONDS,
+                 executor_factory=_default_executor):
+        self.max_workers = max_workers
+        self.max_concurrent = max_concurrent
+        self.timeout = timeout
+        self._executor_factory = executor_factory
+        self._executor = None
+        self._semaphore = None
+        self._loop = None
+        self.running = 0
+        self._queue = None
+        self._listeners = {}
+        self._tokens = itertools.count()
+
+    def _get_executor(self):
+        # Criado só no primeiro job: importar a API não sobe processos
+        if self._executor is None:
+            if self._queue is None:
+                self._queue = multiprocessing.get_context("spawn").Queue()
+                threading.Thread(target=self._drain_progress, args=(self._queue,), daemon=True).start()
+            self._executor = self._executor_factory(max_workers=self.max_workers, initializer=_init_worker,
+                                                    initargs=(self._queue,))
+        return self._executor
+
+    def _drain_progress(self, queue):
+        """Thread que repassa o progresso vindo dos processos para o event loop de quem pediu."""
+        while True:
+            try:
+                message = queue.get()
+            except (EOFError, OSError):  # fila fechada no encerramento do processo
+                return
+            if message is None:
+                return
+            token, info = message
+            listener = self._listeners.get(token)
+            if listener is not None:
+                loop, callback = listener
+                with suppress(RuntimeError):  # event loop já encerrado
+                    loop.call_soon_threadsafe(callback, info)
+
+    def _get_semaphore(self, loop):
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+            self._loop = loop
+        return self._semaphore
+
+    def _release(self, semaphore):
+        self.running -= 1
+        semaphore.release()
+
+    def _finish(self, semaphore, token):
+        # Progresso que ainda chegar depois do fim do job é descartado
+        self._listeners.pop(token, None)
+        self._release(semaphore)
+
+    async def run(self, fn, *args, on_progress=None, **kwargs):
+        """
+        Executa fn(*args, **kwargs) no pool. Levanta ForecastTimeout se passar do tempo limite.
+        Com on_progress, fn recebe também progress e cada chamada dela no processo filho
+        chega a on_progress({"epoch", "epochs", "loss"}) no event loop atual.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        semaphore = self._get_semaphore(loop)
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            raise ForecastTimeout("Nenhuma vaga livre para a previsão dentro do tempo limite")
+
+        self.running += 1
+        token = None
+        try:
+            executor = self._get_executor()
+            if on_progress is None:
+                call = partial(fn, *args, **kwargs)
+            else:
+                token = next(self._tokens)
+                self._listeners[token] = (loop, on_progress)
+                call = partial(_call_with_progress, token, fn, args, kwargs)
+            future = loop.run_in_executor(executor, call)
+        except Exception:
+            self._listeners.pop(token, None)
+            self._release(semaphore)
+            raise
+        # A vaga só volta quando o processo termina, mesmo que quem pediu já tenha desistido
+        future.add_done_callback(lambda _: self._finish(semaphore, token))
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            raise ForecastTimeout(f"Previsão não terminou em {self.timeout:g} segundos")
+        except BrokenProcessPool:
+            # Um processo filho morreu (ex.: falta de memória): o próximo job recria o pool
+            self._executor = None
+            raise
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._queue is not None:
+            self._queue.put(None)
+            self._queue = None
@@ -10,6 +10,18 @@ from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import matplotlib.pyplot as plt
 
+from .windowing import sliding_windows
+
+# Horizonte dos modelos sklearn do registro (treinados em segundo plano): cada janela
+# prevê de uma vez os próximos DIRECT_HORIZON valores; horizontes maiores saem em blocos
+DIRECT_HORIZON = 30
+# Limites das árvores da floresta direta: cada nó guarda DIRECT_HORIZON valores, e sem
+# limite a floresta da Selic diária passa de 1 GB em pickle (e em cada worker que a carrega)
+DIRECT_FOREST_MAX_LEAF_NODES = 256
+DIRECT_FOREST_MIN_SAMPLES_LEAF = 5
+# Mínimo de janelas de treino; em séries curtas o horizonte direto é reduzido para respeitá-lo
+MIN_TRAINING_SAMPLES = 20
+
 # Implementação otimizada de um modelo baseado em DeepSeek para séries temporais
 class DeepSeekTimeSeriesModel:
     def __init__(self, input_size=15, hidden_size=32, output_size=1, num_layers=1, dropout=0.2):
@@ -64,26 +76,24 @@ class DeepSeekTimeSeriesModel:
         self.scaler = MinMaxScaler(feature_range=(0, 1))
         
     def prepare_data(self, series, window_size):
-        """Prepara dados para treino ou previsão"""
-        X, y = [], []
-        for i in range(len(series) - window_size):
-            X.append(series[i:i+window_size])
-            y.append(series[i+window_size])
-        
-        return np.array(X), np.array(y)
+        """Prepara dados para treino ou previsão (janelas sem cópia, ver ml/windowing.py)"""
+        return sliding_windows(series, window_size)
     
-    def fit(self, data, epochs=40, batch_size=64, verbose=False):
-        """Treina o modelo com parâmetros otimizados para velocidade"""
+    def fit(self, data, epochs=40, batch_size=64, verbose=False, progress=None):
+        """
+        Treina o modelo com parâmetros otimizados para velocidade.
+        Se informado, progress(epoca, total_de_epocas, loss) é chamado ao fim de cada época.
+        """
         # Normalizar dados
         scaled_data = self.scaler.fit_transform(data.reshape(-1, 1)).flatten()
         
         # Preparar conjuntos de treino
         X, y = self.prepare_data(scaled_data, self.input_size)
-        X = X.reshape(X.shape[0], X.shape[1], 1)  # Formato (batch, seq_len, features)
+        X = X[:, :, np.newaxis]  # Formato (batch, seq_len, features)
         
-        # Converter para tensores PyTorch
-        X_tensor = torch.FloatTensor(X).to(self.device)
-        y_tensor = torch.FloatTensor(y).to(self.device)
+        # Converter para tensores PyTorch (única cópia das janelas, já em float32)
+        X_tensor = torch.from_numpy(np.ascontiguousarray(X, dtype=np.float32)).to(self.device)
+        y_tensor = torch.from_numpy(np.ascontiguousarray(y, dtype=np.float32)).to(self.device)
     
         # Treinar o modelo
         for epoch in range(epochs):
@@ -113,6 +123,8 @@ class DeepSeekTimeSeriesModel:
             # Log de progresso reduzido
             if verbose and (epoch+1) % 10 == 0:
                 print(f"Época {epoch+1}/{epochs}, Loss: {loss.item():.6f}")
+            if progress is not None:
+                progress(epoch + 1, epochs, loss.item())
             
         return self
     
@@ -160,7 +172,163 @@ class DeepSeekTimeSeriesModel:
         
         return predictions
 
-def predict_future_values(historical_data, periods=90, window_size=15, model_type="deepseek"):
+def prepare_history(historical_data):
+    """
+    Normaliza os dados históricos (lista de registros ou DataFrame) num DataFrame
+    com as colunas data e valor, numérico e ordenado por data.
+    Datas ISO (como as devolvidas pela API) são lidas primeiro; as demais, como dia/mês/ano.
+    """
+    df = pd.DataFrame(historical_data)
+    try:
+        df['data'] = pd.to_datetime(df['data'], format='ISO8601')
+    except (ValueError, TypeError):
+        df['data'] = pd.to_datetime(df['data'], dayfirst=True)
+
+    if not pd.api.types.is_numeric_dtype(df['valor']):
+        df['valor'] = df['valor'].astype(str).str.replace(',', '.')
+
+    df['valor'] = pd.to_numeric(df['valor'], errors='coerce')
+    return df[['data', 'valor']].dropna().sort_values('data')
+
+def resolve_model_type(values, model_type="deepseek"):
+    """
+    Escolhe o modelo efetivo: se a série for muito volátil, usa RandomForest em vez
+    de DeepSeek, que pode gerar previsões irreais nesses casos.
+    """
+    volatility = np.std(np.diff(values[-30:]))
+    mean_value = np.mean(np.abs(values[-30:]))
+    volatility_ratio = volatility / mean_value if mean_value > 0 else 0
+
+    if volatility_ratio > 0.15 and model_type == "deepseek":
+        print("Série muito volátil. Usando RandomForest para melhor estabilidade.")
+        return "forest"
+    return model_type
+
+def train_model(values, window_size=15, model_type="deepseek", progress=None, horizon=1):
+    """
+    Treina um modelo sobre a série de valores. progress(epoca, total, loss) acompanha
+    o treino: a cada época no DeepSeek, uma única vez (sem loss) nos modelos do sklearn.
+
+    Com horizon=1 os modelos do sklearn preveem um passo por vez (previsão recursiva),
+    o treino mais rápido, usado quando se treina a cada pedido. Com horizon > 1 são
+    diretos de várias saídas: cada janela é associada aos `horizon` valores seguintes
+    (limitado pelo tamanho da série) e o horizonte inteiro sai de uma única chamada a
+    predict; o treino da floresta fica bem mais lento, por isso só o registro, que
+    treina em segundo plano, usa DIRECT_HORIZON. A floresta direta tem o número de
+    folhas limitado, para que o tamanho do modelo não cresça com a série.
+    
+    Returns:
+        Tupla (modelo, scaler) pronta para forecast_with_model e save_model
+    """
+    if model_type == "deepseek":
+        # Configurações mais rápidas
+        model = DeepSeekTimeSeriesModel(
+            input_size=window_size,
+            hidden_size=32,     # Reduzido para velocidade
+            num_layers=1,       # Reduzido para velocidade
+            output_size=1,
+            dropout=0.1
+        )
+        
+        # Menos épocas = mais rápido
+        model.fit(values, epochs=30, batch_size=128, verbose=False, progress=progress)
+        return model, model.scaler
+
+    # Usar implementação anterior para modelos tradicionais
+    scaler = MinMaxScaler(feature_range=(0, 1))
+    scaled_data = scaler.fit_transform(values.reshape(-1, 1))
+    
+    # Janela deslizante associada aos próximos `horizon` valores (previsão direta)
+    horizon = max(1, min(horizon, len(values) - window_size - MIN_TRAINING_SAMPLES + 1))
+    X, y = sliding_windows(scaled_data[:, 0], window_size, horizon if horizon > 1 else None)
+    
+    # Treinar modelo
+    if model_type == "linear":
+        model = LinearRegression()
+    elif horizon > 1:
+        model = RandomForestRegressor(n_estimators=100, random_state=42,
+                                      max_leaf_nodes=DIRECT_FOREST_MAX_LEAF_NODES,
+                                      min_samples_leaf=DIRECT_FOREST_MIN_SAMPLES_LEAF)
+    else:
+        model = RandomForestRegressor(n_estimators=100, random_state=42)
+    
+    model.fit(X, y)
+    if progress is not None:
+        progress(1, 1, None)
+    return model, scaler
+
+def forecast_with_model(model, scaler, values, last_date, periods=90, model_type="deepseek"):
+    """
+    Gera a previsão a partir de um modelo já treinado (só inferência)
+    
+    Args:
+        model, scaler: Retorno de train_model ou load_model
+        values: Valores históricos; só a última janela é usada
+        last_date: Data da última observação
+        periods: Número de períodos a prever
+        model_type: Tipo do modelo ("deepseek", "forest" ou "linear")
+        
+    Returns:
+        DataFrame com previsões
+    """
+    if model_type == "deepseek":
+        # Fazer previsão
+        predictions = model.predict(values, steps=periods)
+        
+        # Estabilizar previsão
+        last_value = values[-1]
+        first_pred = predictions[0]
+        
+        # Assegurar que a primeira previsão não seja muito diferente do último valor histórico
+        if abs(first_pred - last_value) > 0.05 * last_value:
+            predictions[0] = last_value * 0.7 + first_pred * 0.3
+        
+        # Suavizar previsões extremas
+        for i in range(1, len(predictions)):
+            previous = predictions[i-1]
+            current = predictions[i]
+            if abs(current - previous) > 0.1 * previous:
+                # Limitar mudanças bruscas
+                direction = 1 if current > previous else -1
+                predictions[i] = previous + direction * 0.05 * previous
+        
+        # Confiabilidade diminui com o tempo
+        confidence_scores = [round(0.95 * np.exp(-0.01 * i), 3) for i in range(periods)]
+        
+    else:
+        # Preparar dados para previsão
+        window_size = model.n_features_in_
+        window = scaler.transform(values[-window_size:].reshape(-1, 1)).reshape(-1)
+        
+        # Cada chamada a predict devolve o horizonte inteiro do modelo (um passo nos modelos
+        # recursivos); o bloco previsto alimenta a janela do próximo até cobrir os períodos
+        blocks = []
+        remaining = periods
+        while remaining > 0:
+            block = np.asarray(model.predict(window.reshape(1, -1))).reshape(-1)
+            blocks.append(block[:remaining])
+            remaining -= len(block)
+            window = np.concatenate([window, block])[-window_size:]
+        predictions = np.concatenate(blocks)
+        
+        # Calcular confiabilidade (decaimento exponencial)
+        confidence_scores = [round(0.95 * np.exp(-0.02 * i), 3) for i in range(periods)]
+        
+        # Inverter normalização
+        predictions = scaler.inverse_transform(predictions.reshape(-1, 1))[:, 0]
+    
+    # Criar datas futuras
+    future_dates = [last_date + timedelta(days=i+1) for i in range(periods)]
+    
+    # Retornar como DataFrame com coluna de confiabilidade
+    return pd.DataFrame({
+        'data': future_dates,
+        'valor': predictions,
+        'previsto': True,
+        'confiabilidade': confidence_scores
+    })
+
+def predict_future_values(historical_data, periods=90, window_size=15, model_type="deepseek", progress=None):
     """
     Prevê valores futuros usando modelos de machine learning
     
@@ -169,6 +337,7 @@ def predict_future_values(historical_data, periods=90, window_size=15, model_typ
         periods: Número de períodos a prever
         window_size: Tamanho da janela de lookback
         model_type: Tipo de modelo ("deepseek", "forest" ou "linear")
+        progress: Função opcional chamada com (época, total de épocas, loss) durante o treino
         
     Returns:
         DataFrame com previsões
@@ -178,138 +347,14 @@ def predict_future_values(historical_data, periods=90, window_size=15, model_typ
             return None
         
         # Preparar dados
-        df = pd.DataFrame(historical_data)
-        df['data'] = pd.to_datetime(df['data'], dayfirst=True)
-        
-        if df['valor'].dtype == 'object':
-            df['valor'] = df['valor'].str.replace(',', '.')
-            
-        df['valor'] = pd.to_numeric(df['valor'], errors='coerce')
-        df = df.dropna().sort_values('data')
-        
+        df = prepare_history(historical_data)
         values = df['valor'].values
         
         # Escolher modelo baseado em desempenho e velocidade
-        # Se a série for muito volátil, use RandomForest em vez de DeepSeek
-        volatility = np.std(np.diff(values[-30:]))
-        mean_value = np.mean(np.abs(values[-30:]))
-        volatility_ratio = volatility / mean_value if mean_value > 0 else 0
-        
-        # Quando a volatilidade é extrema, DeepSeek pode gerar previsões irreais
-        if volatility_ratio > 0.15 and model_type == "deepseek":
-            print("Série muito volátil. Usando RandomForest para melhor estabilidade.")
-            model_type = "forest"
-        
-        if model_type == "deepseek":
-            # Configurações mais rápidas
-            model = DeepSeekTimeSeriesModel(
-                input_size=window_size,
-                hidden_size=32,     # Reduzido para velocidade
-                num_layers=1,       # Reduzido para velocidade
-                output_size=1,
-                dropout=0.1
-            )
-            
-            # Menos épocas = mais rápido
-            model.fit(values, epochs=30, batch_size=128, verbose=False)
-            
-            # Fazer previsão
-            predictions = model.predict(values, steps=periods)
-            
-            # Estabilizar previsão
-            last_value = values[-1]
-            first_pred = predictions[0]
-            
-            # Assegurar que a primeira previsão não seja muito diferente do último valor histórico
-            if abs(first_pred - last_value) > 0.05 * last_value:
-                predictions[0] = last_value * 0.7 + first_pred * 0.3
-            
-            # Suavizar previsões extremas
-            for i in range(1, len(predictions)):
-                previous = predictions[i-1]
-                current = predictions[i]
-                if abs(current - previous) > 0.1 * previous:
-                    # Limitar mudanças bruscas
-                    direction = 1 if current > previous else -1
-                    predictions[i] = previous + direction * 0.05 * previous
-            
-            # Confiabilidade diminui com o tempo
-            confidence_scores = [round(0.95 * np.exp(-0.01 * i), 3) for i in range(periods)]
-            
-            # Criar datas futuras
-            last_date = df['data'].iloc[-1]
-            future_dates = [last_date + timedelta(days=i+1) for i in range(periods)]
-            
-            # Retornar DataFrame
-            forecast_df = pd.DataFrame({
-                'data': future_dates,
-                'valor': predictions,
-                'previsto': True,
-                'confiabilidade': confidence_scores
-            })
-            
-            return forecast_df
-            
-        else:
-            # Usar implementação anterior para modelos tradicionais
-            scaler = MinMaxScaler(feature_range=(0, 1))
-            scaled_data = scaler.fit_transform(df[['valor']].values)
-            
-            # Usar janela deslizante para prever próximo valor
-            X, y = [], []
-            
-            for i in range(window_size, len(scaled_data)):
-                X.append(scaled_data[i-window_size:i, 0])
-                y.append(scaled_data[i, 0])
-            
-            X, y = np.array(X), np.array(y)
-            
-            # Treinar modelo
-            if model_type == "linear":
-                model = LinearRegression()
-            else:
-                model = RandomForestRegressor(n_estimators=100, random_state=42)
-            
-            model.fit(X, y)
-            
-            # Preparar dados para previsão
-            last_window = scaled_data[-window_size:].reshape(-1)
-            
-            # Fazer previsões
-            predictions = []
-            confidence_scores = []
-            current_batch = last_window.copy()
-            
-            for i in range(periods):
-                # Prever próximo valor
-                current_batch_reshaped = current_batch.reshape(1, -1)
-                predicted = model.predict(current_batch_reshaped)[0]
-                predictions.append(predicted)
-                
-                # Calcular confiabilidade (decaimento exponencial)
-                confidence = 0.95 * np.exp(-0.02 * i)  
-                confidence_scores.append(round(confidence, 3))
-                
-                # Atualizar batch para próxima previsão
-                current_batch = np.append(current_batch[1:], predicted)
-            
-            # Inverter normalização
-            predictions_array = np.array(predictions).reshape(-1, 1)
-            inverse_predictions = scaler.inverse_transform(np.hstack([predictions_array, np.zeros_like(predictions_array)]))[:, 0]
-            
-            # Criar datas futuras
-            last_date = df['data'].iloc[-1]
-            future_dates = [last_date + timedelta(days=i+1) for i in range(periods)]
-            
-            # Retornar como DataFrame com coluna de confiabilidade
-            forecast_df = pd.DataFrame({
-                'data': future_dates,
-                'valor': inverse_predictions,
-                'previsto': True,
-                'confiabilidade': confidence_scores
-            })
-            
-            return forecast_df
+        model_type = resolve_model_type(values, model_type)
+        
+        model, scaler = train_model(values, window_size, model_type, progress)
+        return forecast_with_model(model, scaler, values, df['data'].iloc[-1], periods, model_type)
         
     except Exception as e:
         import traceback
@@ -0,0 +1,269 @@
+import asyncio
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from .forecast_pool import _default_executor
+from .ml_models import (DIRECT_HORIZON, forecast_with_model, load_model, prepare_history, resolve_model_type,
+                        save_model, train_model)
+
+DEFAULT_MODEL_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'models')
+# Tipos de modelo mantidos treinados para cada indicador
+MODEL_TYPES = tuple(os.getenv("RELATAI_MODELOS", "deepseek,forest,linear").split(","))
+WINDOW_SIZE = 15
+# Intervalo (em segundos) para conferir no disco se outro processo publicou versão nova
+RELOAD_CHECK_SECONDS = 30
+# Intervalo (em segundos) para verificar se há dados novos a treinar
+RETRAIN_CHECK_SECONDS = 60
+POINTER_FILE = "current.json"
+# Versões mantidas no disco por indicador e tipo: a atual e a anterior, que outro
+# worker ainda pode estar carregando quando o ponteiro muda
+KEEP_VERSIONS = 2
+VERSION_DIR = re.compile(r"^v(\d+)$")
+
+
+@dataclass(frozen=True)
+class RegisteredModel:
+    """Modelo treinado e carregado na memória, com a versão e os dados usados no treino."""
+    indicator: str
+    model_type: str
+    version: int
+    window_size: int
+    model: object = field(repr=False)
+    scaler: object = field(repr=False)
+    rows: int = 0
+    last_date: str = None
+
+
+class ModelRegistry:
+    """
+    Registro versionado de modelos por indicador e tipo de modelo.
+
+    Cada treino grava uma nova versão em {model_dir}/{indicador}/{tipo}/v{n}/ (com
+    save_model), só então aponta current.json para ela e apaga as versões mais
+    antigas que as KEEP_VERSIONS últimas. Os modelos ficam na memória
+    depois da primeira leitura e são trocados quando uma versão nova é publicada,
+    por este processo ou por outro worker, sem interromper quem está prevendo.
+    """
+
+    def __init__(self, model_dir=None, reload_check_seconds=RELOAD_CHECK_SECONDS, clock=time.monotonic):
+        self.model_dir = model_dir or DEFAULT_MODEL_DIR
+        self.reload_check_seconds = reload_check_seconds
+        self._clock = clock
+        self._models = {}
+        self._checked_at = {}
+        self._lock = threading.Lock()
+        # Incrementada a cada troca de modelo; compõe a invalidação do cache de previsões
+        self.generation = 0
+
+    def _base_dir(self, indicator, model_type):
+        return os.path.join(self.model_dir, indicator, model_type)
+
+    def read_pointer(self, indicator, model_type):
+        """Metadados da versão atual ({version, window_size, rows, last_date, trained_at}) ou None."""
+        path = os.path.join(self._base_dir(indicator, model_type), POINTER_FILE)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Registro de modelo inválido para {indicator}/{model_type}: {e}")
+            return None
+
+    def _write_pointer(self, indicator, model_type, pointer):
+        base_dir = self._base_dir(indicator, model_type)
+        fd, tmp = tempfile.mkstemp(dir=base_dir, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(pointer, f)
+            os.replace(tmp, os.path.join(base_dir, POINTER_FILE))
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def _swap(self, registered):
+        with self._lock:
+            self._models[(registered.indicator, registered.model_type)] = registered
+            self.generation += 1
+
+    def train(self, indicator, model_type, values, last_date, window_size=WINDOW_SIZE):
+        """Treina, grava uma nova versão, publica o ponteiro e troca o modelo em memória."""
+        values = np.asarray(values, dtype=float)
+        # Treino em segundo plano: pode pagar o custo do modelo direto, que prevê rápido
+        model, scaler = train_model(values, window_size, model_type, horizon=DIRECT_HORIZON)
+
+        with self._lock:
+            pointer = self.read_pointer(indicator, model_type)
+            version = pointer["version"] + 1 if pointer else 1
+            version_dir = os.path.join(self._base_dir(indicator, model_type), f"v{version}")
+            save_model(model, scaler, indicator, model_dir=version_dir, is_deepseek=model_type == "deepseek")
+            pointer = {
+                "version": version,
+                "window_size": window_size,
+                "rows": int(len(values)),
+                "last_date": f"{pd.Timestamp(last_date):%Y-%m-%d}",
+                "trained_at": pd.Timestamp.now().isoformat(),
+            }
+            self._write_pointer(indicator, model_type, pointer)
+            self._prune_versions(indicator, model_type, version)
+
+        registered = RegisteredModel(indicator, model_type, version, window_size, model, scaler,
+                                     pointer["rows"], pointer["last_date"])
+        self._swap(registered)
+        return registered
+
+    def _prune_versions(self, indicator, model_type, current):
+        base_dir = self._base_dir(indicator, model_type)
+        for name in os.listdir(base_dir):
+            match = VERSION_DIR.match(name)
+            if match and int(match.group(1)) <= current - KEEP_VERSIONS:
+                try:
+                    shutil.rmtree(os.path.join(base_dir, name))
+                except OSError as e:
+                    print(f"Erro ao apagar a versão {name} de {indicator}/{model_type}: {e}")
+
+    def refresh(self, keys):
+        """Faz o próximo get de cada (indicador, tipo) conferir o ponteiro no disco na hora."""
+        for key in keys:
+            self._checked_at.pop(tuple(key), None)
+
+    def get(self, indicator, model_type):
+        """
+        Modelo atual em memória. O ponteiro no disco é conferido no máximo a cada
+        reload_check_seconds; se apontar para outra versão, ela é carregada e trocada.
+        """
+        key = (indicator, model_type)
+        registered = self._models.get(key)
+        now = self._clock()
+        if registered is not None and now - self._checked_at.get(key, float("-inf")) < self.reload_check_seconds:
+            return registered
+        self._checked_at[key] = now
+
+        pointer = self.read_pointer(indicator, model_type)
+        if pointer is None or (registered is not None and registered.version == pointer["version"]):
+            return registered
+
+        version_dir = os.path.join(self._base_dir(indicator, model_type), f"v{pointer['version']}")
+        model, scaler = load_model(indicator, model_dir=version_dir, model_type=model_type)
+        if model is None:
+            return registered
+
+        registered = RegisteredModel(indicator, model_type, pointer["version"], pointer["window_size"], model,
+                                     scaler, pointer.get("rows", 0), pointer.get("last_date"))
+        self._swap(registered)
+        return registered
+
+    def forecast(self, indicator, historical_data, periods=90, window_size=WINDOW_SIZE, model_type="deepseek"):
+        """
+        Previsão só com inferência, usando o modelo registrado. Retorna None quando
+        não há modelo compatível (tipo ou janela), e quem chama decide se treina.
+        """
+        df = prepare_history(historical_data)
+        values = df['valor'].to_numpy(dtype=float)
+        if len(values) < max(10, window_size + 5):
+            return None
+
+        model_type = resolve_model_type(values, model_type)
+        registered = self.get(indicator, model_type)
+        if registered is None or registered.window_size != window_size:
+            return None
+        return forecast_with_model(registered.model, registered.scaler, values, df['data'].iloc[-1], periods,
+                                   model_type)
+
+    def needs_training(self, indicator, model_type, rows, last_date):
+        pointer = self.read_pointer(indicator, model_type)
+        return pointer is None or pointer.get("rows") != rows or pointer.get("last_date") != f"{last_date:%Y-%m-%d}"
+
+    def train_all(self, series, model_types=MODEL_TYPES, window_size=WINDOW_SIZE):
+        """
+        Treina os modelos dos indicadores cujos dados mudaram desde o último treino.
+        `series` mapeia o indicador para um DataFrame com as colunas data e valor.
+        Retorna a lista de (indicador, tipo) treinados.
+        """
+        trained = []
+        for indicator, df in series.items():
+            values = pd.to_numeric(df['valor'], errors='coerce').to_numpy(dtype=float)
+            if len(values) < max(10, window_size + 5):
+                continue
+            last_date = pd.Timestamp(df['data'].iloc[-1])
+            for model_type in model_types:
+                if not self.needs_training(indicator, model_type, len(values), last_date):
+                    continue
+                try:
+                    self.train(indicator, model_type, values, last_date, window_size)
+                    trained.append((indicator, model_type))
+                except Exception as e:
+                    print(f"Erro ao treinar {model_type} para {indicator}: {e}")
+        return trained
+
+
+def train_all_in_process(model_dir, series, model_types=MODEL_TYPES, window_size=WINDOW_SIZE):
+    """Ponto de entrada do processo de treino: grava as versões novas no registro em model_dir."""
+    return ModelRegistry(model_dir).train_all(series, model_types, window_size)
+
+
+async def retrain_on_new_data(registry, repository, leader_lock=None, model_types=MODEL_TYPES,
+                              interval=RETRAIN_CHECK_SECONDS, executor_factory=_default_executor):
+    """
+    Tarefa em segundo plano: quando a versão dos dados muda, retreina os modelos dos
+    indicadores afetados num processo próprio, para que o treino não dispute a CPU
+    (e o GIL) com as requisições. As versões novas chegam a este processo pelo
+    ponteiro gravado no disco. Com vários workers, só o líder treina; os demais
+    também recebem as versões novas pelo ponteiro.
+    """
+    trained_version = None
+    executor = None
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            snapshot = repository.atual
+            if snapshot.versao == trained_version or not snapshot.dados:
+                continue
+            if leader_lock is not None and not leader_lock.lider:
+                continue
+            if executor is None:
+                executor = executor_factory(max_workers=1)
+            try:
+                trained = await loop.run_in_executor(
+                    executor, partial(train_all_in_process, registry.model_dir, dict(snapshot.dados), model_types)
+                )
+                trained_version = snapshot.versao
+                if trained:
+                    registry.refresh(trained)
+                    # Carrega já as versões novas, numa thread, para o próximo /predict não pagar a leitura
+                    for indicator, model_type in trained:
+                        await asyncio.to_thread(registry.get, indicator, model_type)
+                    print(f"Modelos treinados: {', '.join(f'{i}/{t}' for i, t in trained)}")
+            except Exception as e:
+                # Um processo de treino que morreu (ex.: falta de memória) é recriado na próxima rodada
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = None
+                print(f"Erro no treino em segundo plano: {e}")
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+if __name__ == "__main__":
+    # Treino offline a partir das séries gravadas localmente (a partir de src/backend):
+    #     python -m ml.model_registry
+    from utils.dados import URLS
+    from utils.publicacao import carregar_ultima_versao
+
+    _, series = carregar_ultima_versao(URLS)
+    if not series:
+        raise SystemExit("Nenhuma série gravada localmente; inicie a API uma vez para baixá-las.")
+    for indicator, model_type in ModelRegistry().train_all(series):
+        print(f"{indicator}/{model_type} treinado")
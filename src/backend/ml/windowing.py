@@ -0,0 +1,24 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def sliding_windows(series, window_size, horizon=None):
+    """
+    Janelas deslizantes para treino: X[i] = series[i:i+window_size] e y[i] = series[i+window_size].
+    Com horizon, y[i] passa a ser o vetor dos `horizon` valores seguintes à janela
+    (alvo de um modelo de previsão direta de vários passos).
+
+    X e y são visões (somente leitura) do próprio array, sem copiar cada janela:
+    X ocupa a memória da série, não len(series) * window_size valores.
+    Quem precisar de um array contíguo (ex.: tensor do torch) faz uma única cópia.
+    """
+    series = np.asarray(series)
+    if horizon is None:
+        if len(series) <= window_size:
+            return np.empty((0, window_size), dtype=series.dtype), np.empty(0, dtype=series.dtype)
+        return sliding_window_view(series[:-1], window_size), series[window_size:]
+
+    if len(series) < window_size + horizon:
+        return np.empty((0, window_size), dtype=series.dtype), np.empty((0, horizon), dtype=series.dtype)
+    windows = sliding_window_view(series, window_size + horizon)
+    return windows[:, :window_size], windows[:, window_size:]
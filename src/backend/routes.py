@@ -1,19 +1,49 @@
-from fastapi import FastAPI, HTTPException, Query, APIRouter, Body
-from utils.dados import carregar_dados, atualizar_dados, filtrar_por_ano_mes, filtrar_pib_por_ano_trimestre
+import asyncio
+from fastapi import FastAPI, HTTPException, Query, APIRouter, Body, Request, Response
+from utils.dados import URLS, filtrar_por_ano_mes, filtrar_pib_por_ano_trimestre, filtrar_por_periodo
+from utils.repositorio import RepositorioDados, EstadoCarga
+from utils.publicacao import TravaLider
+from utils.serializacao import (resposta_do_snapshot, negociar_formato, gerar_ndjson, aceita_gzip, etag_confere,
+                                serializar_registros, SERIALIZADORES, FORMATO_NDJSON)
+from utils.agregacao import serie_para_grafico
+from utils.cubos import periodos_do_cubo
+from utils.memoria import relatorio_memoria
 from utils.alertas import *
 from ml.ml_models import predict_future_values  # Importar a função do novo local
+from ml.forecast_cache import ForecastCache, forecast_key
+from ml.model_registry import ModelRegistry
+from ml.forecast_pool import ForecastPool, ForecastTimeout
+from ml.forecast_jobs import ForecastJobQueue, JobQueueFull, DONE, FAILED
 from typing import List, Dict, Any, Optional
+from datetime import date
 from pydantic import BaseModel
+from fastapi.responses import StreamingResponse, JSONResponse
 
 router = APIRouter()
 
-dados = carregar_dados()
+# Nenhum acesso à rede na importação: o lifespan (ver main.py) publica a última versão
+# gravada em disco e completa os dados em segundo plano. Até lá, as séries respondem 503.
+repositorio = RepositorioDados()
+estado_carga = EstadoCarga(URLS)
+# Com vários workers, só o líder acessa o BCB; os demais abrem o que ele publicou (ver utils/publicacao.py)
+trava_lider = TravaLider()
 
-if dados:
-    # Atualização para incluir o PIB
-    dados = atualizar_dados(dados)
-else:
-    raise RuntimeError("Não foi possível carregar os dados iniciais.")
+# Previsões já calculadas, reaproveitadas entre usuários até a próxima versão dos dados
+forecast_cache = ForecastCache()
+# Modelos pré-treinados por indicador: /predict só faz inferência quando há um compatível
+model_registry = ModelRegistry()
+# Treinos por pedido rodam em processos separados, com limite de concorrência e de tempo
+forecast_pool = ForecastPool()
+
+def exigir_serie(snapshot, nome: str):
+    """Interrompe com 503 enquanto a série ainda não foi carregada."""
+    if nome not in snapshot.dados:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Dados de {nome} ainda não disponíveis; tente novamente em instantes",
+            headers={"Retry-After": "5"},
+        )
+    return snapshot.dados[nome]
 
 class PredictionRequest(BaseModel):
     historical_data: List[Dict[str, Any]]
@@ -21,29 +51,81 @@ class PredictionRequest(BaseModel):
     window_size: int = 15
     model_type: str = "deepseek"
 
+def serie_no_periodo(nome: str, start_date: Optional[date], end_date: Optional[date]):
+    """Recorta a série do Snapshot atual pelo período pedido (datas inclusivas)."""
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date deve ser anterior ou igual a end_date")
+    return filtrar_por_periodo(exigir_serie(repositorio.atual, nome), start_date, end_date)
+
+def resposta_serie(request: Request, nome: str, start_date: Optional[date], end_date: Optional[date],
+                   formato: Optional[str] = None):
+    """
+    Série completa: bytes JSON pré-serializados da versão atual, com ETag e gzip.
+    Recortes por período são serializados na hora.
+    O formato (registros, colunar ou ndjson) vem de `formato` ou do cabeçalho Accept;
+    ndjson é transmitido em blocos, sem montar a resposta inteira na memória.
+    """
+    try:
+        formato = negociar_formato(formato, request.headers.get("accept"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if formato == "ndjson":
+        # O gerador guarda a referência ao DataFrame desta versão até o fim do envio
+        return StreamingResponse(
+            gerar_ndjson(serie_no_periodo(nome, start_date, end_date)),
+            media_type=FORMATO_NDJSON,
+            headers={"Vary": "Accept"},
+        )
+
+    if start_date or end_date:
+        recorte = serie_no_periodo(nome, start_date, end_date)
+        serializar, media_type = SERIALIZADORES[formato]
+        return Response(content=serializar(recorte), media_type=media_type, headers={"Vary": "Accept"})
+
+    snapshot = repositorio.atual
+    exigir_serie(snapshot, nome)
+    resposta = resposta_do_snapshot(snapshot, nome, formato)
+    # Corpo gzip e descomprimido são representações diferentes, cada uma com seu ETag
+    usar_gzip = aceita_gzip(request.headers.get("accept-encoding"))
+    cabecalhos = {"ETag": resposta.etag_gzip if usar_gzip else resposta.etag, "Vary": "Accept, Accept-Encoding",
+                  "Cache-Control": "no-cache"}
+    if etag_confere(request.headers.get("if-none-match"), resposta.etag):
+        return Response(status_code=304, headers=cabecalhos)
+    if usar_gzip:
+        cabecalhos["Content-Encoding"] = "gzip"
+        return Response(content=resposta.corpo_gzip, media_type=resposta.media_type, headers=cabecalhos)
+    return Response(content=resposta.corpo, media_type=resposta.media_type, headers=cabecalhos)
+
 @router.get("/selic")
-def get_selic():
-    return dados["selic"].to_dict(orient="records")
+def get_selic(request: Request, start_date: Optional[date] = Query(None), end_date: Optional[date] = Query(None),
+             formato: Optional[str] = Query(None)):
+    return resposta_serie(request, "selic", start_date, end_date, formato)
 
 @router.get("/cambio")
-def get_cambio():
-    return dados["cambio"].to_dict(orient="records")
+def get_cambio(request: Request, start_date: Optional[date] = Query(None), end_date: Optional[date] = Query(None),
+             formato: Optional[str] = Query(None)):
+    return resposta_serie(request, "cambio", start_date, end_date, formato)
 
 @router.get("/ipca")
-def get_ipca():
-    return dados["ipca"].to_dict(orient="records")
+def get_ipca(request: Request, start_date: Optional[date] = Query(None), end_date: Optional[date] = Query(None),
+             formato: Optional[str] = Query(None)):
+    return resposta_serie(request, "ipca", start_date, end_date, formato)
 
 @router.get("/pib")
-def get_pib():
-    return dados["pib"].to_dict(orient="records")
+def get_pib(request: Request, start_date: Optional[date] = Query(None), end_date: Optional[date] = Query(None),
+             formato: Optional[str] = Query(None)):
+    return resposta_serie(request, "pib", start_date, end_date, formato)
 
 @router.get("/divida")
-def get_divida():
-    return dados["divida"].to_dict(orient="records")
+def get_divida(request: Request, start_date: Optional[date] = Query(None), end_date: Optional[date] = Query(None),
+             formato: Optional[str] = Query(None)):
+    return resposta_serie(request, "divida", start_date, end_date, formato)
 
 @router.get("/desemprego")
-def get_desemprego():
-    return dados["desemprego"].to_dict(orient="records")
+def get_desemprego(request: Request, start_date: Optional[date] = Query(None), end_date: Optional[date] = Query(None),
+             formato: Optional[str] = Query(None)):
+    return resposta_serie(request, "desemprego", start_date, end_date, formato)
 
 @router.get("/filtro/{tipo}")
 def get_filtrado(tipo: str, ano: str = Query(...), mes: str = Query(...)):
@@ -54,8 +136,8 @@ def get_filtrado(tipo: str, ano: str = Query(...), mes: str = Query(...)):
         # PIB deve usar trimestre em vez de mês
         raise HTTPException(status_code=400, detail="Para dados do PIB, use a rota /filtro-pib/{ano}/{trimestre}")
     
-    df = dados[tipo]
-    filtrado = filtrar_por_ano_mes(df, ano, mes)
+    snapshot = repositorio.atual
+    filtrado = filtrar_por_ano_mes(exigir_serie(snapshot, tipo), ano, mes, snapshot.indices[tipo])
     return filtrado.to_dict(orient="records")
 
 # Nova rota específica para filtrar PIB por trimestre
@@ -65,55 +147,216 @@ def get_pib_filtrado(ano: str, trimestre: Optional[str] = Query(None)):
     Filtra os dados do PIB por ano e trimestre.
     Se o trimestre não for fornecido, retorna todos os trimestres do ano.
     """
-    df = dados["pib"]
-    filtrado = filtrar_pib_por_ano_trimestre(df, ano, trimestre)
+    snapshot = repositorio.atual
+    filtrado = filtrar_pib_por_ano_trimestre(exigir_serie(snapshot, "pib"), ano, trimestre, snapshot.indices["pib"])
     
     if filtrado.empty:
         raise HTTPException(status_code=404, detail=f"Dados não encontrados para o ano {ano} e trimestre {trimestre}")
         
     return filtrado.to_dict(orient="records")
 
-@router.post("/predict/{indicator_name}")
-async def predict_indicator(indicator_name: str, request: PredictionRequest):
+@router.get("/grafico/{tipo}")
+def get_grafico(tipo: str, frequencia: Optional[str] = Query(None), funcao: str = Query("media"),
+                pontos: Optional[int] = Query(None, ge=3, le=5000),
+                start_date: Optional[date] = Query(None), end_date: Optional[date] = Query(None)):
     """
-    Gera previsões para um indicador econômico
+    Série reduzida para gráficos: agregada por frequência (diaria, semanal, mensal,
+    trimestral, anual) com a função pedida (media, ultimo, min, max) e/ou reduzida
+    a `pontos` observações por LTTB. Sem parâmetros, devolve até 500 pontos.
     """
-    # Validar se o indicator_name é válido
-    if indicator_name.lower() not in ["selic", "cambio", "ipca", "pib", "divida", "desemprego"]:
-        raise HTTPException(status_code=400, detail="Indicador deve ser: selic, cambio, ipca, pib, divida ou desemprego")
+    if tipo not in ["selic", "cambio", "ipca", "pib", "divida", "desemprego"]:
+        raise HTTPException(status_code=400, detail="Tipo deve ser: selic, cambio, ipca, pib, divida ou desemprego")
 
+    recorte = serie_no_periodo(tipo, start_date, end_date)
     try:
-        # Verificar se há dados históricos suficientes
-        if len(request.historical_data) < request.window_size * 2:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Dados históricos insuficientes para análise de {indicator_name.upper()}. Necessários pelo menos {request.window_size * 2} pontos."
-            )
-            
-        forecast_df = predict_future_values(
+        reduzida = serie_para_grafico(recorte, frequencia, funcao, pontos)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(content=serializar_registros(reduzida), media_type="application/json")
+
+@router.get("/agregados/{tipo}")
+def get_agregados(tipo: str, periodicidade: str = Query("mensal"), ano: Optional[str] = Query(None)):
+    """
+    Agregados materializados da série (contagem, soma, média, mínimo, máximo e último
+    valor) por mês, trimestre ou ano, lidos do Snapshot atual sem varrer os dados.
+    """
+    if tipo not in ["selic", "cambio", "ipca", "pib", "divida", "desemprego"]:
+        raise HTTPException(status_code=400, detail="Tipo deve ser: selic, cambio, ipca, pib, divida ou desemprego")
+
+    snapshot = repositorio.atual
+    exigir_serie(snapshot, tipo)
+    try:
+        return periodos_do_cubo(snapshot.cubos.get(tipo), periodicidade, ano)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+INDICADORES_PREVISAO = ["selic", "cambio", "ipca", "pib", "divida", "desemprego"]
+
+def validar_pedido_previsao(indicator_name: str, request: PredictionRequest):
+    """Interrompe com 400 se o indicador não existe ou não há histórico suficiente."""
+    if indicator_name.lower() not in INDICADORES_PREVISAO:
+        raise HTTPException(status_code=400, detail="Indicador deve ser: selic, cambio, ipca, pib, divida ou desemprego")
+
+    if len(request.historical_data) < request.window_size * 2:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Dados históricos insuficientes para análise de {indicator_name.upper()}. Necessários pelo menos {request.window_size * 2} pontos."
+        )
+
+def chave_previsao(indicator_name: str, request: PredictionRequest):
+    # O indicador entra na chave porque cada um tem o seu modelo registrado
+    return f"{indicator_name.lower()}:{forecast_key(request.historical_data, request.periods, request.window_size, request.model_type)}"
+
+async def gerar_previsao(indicator_name: str, request: PredictionRequest, chave: str, on_progress=None):
+    """
+    Previsão pelo caminho mais barato disponível: cache, modelo registrado
+    (só inferência) ou treino no pool de processos. Retorna None se falhar.
+    """
+    # Mesmo pedido (dados normalizados + parâmetros) já atendido: devolve sem treinar de novo
+    # (o cache vale para a versão dos dados e a geração dos modelos registrados)
+    forecast_cache.sync_version((repositorio.atual.versao, model_registry.generation))
+    forecast_df = forecast_cache.get(chave)
+
+    if forecast_df is None:
+        # Modelo já treinado para o indicador: só inferência sobre os dados enviados,
+        # numa thread para não travar o event loop (o modelo fica na memória deste processo)
+        forecast_df = await asyncio.to_thread(
+            model_registry.forecast,
+            indicator_name.lower(),
             request.historical_data,
             periods=request.periods,
             window_size=request.window_size,
             model_type=request.model_type
         )
+
+    if forecast_df is None:
+        # Sem modelo compatível (ainda não treinado ou outra janela): treina no pool de processos
+        forecast_df = await forecast_pool.run(
+            predict_future_values,
+            request.historical_data,
+            periods=request.periods,
+            window_size=request.window_size,
+            model_type=request.model_type,
+            on_progress=on_progress
+        )
+
+    if forecast_df is not None:
+        forecast_cache.put(chave, forecast_df)
+    return forecast_df
+
+def registros_previsao(forecast_df):
+    result = forecast_df.copy()
+    result['data'] = result['data'].dt.strftime('%Y-%m-%d')
+    return result.to_dict(orient='records')
+
+async def executar_job_previsao(job, on_progress):
+    return await gerar_previsao(job.indicator, job.params, job.key, on_progress)
+
+# Fila de jobs de previsão: o cliente recebe um id e acompanha o resultado sem segurar a conexão
+forecast_jobs = ForecastJobQueue(executar_job_previsao, workers=forecast_pool.max_concurrent)
+
+@router.post("/predict/{indicator_name}")
+async def predict_indicator(indicator_name: str, request: PredictionRequest):
+    """
+    Gera previsões para um indicador econômico
+    """
+    validar_pedido_previsao(indicator_name, request)
+
+    try:
+        forecast_df = await gerar_previsao(indicator_name, request, chave_previsao(indicator_name, request))
         
         if forecast_df is None:
             raise HTTPException(status_code=400, detail="Não foi possível gerar previsões")
             
-        result = forecast_df.copy()
-        result['data'] = result['data'].dt.strftime('%Y-%m-%d')
-        
-        return result.to_dict(orient='records')
+        return registros_previsao(forecast_df)
     
+    except HTTPException:
+        raise
+    except ForecastTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao gerar previsão: {str(e)}")
 
+@router.post("/predict/{indicator_name}/jobs", status_code=202)
+async def criar_job_previsao(indicator_name: str, request: PredictionRequest, response: Response):
+    """
+    Enfileira uma previsão e responde na hora com o id do job. Um pedido idêntico
+    a outro ainda pendente, ou já concluído sobre a mesma versão dos dados e dos
+    modelos registrados, recebe o mesmo job. Com a fila cheia, responde 503.
+    """
+    validar_pedido_previsao(indicator_name, request)
+    try:
+        job, _ = forecast_jobs.submit(indicator_name.lower(), chave_previsao(indicator_name, request), request,
+                                      version=(repositorio.atual.versao, model_registry.generation))
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    response.headers["Location"] = f"/jobs/{job.id}"
+    return job.to_dict()
+
+def exigir_job(job_id: str):
+    job = forecast_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado ou expirado")
+    return job
+
+@router.get("/jobs/{job_id}")
+def estado_job(job_id: str):
+    return exigir_job(job_id).to_dict()
+
+def status_falha_job(job):
+    """Mesmo código do /predict para a falha: 400 sem previsão, 504 por tempo limite, 500 nos demais erros."""
+    if job.error_type is None:
+        return 400
+    if issubclass(job.error_type, ForecastTimeout):
+        return 504
+    return 500
+
+@router.get("/jobs/{job_id}/result")
+def resultado_job(job_id: str):
+    """Previsão do job concluído; 202 com o estado enquanto ainda está na fila ou rodando."""
+    job = exigir_job(job_id)
+    if job.status == FAILED:
+        raise HTTPException(status_code=status_falha_job(job), detail=job.error)
+    if job.status != DONE:
+        return JSONResponse(status_code=202, content=job.to_dict())
+    return registros_previsao(job.result)
+
+@router.get("/jobs/{job_id}/events")
+def eventos_job(job_id: str):
+    """Acompanha o job por Server-Sent Events (progresso por época e mudanças de estado)."""
+    job = exigir_job(job_id)
+    return StreamingResponse(forecast_jobs.events(job), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
 @router.get("/alertas")
 def rota_alertas():
-    # Carregar dados frescos para os alertas
-    dados_frescos = carregar_dados()
-    if not dados_frescos:
-        raise HTTPException(status_code=500, detail="Erro ao carregar dados para alertas")
-        
-    lista_de_alertas = gerar_alertas(dados_frescos)
-    return {"alertas": lista_de_alertas}
\ No newline at end of file
+    # Alertas calculados sobre o Snapshot atual e reaproveitados até a próxima versão
+    snapshot = repositorio.atual
+    if not snapshot.dados:
+        raise HTTPException(status_code=503, detail="Dados ainda não carregados para alertas",
+                            headers={"Retry-After": "5"})
+
+    lista_de_alertas = alertas_do_snapshot(snapshot)
+    return {"alertas": lista_de_alertas}
+
+@router.get("/memoria")
+def rota_memoria():
+    """Relatório de uso de memória por série da versão atual dos dados."""
+    return relatorio_memoria(repositorio.atual)
+
+@router.get("/vivo")
+def rota_vivo():
+    """Liveness: o processo está de pé e atendendo, com ou sem dados."""
+    return {"status": "ok"}
+
+@router.get("/pronto")
+def rota_pronto(response: Response):
+    """
+    Readiness: 200 quando todas as séries têm dados para servir (mesmo que vindos do
+    disco), 503 caso contrário. Traz o estado, a origem e a idade de cada série.
+    """
+    snapshot = repositorio.atual
+    pronto = estado_carga.pronto()
+    if not pronto:
+        response.status_code = 503
+    return {"pronto": pronto, "versao": snapshot.versao, "series": estado_carga.relatorio(snapshot)}
@@ -0,0 +1,76 @@
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.agregacao import agregar, lttb, reduzir_pontos, serie_para_grafico
+
+
+@pytest.fixture
+def serie_diaria():
+    datas = pd.date_range("2020-01-01", "2023-12-31", freq="B")
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({"data": datas, "valor": 10 + np.cumsum(rng.normal(0, 0.1, len(datas)))})
+
+
+@pytest.mark.parametrize("funcao,metodo", [("media", "mean"), ("ultimo", "last"), ("min", "min"), ("max", "max")])
+def test_agregar_mensal_igual_groupby(serie_diaria, funcao, metodo):
+    resultado = agregar(serie_diaria, "mensal", funcao)
+    periodo = serie_diaria["data"].dt.to_period("M")
+    esperado = serie_diaria.groupby(periodo)["valor"].agg(metodo)
+
+    assert len(resultado) == 48
+    assert resultado["data"].iloc[0] == pd.Timestamp("2020-01-01")
+    np.testing.assert_allclose(resultado["valor"].to_numpy(), esperado.to_numpy())
+
+
+def test_agregar_descarta_periodos_vazios():
+    df = pd.DataFrame({"data": pd.to_datetime(["2020-01-15", "2020-04-15"]), "valor": [1.0, 2.0]})
+    resultado = agregar(df, "mensal")
+    assert resultado["data"].tolist() == [pd.Timestamp("2020-01-01"), pd.Timestamp("2020-04-01")]
+
+
+@pytest.mark.parametrize("frequencia,funcao", [("horaria", "media"), ("mensal", "mediana")])
+def test_agregar_parametro_invalido(serie_diaria, frequencia, funcao):
+    with pytest.raises(ValueError):
+        agregar(serie_diaria, frequencia, funcao)
+
+
+def test_lttb_mantem_extremidades_e_tamanho():
+    x = np.arange(1000, dtype=float)
+    y = np.sin(x / 50)
+    indices = lttb(x, y, 100)
+
+    assert len(indices) == 100
+    assert indices[0] == 0 and indices[-1] == 999
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_lttb_preserva_pico_isolado():
+    x = np.arange(10_000, dtype=float)
+    y = np.zeros(10_000)
+    y[4321] = 100.0
+    assert 4321 in lttb(x, y, 50)
+
+
+def test_lttb_serie_menor_que_pontos_devolve_tudo():
+    assert lttb(np.arange(10.0), np.arange(10.0), 50).tolist() == list(range(10))
+
+
+def test_reduzir_pontos(serie_diaria):
+    reduzida = reduzir_pontos(serie_diaria, 200)
+    assert len(reduzida) == 200
+    assert reduzida["data"].iloc[0] == serie_diaria["data"].iloc[0]
+    assert reduzida["data"].iloc[-1] == serie_diaria["data"].iloc[-1]
+
+
+def test_serie_para_grafico_sem_parametros_limita_pontos(serie_diaria):
+    assert len(serie_para_grafico(serie_diaria)) == 500
+
+
+def test_serie_para_grafico_agrega_e_reduz(serie_diaria):
+    resultado = serie_para_grafico(serie_diaria, "semanal", "ultimo", pontos=50)
+    assert len(resultado) == 50
+    assert list(resultado.columns) == ["data", "valor"]
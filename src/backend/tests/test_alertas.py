@@ -53,4 +53,220 @@ def test_alerta_formato_mensagem(dados_de_teste):
     
     for alerta in alertas:
         assert "Alerta" in alerta
-        assert "-" in alerta  # Deve conter data e valor formatado
\ No newline at end of file
+        assert "-" in alerta  # Deve conter data e valor formatado
+
+def test_alertas_do_snapshot_calcula_uma_vez_por_versao(dados_de_teste, monkeypatch):
+    import utils.alertas as alertas
+    from utils.repositorio import RepositorioDados
+
+    chamadas = []
+    inicializar_original = alertas.AvaliadorAlertas.inicializar
+
+    def inicializar_contando(self, dados):
+        chamadas.append(1)
+        return inicializar_original(self, dados)
+
+    monkeypatch.setattr(alertas.AvaliadorAlertas, "inicializar", inicializar_contando)
+    repositorio = RepositorioDados(dados_de_teste)
+
+    primeira = alertas.alertas_do_snapshot(repositorio.atual)
+    segunda = alertas.alertas_do_snapshot(repositorio.atual)
+    assert primeira is segunda
+    assert primeira == gerar_alertas(dados_de_teste)
+    assert len(chamadas) == 1
+
+    # A versão seguinte avalia só as linhas novas, sem recalcular o histórico
+    nova = pd.DataFrame({"data": ["11/01/2023"], "valor": [20.0]})
+    dados = dict(dados_de_teste, selic=pd.concat([dados_de_teste["selic"], nova], ignore_index=True))
+    repositorio.publicar(dados, {"selic": nova})
+    terceira = alertas.alertas_do_snapshot(repositorio.atual)
+    assert len(chamadas) == 1
+    assert "Alerta Selic: valor muito alto em 11/01/2023 - 20.00" in terceira
+    # Com o novo ponto o desvio do histórico cresce: 14.00 deixa de ser extremo, como no cálculo completo
+    assert terceira == gerar_alertas(dados)
+
+
+def test_alertas_incrementais_iguais_ao_calculo_completo():
+    import numpy as np
+    import utils.alertas as alertas
+    from utils.repositorio import RepositorioDados
+
+    rng = np.random.default_rng(1)
+    n = 400
+    datas = pd.date_range("2020-01-01", periods=n, freq="D")
+    completos = {
+        "selic": pd.DataFrame({"data": datas, "valor": 10 + np.cumsum(rng.normal(0, 0.05, n))}),
+        "cambio": pd.DataFrame({"data": datas, "valor": 5 + np.cumsum(rng.normal(0, 0.08, n))}),
+        "ipca": pd.DataFrame({"data": datas, "valor": rng.normal(0.4, 0.3, n)}),
+    }
+    cortes = [300, 301, 330, 360, 399, 400]
+    repositorio = RepositorioDados({nome: df.iloc[:cortes[0]] for nome, df in completos.items()})
+    assert alertas.alertas_do_snapshot(repositorio.atual) == gerar_alertas(repositorio.atual.dados)
+
+    for inicio, fim in zip(cortes, cortes[1:]):
+        dados = {nome: df.iloc[:fim] for nome, df in completos.items()}
+        repositorio.publicar(dados, {nome: df.iloc[inicio:fim] for nome, df in completos.items()})
+        assert repositorio.atual.incremental
+        assert alertas.alertas_do_snapshot(repositorio.atual) == gerar_alertas(dados)
+
+
+def test_falha_incremental_recalcula_sem_corromper_o_cache(dados_de_teste, monkeypatch):
+    import utils.alertas as alertas
+    from utils.repositorio import RepositorioDados
+
+    repositorio = RepositorioDados(dados_de_teste)
+    alertas.alertas_do_snapshot(repositorio.atual)
+    avaliador = alertas._cache_alertas["avaliador"]
+    estado_antes = {nome: list(e["alertas"]) for nome, e in avaliador.estado.items()}
+
+    def processar_com_erro(self, nome, df_novo, df_completo):
+        raise RuntimeError("falha no meio")
+
+    monkeypatch.setattr(alertas.AvaliadorAlertas, "processar", processar_com_erro)
+    nova = pd.DataFrame({"data": ["11/01/2023"], "valor": [20.0]})
+    dados = dict(dados_de_teste, selic=pd.concat([dados_de_teste["selic"], nova], ignore_index=True))
+    repositorio.publicar(dados, {"selic": nova})
+
+    assert alertas.alertas_do_snapshot(repositorio.atual) == gerar_alertas(dados)
+    assert {nome: list(e["alertas"]) for nome, e in avaliador.estado.items()} == estado_antes
+
+
+def test_alerta_variacao_diaria_marca_apenas_linhas_acima_do_limite():
+    from utils.alertas import alerta_variacao_diaria
+
+    df = pd.DataFrame({
+        "data": pd.date_range("2024-01-01", periods=4, freq="D"),
+        "valor": ["10,0", "10,5", "10,5", "9,0"]
+    })
+
+    alertas = alerta_variacao_diaria(df, "Selic", percentual_limite=3.0)
+
+    assert alertas == [
+        "Alerta Selic: variação diária fora do comum em 2024-01-02 00:00:00 - variação de 5.00%",
+        "Alerta Selic: variação diária fora do comum em 2024-01-04 00:00:00 - variação de -14.29%",
+    ]
+
+
+def test_avaliador_incremental_equivale_ao_historico_completo():
+    from utils.alertas import AvaliadorAlertas
+
+    valores = [13.75, 13.75, 14.00, 13.50, 13.75, 12.00, 13.75, 14.25]
+    df = pd.DataFrame({"data": pd.date_range("2024-01-01", periods=8, freq="D"), "valor": valores})
+
+    incremental = AvaliadorAlertas().inicializar({"selic": df.iloc[:3]})
+    incremental.processar("selic", df.iloc[3:6], df.iloc[:6])
+    incremental.processar("selic", df.iloc[6:], df)
+    completo = AvaliadorAlertas().inicializar({"selic": df})
+
+    assert incremental.alertas() == completo.alertas() == gerar_alertas({"selic": df})
+
+
+def test_avaliador_processa_linhas_novas_sem_reler_o_historico():
+    import numpy as np
+    from utils.alertas import AvaliadorAlertas
+
+    rng = np.random.default_rng(3)
+    valores = 10 + np.cumsum(rng.normal(0, 0.1, 500))
+    valores[[40, 450]] = np.nan
+    df = pd.DataFrame({"data": pd.date_range("2024-01-01", periods=500, freq="D"), "valor": valores})
+
+    avaliador = AvaliadorAlertas().inicializar({"selic": df.iloc[:300]})
+    for inicio, fim in [(300, 301), (301, 420), (420, 500)]:
+        # Sem o histórico completo: média, variância e faixa de desvio vêm só do estado
+        avaliador.processar("selic", df.iloc[inicio:fim], None)
+
+    estado = avaliador.estado["selic"]["desvio"]
+    assert estado["n"] == 498
+    assert estado["media"] == pytest.approx(np.nanmean(valores))
+    assert np.sqrt(estado["m2"] / (estado["n"] - 1)) == pytest.approx(np.nanstd(valores, ddof=1))
+    assert avaliador.alertas() == gerar_alertas({"selic": df})
+
+
+def test_linhas_fora_de_ordem_reavaliam_a_serie():
+    from utils.alertas import AvaliadorAlertas
+
+    df = pd.DataFrame({"data": pd.date_range("2024-01-01", periods=8, freq="D"),
+                       "valor": [13.75, 13.75, 14.00, 13.50, 13.75, 12.00, 13.75, 14.25]})
+    avaliador = AvaliadorAlertas().inicializar({"selic": df.iloc[2:]})
+    avaliador.processar("selic", df.iloc[:2], df)
+
+    assert avaliador.alertas() == gerar_alertas({"selic": df})
+
+
+def test_avaliador_compara_primeiro_ponto_novo_com_ultimo_conhecido():
+    from utils.alertas import AvaliadorAlertas
+
+    historico = pd.DataFrame({"data": pd.date_range("2024-01-01", periods=3, freq="D"), "valor": [10.0, 10.0, 10.0]})
+    novo = pd.DataFrame({"data": [pd.Timestamp("2024-01-04")], "valor": [10.5]})
+
+    avaliador = AvaliadorAlertas().inicializar({"selic": historico})
+    alertas = avaliador.processar("selic", novo, pd.concat([historico, novo], ignore_index=True))
+
+    assert "Alerta Selic: variação diária fora do comum em 2024-01-04 00:00:00 - variação de 5.00%" in alertas
+
+
+def test_estatisticas_moveis_equivalem_ao_rolling_do_pandas():
+    import numpy as np
+    from utils.alertas import _estatisticas_moveis
+
+    valores = np.random.default_rng(0).normal(10, 2, 50)
+    media, desvio = _estatisticas_moveis(valores, 5)
+    anteriores = pd.Series(valores).shift(1).rolling(5)
+
+    assert np.allclose(media[5:], anteriores.mean().to_numpy()[5:])
+    assert np.allclose(desvio[5:], anteriores.std().to_numpy()[5:])
+    assert np.isnan(media[:5]).all()
+
+
+def test_estatisticas_moveis_voltam_depois_de_um_nan():
+    import numpy as np
+    from utils.alertas import _estatisticas_moveis
+
+    valores = np.random.default_rng(0).normal(10, 2, 60)
+    valores[20] = np.nan
+    media, desvio = _estatisticas_moveis(valores, 5)
+    anteriores = pd.Series(valores).shift(1).rolling(5)
+
+    # Só as janelas que contêm o NaN ficam sem estatística, como no pandas
+    np.testing.assert_allclose(media[5:], anteriores.mean().to_numpy()[5:])
+    np.testing.assert_allclose(desvio[5:], anteriores.std().to_numpy()[5:])
+    assert np.isnan(desvio[21:26]).all()
+    assert not np.isnan(desvio[26:]).any()
+
+
+def test_janela_constante_tem_desvio_zero_e_nao_gera_alerta_falso():
+    import numpy as np
+    from utils.alertas import _estatisticas_moveis, avaliar_regras
+
+    valores = np.array([13.65] * 30 + [13.75])
+    datas = pd.Series(pd.date_range("2024-01-01", periods=len(valores), freq="D"))
+    _, desvio = _estatisticas_moveis(valores, 21)
+
+    assert (desvio[21:] == 0).all()
+    regras = [{"tipo": "zscore_movel", "janela": 21, "limite": 4}]
+    assert avaliar_regras(valores, datas, "Câmbio", regras) == []
+
+
+def test_gerar_alertas_com_regras_personalizadas():
+    datas = pd.date_range("2024-01-01", periods=6, freq="MS")
+    dados = {
+        "desemprego": pd.DataFrame({"data": datas, "valor": [8.0, 8.1, 8.0, 8.2, 12.5, 8.1]}),
+        "divida": pd.DataFrame({"data": datas, "valor": [50.0, 50.1, 49.9, 50.0, 50.1, 58.0]}),
+    }
+    regras = {
+        "desemprego": {"rotulo": "Desemprego", "regras": [{"tipo": "nivel", "maximo": 12.0}]},
+        "divida": {"rotulo": "Dívida", "regras": [{"tipo": "zscore_movel", "janela": 4, "limite": 3}]},
+    }
+
+    alertas = gerar_alertas(dados, regras)
+
+    assert alertas[0] == "Alerta Desemprego: valor acima de 12.0 em 2024-05-01 00:00:00 - 12.50"
+    assert len(alertas) == 2
+    assert alertas[1].startswith("Alerta Dívida: valor atípico em 2024-06-01 00:00:00 - 58.00")
+
+
+def test_regra_desconhecida_gera_erro():
+    from utils.alertas import avaliar_regras
+
+    with pytest.raises(ValueError):
+        avaliar_regras(pd.Series([1.0, 2.0]).to_numpy(), pd.Series(["a", "b"]), "X", [{"tipo": "media"}])
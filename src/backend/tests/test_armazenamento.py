@@ -0,0 +1,45 @@
+import pytest
+import pandas as pd
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import utils.dados as dados
+from utils.armazenamento import salvar_serie, carregar_serie, ler_metadados
+
+
+@pytest.fixture
+def serie():
+    return pd.DataFrame({
+        "data": pd.date_range("2024-01-01", periods=5, freq="D"),
+        "valor": [10.5, 10.6, 10.4, 10.7, 10.8]
+    })
+
+
+def test_salvar_e_carregar_serie(tmp_path, serie):
+    salvar_serie("selic", serie, str(tmp_path))
+    lida = carregar_serie("selic", str(tmp_path))
+
+    assert lida is not None
+    assert list(lida["data"]) == list(serie["data"])
+    assert list(lida["valor"]) == list(serie["valor"])
+    assert ler_metadados("selic", str(tmp_path))["ultima_data"] == "2024-01-05"
+
+
+def test_carregar_serie_inexistente(tmp_path):
+    assert carregar_serie("ipca", str(tmp_path)) is None
+
+
+def test_carregar_dados_usa_armazenamento_sem_rede(tmp_path, serie, monkeypatch):
+    for nome in dados.URLS:
+        salvar_serie(nome, serie, str(tmp_path))
+
+    def sem_rede(self, *args, **kwargs):
+        raise AssertionError("carregar_dados não deveria acessar a rede")
+
+    monkeypatch.setattr(dados.requests.Session, "get", sem_rede)
+    resultado = dados.carregar_dados(diretorio=str(tmp_path))
+
+    assert set(resultado) == set(dados.URLS)
+    assert resultado["selic"]["mes"].iloc[0] == "Janeiro"
+    assert resultado["pib"]["trimestre"].iloc[0] == "1"
@@ -0,0 +1,87 @@
+import pytest
+import sys
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import utils.dados as dados
+from utils.cliente_bcb import baixar_varios, criar_sessao
+
+CSV_CANONICO = '"data";"valor"\n"02/01/2024";"11,65"\n"03/01/2024";"11,65"\n"01/04/2024";"10,40"\n'
+
+
+class ServidorBCBFalso(BaseHTTPRequestHandler):
+    atraso = 0.2
+    falhas_restantes = 0
+    em_andamento = 0
+    pico = 0
+    trava = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.trava:
+            cls.em_andamento += 1
+            cls.pico = max(cls.pico, cls.em_andamento)
+            falhar = cls.falhas_restantes > 0
+            if falhar:
+                cls.falhas_restantes -= 1
+        try:
+            time.sleep(cls.atraso)
+            corpo = CSV_CANONICO.encode("utf-8")
+            self.send_response(503 if falhar else 200)
+            self.send_header("Content-Type", "text/csv")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+        finally:
+            with cls.trava:
+                cls.em_andamento -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def servidor():
+    ServidorBCBFalso.pico = 0
+    ServidorBCBFalso.falhas_restantes = 0
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ServidorBCBFalso)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_carregar_dados_baixa_em_paralelo(servidor, tmp_path):
+    urls = {nome: f"{servidor}/{nome}?formato=csv" for nome in dados.URLS}
+
+    resultado = dados.carregar_dados(diretorio=str(tmp_path), usar_cache=False, urls=urls)
+
+    assert set(resultado) == set(dados.URLS)
+    assert list(resultado["selic"]["valor"]) == [11.65, 11.65, 10.40]
+    assert resultado["pib"]["trimestre"].tolist() == ["1", "1", "2"]
+    # Mais de uma requisição ficou em andamento ao mesmo tempo
+    assert ServidorBCBFalso.pico > 1
+
+
+def test_baixar_varios_tenta_novamente_apos_503(servidor):
+    ServidorBCBFalso.falhas_restantes = 1
+
+    with criar_sessao(backoff=0) as sessao:
+        respostas = baixar_varios({"ipca": f"{servidor}/ipca"}, sessao=sessao)
+
+    assert respostas["ipca"].status_code == 200
+
+
+def test_baixar_varios_isola_falhas(servidor):
+    with criar_sessao(tentativas=0) as sessao:
+        respostas = baixar_varios({
+            "ok": f"{servidor}/ipca",
+            "fora": "http://127.0.0.1:1/inexistente",
+        }, sessao=sessao, timeout=(0.5, 0.5))
+
+    assert respostas["ok"].status_code == 200
+    assert isinstance(respostas["fora"], Exception)
@@ -0,0 +1,80 @@
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.dados import adicionar_colunas_calendario
+from utils.cubos import construir_cubo, atualizar_cubo, periodos_do_cubo
+from utils.repositorio import RepositorioDados
+
+
+@pytest.fixture
+def serie_diaria():
+    df = pd.DataFrame({"data": pd.date_range("2022-11-01", "2024-04-30", freq="B")})
+    df["valor"] = np.random.default_rng(1).normal(10, 1, len(df))
+    return adicionar_colunas_calendario(df, "selic")
+
+
+def test_cubo_igual_ao_groupby(serie_diaria):
+    cubo = construir_cubo(serie_diaria)
+    esperado = serie_diaria.groupby(serie_diaria["data"].dt.to_period("M"))["valor"].agg(
+        ["count", "sum", "mean", "min", "max", "last"])
+
+    resumos = list(cubo["mensal"].values())
+    assert len(resumos) == len(esperado)
+    np.testing.assert_allclose([r["media"] for r in resumos], esperado["mean"])
+    np.testing.assert_allclose([r["ultimo"] for r in resumos], esperado["last"])
+    assert [r["contagem"] for r in resumos] == esperado["count"].tolist()
+    assert list(cubo["trimestral"])[:2] == [("2022", "4"), ("2023", "1")]
+    assert list(cubo["anual"]) == ["2022", "2023", "2024"]
+
+
+def test_atualizacao_incremental_igual_reconstrucao(serie_diaria):
+    corte = serie_diaria["data"] < "2024-03-15"
+    antigo, novo = serie_diaria[corte], serie_diaria[~corte]
+
+    incremental = atualizar_cubo(construir_cubo(antigo), novo)
+    completo = construir_cubo(serie_diaria)
+
+    for periodicidade in ("mensal", "trimestral", "anual"):
+        assert list(incremental[periodicidade]) == list(completo[periodicidade])
+        for chave, resumo in completo[periodicidade].items():
+            assert incremental[periodicidade][chave] == pytest.approx(resumo)
+
+
+def test_atualizacao_com_linhas_antigas_exige_reconstrucao(serie_diaria):
+    cubo = construir_cubo(serie_diaria)
+    assert atualizar_cubo(cubo, serie_diaria.head(3)) is None
+
+
+def test_periodos_mensais_usam_os_meses_da_serie(serie_diaria):
+    registros = periodos_do_cubo(construir_cubo(serie_diaria), "mensal", "2023")
+    esperado = serie_diaria[serie_diaria["ano"] == "2023"].groupby("mes", observed=True, sort=False)["valor"].mean()
+    assert [r["mes"] for r in registros] == list(esperado.index)
+    assert registros[2]["mes"] == "Março"
+    assert [r["media"] for r in registros] == pytest.approx(esperado.to_list())
+
+
+def test_periodos_do_cubo_filtra_por_ano(serie_diaria):
+    registros = periodos_do_cubo(construir_cubo(serie_diaria), "trimestral", "2023")
+    assert [r["trimestre"] for r in registros] == ["1", "2", "3", "4"]
+    with pytest.raises(ValueError):
+        periodos_do_cubo(construir_cubo(serie_diaria), "semanal")
+
+
+def test_repositorio_atualiza_cubo_com_linhas_novas(serie_diaria):
+    corte = serie_diaria["data"] < "2024-04-01"
+    antigo, novo = serie_diaria[corte].reset_index(drop=True), serie_diaria[~corte]
+    outra = serie_diaria.copy()
+    repositorio = RepositorioDados({"selic": antigo, "cambio": outra})
+    anterior = repositorio.atual
+    cubo_cambio = anterior.cubos["cambio"]
+
+    snapshot = repositorio.publicar(
+        {"selic": pd.concat([antigo, novo], ignore_index=True), "cambio": outra}, {"selic": novo})
+
+    assert snapshot.cubos["cambio"] is cubo_cambio
+    assert snapshot.cubos["selic"]["mensal"][("2024", "abril")]["contagem"] == len(novo)
+    assert ("2024", "abril") not in anterior.cubos["selic"]["mensal"]
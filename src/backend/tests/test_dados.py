@@ -29,4 +29,90 @@ def test_atualizar_dados_retorna_atualizado():
     )
     
     for key in dados_iniciais:
-        assert not dados_iniciais[key].empty
\ No newline at end of file
+        assert not dados_iniciais[key].empty
+
+class RespostaFalsa:
+    def __init__(self, texto, status_code=200):
+        self.text = texto
+        self.status_code = status_code
+
+
+def _serie_existente():
+    import pandas as pd
+    df = pd.DataFrame({
+        "data": pd.to_datetime(["2024-01-01", "2024-02-01"]),
+        "valor": [0.42, 0.83]
+    })
+    return dados.adicionar_colunas_calendario(df, "ipca")
+
+
+def test_sincronizar_serie_busca_apenas_janela_nova(tmp_path, monkeypatch):
+    import pandas as pd
+    urls = []
+
+    def get_falso(self, url, *args, **kwargs):
+        urls.append(url)
+        return RespostaFalsa('"data";"valor"\n"01/02/2024";"0,83"\n"01/03/2024";"0,16"\n')
+
+    monkeypatch.setattr(dados.requests.Session, "get", get_falso)
+    existente = _serie_existente()
+    dados.salvar_serie("ipca", existente, str(tmp_path))
+
+    atualizado, novo = dados.sincronizar_serie(
+        "ipca", existente, str(tmp_path), hoje=pd.Timestamp("2024-03-10")
+    )
+
+    assert urls == [dados.URLS["ipca"] + "&dataInicial=02/02/2024&dataFinal=10/03/2024"]
+    assert list(novo["valor"]) == [0.16]
+    assert list(atualizado["valor"]) == [0.42, 0.83, 0.16]
+    assert len(existente) == 2
+    # O armazenamento recebeu só a linha nova, anexada ao fim
+    gravado = dados.carregar_serie("ipca", str(tmp_path))
+    assert list(gravado["valor"]) == [0.42, 0.83, 0.16]
+
+
+def test_sincronizar_dados_sem_novidades(tmp_path, monkeypatch):
+    import pandas as pd
+    monkeypatch.setattr(dados.requests.Session, "get", lambda self, url, *a, **k: RespostaFalsa("", 404))
+    existente = {"ipca": _serie_existente()}
+
+    novos, linhas_novas = dados.sincronizar_dados(
+        existente, str(tmp_path), hoje=pd.Timestamp("2024-03-10")
+    )
+
+    assert linhas_novas == {}
+    assert novos["ipca"] is existente["ipca"]
+
+
+def test_filtrar_por_periodo_inclui_os_limites():
+    import pandas as pd
+    df = pd.DataFrame({
+        "data": pd.date_range("2024-01-01", periods=10, freq="D"),
+        "valor": range(10)
+    })
+
+    recorte = dados.filtrar_por_periodo(df, pd.Timestamp("2024-01-03").date(), pd.Timestamp("2024-01-05").date())
+    assert list(recorte["valor"]) == [2, 3, 4]
+
+    assert list(dados.filtrar_por_periodo(df, inicio=pd.Timestamp("2024-01-09"))["valor"]) == [8, 9]
+    assert list(dados.filtrar_por_periodo(df, fim=pd.Timestamp("2024-01-01"))["valor"]) == [0]
+    assert dados.filtrar_por_periodo(df) is df
+    # Série fora de ordem cai na busca por máscara, com o mesmo resultado
+    assert sorted(dados.filtrar_por_periodo(df.iloc[::-1], "2024-01-03", "2024-01-05")["valor"]) == [2, 3, 4]
+
+
+def test_ler_csv_bcb_virgula_decimal_e_data_brasileira():
+    df = dados._ler_csv_bcb('"data";"valor"\n"01/02/2024";"0,83"\n"13/05/2024";"1234,5"\n"31/12/2024";"10"\n')
+    df = dados.adicionar_colunas_calendario(df, "pib")
+
+    assert [str(d.date()) for d in df["data"]] == ["2024-02-01", "2024-05-13", "2024-12-31"]
+    assert list(df["valor"]) == [0.83, 1234.5, 10.0]
+    assert list(df["mes"]) == ["Fevereiro", "Maio", "Dezembro"]
+    assert list(df["trimestre"]) == ["1", "2", "4"]
+    assert (df["ano"] == "2024").all()
+
+
+def test_ler_csv_bcb_descarta_datas_invalidas():
+    df = dados._ler_csv_bcb('"data";"valor"\n"28/02/2023";"1,0"\n"31/02/2023";"2,0"\n"2023-03-01";"3,0"\n')
+    assert [str(d.date()) for d in df["data"]] == ["2023-02-28"]
+    assert list(df["valor"]) == [1.0]
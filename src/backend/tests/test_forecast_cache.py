@@ -0,0 +1,68 @@
+import pytest
+import pandas as pd
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from ml.forecast_cache import ForecastCache, forecast_key
+
+
+def _historico():
+    datas = pd.date_range("2024-01-01", periods=40, freq="D")
+    return [{"data": f"{d:%Y-%m-%d}", "valor": float(i)} for i, d in enumerate(datas)]
+
+
+def _previsao(valor=1.0):
+    return pd.DataFrame({"data": pd.date_range("2024-03-01", periods=3), "valor": valor})
+
+
+def test_chave_ignora_ordem_e_formato_dos_registros():
+    historico = _historico()
+    brasileiro = [{"data": pd.Timestamp(r["data"]).strftime("%d/%m/%Y"), "valor": str(r["valor"]).replace(".", ",")}
+                  for r in reversed(historico)]
+
+    assert forecast_key(historico, 90, 15, "deepseek") == forecast_key(brasileiro, 90, 15, "deepseek")
+    assert forecast_key(historico, 90, 15, "deepseek") != forecast_key(historico, 30, 15, "deepseek")
+    assert forecast_key(historico, 90, 15, "deepseek") != forecast_key(historico, 90, 15, "forest")
+    alterado = historico[:-1] + [{"data": historico[-1]["data"], "valor": 99.0}]
+    assert forecast_key(historico, 90, 15, "deepseek") != forecast_key(alterado, 90, 15, "deepseek")
+
+
+def test_lru_descarta_o_menos_usado():
+    cache = ForecastCache(max_entries=2)
+    cache.put("a", _previsao(1))
+    cache.put("b", _previsao(2))
+    cache.get("a")
+    cache.put("c", _previsao(3))
+
+    assert cache.get("b") is None
+    assert cache.get("a")["valor"].iloc[0] == 1
+    assert len(cache) == 2
+
+
+def test_ttl_expira_entradas():
+    agora = [0.0]
+    cache = ForecastCache(ttl_seconds=10, clock=lambda: agora[0])
+    cache.put("a", _previsao())
+    agora[0] = 9.0
+    assert cache.get("a") is not None
+    agora[0] = 20.0
+    assert cache.get("a") is None
+
+
+def test_nova_versao_dos_dados_invalida_o_cache():
+    cache = ForecastCache()
+    cache.sync_version(1)
+    cache.put("a", _previsao())
+    cache.sync_version(1)
+    assert cache.get("a") is not None
+    cache.sync_version(2)
+    assert cache.get("a") is None
+
+
+def test_get_devolve_copia():
+    cache = ForecastCache()
+    cache.put("a", _previsao())
+    previsao = cache.get("a")
+    previsao["valor"] = 42.0
+    assert cache.get("a")["valor"].iloc[0] == 1.0
@@ -0,0 +1,171 @@
+import pytest
+import asyncio
+import pandas as pd
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from ml.forecast_jobs import ForecastJobQueue, JobQueueFull, DONE, FAILED
+
+
+def _previsao():
+    return pd.DataFrame({"data": pd.date_range("2024-03-01", periods=2), "valor": 1.0})
+
+
+async def _esperar(job):
+    while not job.finished:
+        await asyncio.sleep(0.01)
+
+
+def test_pedidos_identicos_compartilham_o_job():
+    chamadas = []
+
+    async def runner(job, on_progress):
+        chamadas.append(job.key)
+        await asyncio.sleep(0.05)
+        return _previsao()
+
+    async def executar():
+        fila = ForecastJobQueue(runner)
+        primeiro, criado = fila.submit("selic", "k1", {})
+        repetido, criado_de_novo = fila.submit("selic", "k1", {})
+        outro, _ = fila.submit("selic", "k2", {})
+        await _esperar(primeiro)
+        await _esperar(outro)
+        concluido, criado_depois = fila.submit("selic", "k1", {})
+        await fila.stop()
+        return primeiro, criado, repetido, criado_de_novo, concluido, criado_depois
+
+    primeiro, criado, repetido, criado_de_novo, concluido, criado_depois = asyncio.run(executar())
+
+    assert criado and not criado_de_novo and not criado_depois
+    assert repetido is primeiro and concluido is primeiro
+    assert primeiro.status == DONE
+    assert chamadas == ["k1", "k2"]
+
+
+def test_job_que_falha_pode_ser_refeito():
+    async def runner(job, on_progress):
+        return None
+
+    async def executar():
+        fila = ForecastJobQueue(runner)
+        job, _ = fila.submit("ipca", "k", {})
+        await _esperar(job)
+        novo, criado = fila.submit("ipca", "k", {})
+        await fila.stop()
+        return job, novo, criado
+
+    job, novo, criado = asyncio.run(executar())
+
+    assert job.status == FAILED
+    assert job.error == "Não foi possível gerar previsões"
+    assert criado and novo is not job
+
+
+def test_eventos_trazem_progresso_ate_o_fim():
+    async def runner(job, on_progress):
+        await asyncio.sleep(0.01)
+        for epoca in (1, 2, 3):
+            on_progress({"epoch": epoca, "epochs": 3, "loss": 1.0 / epoca})
+            await asyncio.sleep(0.01)
+        return _previsao()
+
+    async def executar():
+        fila = ForecastJobQueue(runner)
+        job, _ = fila.submit("selic", "k", {})
+        eventos = [evento async for evento in fila.events(job)]
+        await fila.stop()
+        return job, eventos
+
+    job, eventos = asyncio.run(executar())
+
+    assert eventos[0].startswith("event: status")
+    assert sum(evento.startswith("event: progress") for evento in eventos) == 3
+    assert '"status": "done"' in eventos[-1]
+    assert job.progress == {"epoch": 3, "epochs": 3, "loss": 1.0 / 3}
+    assert not job.subscribers
+
+
+def test_jobs_concluidos_expiram():
+    agora = [0.0]
+
+    async def runner(job, on_progress):
+        return _previsao()
+
+    async def executar():
+        fila = ForecastJobQueue(runner, ttl_seconds=10, clock=lambda: agora[0])
+        job, _ = fila.submit("selic", "k", {})
+        await _esperar(job)
+        assert fila.get(job.id) is job
+        agora[0] = 11.0
+        encontrado = fila.get(job.id)
+        await fila.stop()
+        return encontrado, len(fila)
+
+    assert asyncio.run(executar()) == (None, 0)
+
+
+def test_job_concluido_nao_vale_para_outra_versao():
+    async def runner(job, on_progress):
+        return _previsao()
+
+    async def executar():
+        fila = ForecastJobQueue(runner)
+        job, _ = fila.submit("selic", "k", {}, version=(1, 0))
+        await _esperar(job)
+        mesma, criado_mesma = fila.submit("selic", "k", {}, version=(1, 0))
+        nova, criado_nova = fila.submit("selic", "k", {}, version=(2, 0))
+        await _esperar(nova)
+        await fila.stop()
+        return job, mesma, criado_mesma, nova, criado_nova
+
+    job, mesma, criado_mesma, nova, criado_nova = asyncio.run(executar())
+
+    assert mesma is job and not criado_mesma
+    assert criado_nova and nova is not job and nova.status == DONE
+
+
+def test_fila_recusa_acima_do_limite_de_pendentes():
+    async def executar():
+        fim = asyncio.Event()
+
+        async def runner(job, on_progress):
+            await fim.wait()
+            return _previsao()
+
+        fila = ForecastJobQueue(runner, max_pending=2)
+        primeiro, _ = fila.submit("selic", "k1", {})
+        fila.submit("selic", "k2", {})
+        # Pedido idêntico a um pendente não conta como novo
+        assert fila.submit("selic", "k1", {})[0] is primeiro
+        with pytest.raises(JobQueueFull):
+            fila.submit("selic", "k3", {})
+        fim.set()
+        await _esperar(primeiro)
+        terceiro, criado = fila.submit("selic", "k3", {})
+        await fila.stop()
+        return criado
+
+    assert asyncio.run(executar())
+
+
+def test_job_guarda_o_tipo_da_falha():
+    async def runner(job, on_progress):
+        if job.key == "erro":
+            raise TimeoutError("demorou")
+        await asyncio.sleep(10)
+
+    async def executar():
+        fila = ForecastJobQueue(runner)
+        erro, _ = fila.submit("selic", "erro", {})
+        await _esperar(erro)
+        encerrado, _ = fila.submit("selic", "lento", {})
+        await asyncio.sleep(0.01)
+        await fila.stop()
+        return erro, encerrado
+
+    erro, encerrado = asyncio.run(executar())
+
+    assert (erro.status, erro.error, erro.error_type) == (FAILED, "demorou", TimeoutError)
+    assert encerrado.status == FAILED and encerrado.error_type is asyncio.CancelledError
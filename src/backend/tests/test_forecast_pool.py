@@ -0,0 +1,66 @@
+import pytest
+import asyncio
+import operator
+import time
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from ml.forecast_pool import ForecastPool, ForecastTimeout
+
+
+def test_executa_em_outro_processo():
+    pool = ForecastPool(max_workers=1)
+
+    async def executar():
+        return await pool.run(operator.add, 2, 3), await pool.run(os.getpid)
+
+    try:
+        soma, pid = asyncio.run(executar())
+    finally:
+        pool.shutdown()
+
+    assert soma == 5
+    assert pid != os.getpid()
+
+
+def test_job_lento_expira_e_segura_a_vaga_ate_terminar():
+    pool = ForecastPool(max_workers=1, max_concurrent=1, timeout=0.1, executor_factory=ThreadPoolExecutor)
+
+    async def executar():
+        with pytest.raises(ForecastTimeout):
+            await pool.run(time.sleep, 0.4)
+        # O primeiro job ainda ocupa a única vaga: o segundo não consegue entrar a tempo
+        assert pool.running == 1
+        with pytest.raises(ForecastTimeout):
+            await pool.run(operator.add, 1, 1)
+        await asyncio.sleep(0.4)
+        assert pool.running == 0
+        return await pool.run(operator.add, 1, 1)
+
+    try:
+        assert asyncio.run(executar()) == 2
+    finally:
+        pool.shutdown()
+
+
+def test_event_loop_continua_livre_durante_o_job():
+    pool = ForecastPool(max_workers=1, executor_factory=ThreadPoolExecutor)
+    marcas = []
+
+    async def tique():
+        for _ in range(5):
+            marcas.append(time.monotonic())
+            await asyncio.sleep(0.02)
+
+    async def executar():
+        await asyncio.gather(pool.run(time.sleep, 0.2), tique())
+
+    try:
+        asyncio.run(executar())
+    finally:
+        pool.shutdown()
+
+    assert len(marcas) == 5
+    assert marcas[-1] - marcas[0] < 0.2
@@ -0,0 +1,48 @@
+import pytest
+import pandas as pd
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.dados import adicionar_colunas_calendario, filtrar_por_ano_mes, filtrar_pib_por_ano_trimestre
+from utils.indices import construir_indices
+
+
+@pytest.fixture
+def serie_diaria():
+    df = pd.DataFrame({
+        "data": pd.date_range("2022-11-01", "2024-04-30", freq="B"),
+    })
+    df["valor"] = range(len(df))
+    return adicionar_colunas_calendario(df, "selic")
+
+
+@pytest.fixture
+def pib():
+    df = pd.DataFrame({"data": pd.date_range("2021-01-01", periods=36, freq="MS")})
+    df["valor"] = range(len(df))
+    return adicionar_colunas_calendario(df, "pib")
+
+
+@pytest.mark.parametrize("ano,mes", [("2023", "Março"), ("2023", "MARÇO"), ("2024", "abril"), ("2022", "Janeiro")])
+def test_filtro_com_indice_igual_ao_filtro_por_varredura(serie_diaria, ano, mes):
+    indice = construir_indices(serie_diaria)
+
+    esperado = filtrar_por_ano_mes(serie_diaria, ano, mes)
+    obtido = filtrar_por_ano_mes(serie_diaria, ano, mes, indice)
+
+    pd.testing.assert_frame_equal(obtido, esperado)
+
+
+@pytest.mark.parametrize("ano,trimestre", [("2022", "3"), ("2023", None), ("2030", "1")])
+def test_filtro_pib_com_indice_igual_ao_filtro_por_varredura(pib, ano, trimestre):
+    indice = construir_indices(pib)
+
+    esperado = filtrar_pib_por_ano_trimestre(pib, ano, trimestre)
+    obtido = filtrar_pib_por_ano_trimestre(pib, ano, trimestre, indice)
+
+    pd.testing.assert_frame_equal(obtido, esperado)
+
+
+def test_serie_fora_de_ordem_nao_tem_indice(serie_diaria):
+    assert construir_indices(serie_diaria.iloc[::-1]) is None
@@ -0,0 +1,50 @@
+import pytest
+import pandas as pd
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.dados import adicionar_colunas_calendario
+from utils.memoria import relatorio_memoria
+from utils.repositorio import RepositorioDados
+from utils.serializacao import resposta_do_snapshot
+
+
+@pytest.fixture
+def repositorio():
+    selic = pd.DataFrame({"data": pd.date_range("2000-01-01", periods=5000, freq="B")})
+    selic["valor"] = 10.0
+    pib = pd.DataFrame({"data": pd.date_range("2000-01-01", periods=100, freq="QS")})
+    pib["valor"] = 1.0
+    return RepositorioDados({
+        "selic": adicionar_colunas_calendario(selic, "selic"),
+        "pib": adicionar_colunas_calendario(pib, "pib"),
+    })
+
+
+def test_relatorio_por_serie_e_coluna(repositorio):
+    relatorio = relatorio_memoria(repositorio.atual)
+    selic = relatorio["series"]["selic"]
+
+    assert selic["linhas"] == 5000
+    assert set(selic["colunas"]) == {"Index", "data", "valor", "mes", "ano"}
+    assert selic["colunas"]["data"] == 5000 * 8
+    # Colunas de calendário categóricas: códigos de 1 byte por linha mais as categorias
+    assert selic["colunas"]["mes"] < 5000 * 2
+    assert "trimestre" in relatorio["series"]["pib"]["colunas"]
+    assert relatorio["total"] == selic["total"] + relatorio["series"]["pib"]["total"]
+
+
+def test_relatorio_conta_respostas_em_cache(repositorio):
+    snapshot = repositorio.atual
+    assert relatorio_memoria(snapshot)["series"]["selic"]["respostas_em_cache"] == 0
+
+    resposta = resposta_do_snapshot(snapshot, "selic")
+    relatorio = relatorio_memoria(snapshot)
+
+    assert relatorio["series"]["selic"]["respostas_em_cache"] == len(resposta.corpo_gzip)
+    assert relatorio["series"]["pib"]["respostas_em_cache"] == 0
+
+    # Depois do primeiro pedido sem gzip, o corpo descomprimido também fica na memória
+    corpo = resposta.corpo
+    assert relatorio_memoria(snapshot)["series"]["selic"]["respostas_em_cache"] == len(resposta.corpo_gzip) + len(corpo)
@@ -0,0 +1,130 @@
+import asyncio
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from ml.model_registry import ModelRegistry
+from ml.ml_models import DIRECT_HORIZON, forecast_with_model, predict_future_values, train_model
+
+
+def _serie(n=60, inicio="2024-01-01"):
+    return pd.DataFrame({"data": pd.date_range(inicio, periods=n, freq="D"), "valor": np.linspace(10, 12, n)})
+
+
+def _historico(df):
+    return [{"data": f"{d:%Y-%m-%d}", "valor": float(v)} for d, v in zip(df["data"], df["valor"])]
+
+
+def test_forecast_sem_modelo_registrado_retorna_none(tmp_path):
+    registro = ModelRegistry(str(tmp_path))
+    assert registro.forecast("selic", _historico(_serie()), periods=5, model_type="linear") is None
+
+
+def test_forecast_registrado_usa_o_modelo_direto(tmp_path):
+    # Série não linear: os modelos direto (registro) e recursivo (por pedido) divergem nela
+    df = _serie(120)
+    df["valor"] = 10 + np.sin(np.arange(120) / 4) + np.arange(120) / 60
+    registro = ModelRegistry(str(tmp_path))
+    registro.train("selic", "forest", df["valor"].to_numpy(), df["data"].iloc[-1])
+
+    previsto = registro.forecast("selic", _historico(df), periods=5, model_type="forest")
+    model, scaler = train_model(df["valor"].to_numpy(), 15, "forest", horizon=DIRECT_HORIZON)
+    esperado = forecast_with_model(model, scaler, df["valor"].to_numpy(), df["data"].iloc[-1], 5, "forest")
+    por_pedido = predict_future_values(_historico(df), periods=5, window_size=15, model_type="forest")
+
+    pd.testing.assert_frame_equal(previsto, esperado)
+    assert registro.get("selic", "forest").model.n_outputs_ > 1
+    assert not np.allclose(previsto["valor"], por_pedido["valor"])
+
+
+def test_forecast_com_outra_janela_nao_usa_modelo(tmp_path):
+    df = _serie()
+    registro = ModelRegistry(str(tmp_path))
+    registro.train("selic", "linear", df["valor"].to_numpy(), df["data"].iloc[-1])
+
+    assert registro.forecast("selic", _historico(df), periods=5, window_size=20, model_type="linear") is None
+
+
+def test_train_all_pula_series_sem_dados_novos(tmp_path):
+    registro = ModelRegistry(str(tmp_path))
+    series = {"selic": _serie(), "ipca": _serie(5)}
+
+    assert registro.train_all(series, model_types=("linear",)) == [("selic", "linear")]
+    assert registro.train_all(series, model_types=("linear",)) == []
+
+    series["selic"] = _serie(61)
+    assert registro.train_all(series, model_types=("linear",)) == [("selic", "linear")]
+    assert registro.read_pointer("selic", "linear")["version"] == 2
+
+
+def test_outro_processo_carrega_versao_publicada(tmp_path):
+    agora = [0.0]
+    leitor = ModelRegistry(str(tmp_path), reload_check_seconds=30, clock=lambda: agora[0])
+    df = _serie()
+    assert leitor.get("selic", "linear") is None
+
+    ModelRegistry(str(tmp_path)).train("selic", "linear", df["valor"].to_numpy(), df["data"].iloc[-1])
+    assert leitor.get("selic", "linear").version == 1
+    geracao = leitor.generation
+
+    ModelRegistry(str(tmp_path)).train("selic", "linear", df["valor"].to_numpy(), df["data"].iloc[-1])
+    # Dentro do intervalo de verificação continua servindo o modelo em memória
+    assert leitor.get("selic", "linear").version == 1
+    agora[0] = 31.0
+    assert leitor.get("selic", "linear").version == 2
+    assert leitor.generation == geracao + 1
+
+
+def test_train_mantem_so_a_versao_atual_e_a_anterior(tmp_path):
+    registro = ModelRegistry(str(tmp_path))
+    df = _serie()
+    for _ in range(4):
+        registro.train("selic", "linear", df["valor"].to_numpy(), df["data"].iloc[-1])
+
+    versoes = sorted(nome for nome in os.listdir(tmp_path / "selic" / "linear") if nome.startswith("v"))
+    assert versoes == ["v3", "v4"]
+    assert registro.read_pointer("selic", "linear")["version"] == 4
+
+
+def test_retreino_em_segundo_plano_publica_versao_nova(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    from types import SimpleNamespace
+    from ml.model_registry import retrain_on_new_data
+
+    registro = ModelRegistry(str(tmp_path), reload_check_seconds=3600)
+    df = _serie()
+    registro.train("selic", "linear", df["valor"].to_numpy(), df["data"].iloc[-1])
+    assert registro.get("selic", "linear").version == 1
+    repositorio = SimpleNamespace(atual=SimpleNamespace(versao=1, dados={"selic": _serie(61)}))
+
+    async def rodar():
+        tarefa = asyncio.create_task(retrain_on_new_data(registro, repositorio, model_types=("linear",), interval=0,
+                                                         executor_factory=ThreadPoolExecutor))
+        while registro.read_pointer("selic", "linear")["version"] == 1:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        tarefa.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await tarefa
+
+    asyncio.run(rodar())
+    # O treino roda fora deste registro; a versão nova é lida do disco sem esperar o intervalo de verificação
+    assert registro.get("selic", "linear").version == 2
+
+
+def test_floresta_registrada_tem_tamanho_limitado(tmp_path):
+    import pickle
+    from ml.ml_models import DIRECT_FOREST_MAX_LEAF_NODES
+
+    df = _serie(3000)
+    df["valor"] = 10 + np.cumsum(np.random.default_rng(0).normal(0, 0.2, 3000))
+    registro = ModelRegistry(str(tmp_path))
+    modelo = registro.train("selic", "forest", df["valor"].to_numpy(), df["data"].iloc[-1]).model
+
+    assert modelo.n_outputs_ == DIRECT_HORIZON
+    assert max(arvore.tree_.node_count for arvore in modelo.estimators_) <= 2 * DIRECT_FOREST_MAX_LEAF_NODES - 1
+    # Sem limite de folhas esta floresta passaria de 100 MiB
+    assert len(pickle.dumps(modelo)) < 16 * 2**20
@@ -2,7 +2,8 @@ import pytest
 import sys
 import os
 import pandas as pd
-from ml.ml_models import predict_future_values
+import numpy as np
+from ml.ml_models import predict_future_values, train_model, forecast_with_model
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
@@ -31,8 +32,46 @@ def test_predict_future_values_basic():
 
     forecast_df = predict_future_values(df, periods=periods, window_size=15, model_type="deepseek")
 
-<<<<<<< HEAD
     assert forecast_df is None
-=======
-    assert forecast_df is None
->>>>>>> 2085b3fe7e8806bfe7c84ab71eeafd89488d5c2c
+
+
+@pytest.mark.parametrize("model_type", ["linear", "forest"])
+def test_modelos_sklearn_preveem_o_horizonte_numa_unica_chamada(model_type):
+    valores = 10 + np.sin(np.arange(200) / 10)
+    model, scaler = train_model(valores, window_size=15, model_type=model_type, horizon=30)
+    chamadas = []
+    predict = model.predict
+    model.predict = lambda X: chamadas.append(X.shape) or predict(X)
+
+    forecast_df = forecast_with_model(model, scaler, valores, pd.Timestamp("2024-01-01"), 30, model_type)
+
+    assert chamadas == [(1, 15)]
+    assert len(forecast_df) == 30
+    assert forecast_df["data"].iloc[0] == pd.Timestamp("2024-01-02")
+
+
+def test_periodos_alem_do_horizonte_sao_previstos_em_blocos():
+    valores = 10 + np.sin(np.arange(200) / 10)
+    model, scaler = train_model(valores, window_size=15, model_type="linear", horizon=20)
+    chamadas = []
+    predict = model.predict
+    model.predict = lambda X: chamadas.append(X.shape) or predict(X)
+
+    forecast_df = forecast_with_model(model, scaler, valores, pd.Timestamp("2024-01-01"), 50, "linear")
+
+    assert len(chamadas) == 3
+    assert len(forecast_df) == 50
+    assert forecast_df["valor"].notna().all()
+
+
+def test_previsao_por_pedido_treina_modelo_recursivo():
+    valores = 10 + np.sin(np.arange(200) / 10)
+    datas = pd.date_range("2024-01-01", periods=200)
+    historico = [{"data": f"{d:%Y-%m-%d}", "valor": float(v)} for d, v in zip(datas, valores)]
+
+    forecast_df = predict_future_values(historico, periods=30, window_size=15, model_type="linear")
+    model, scaler = train_model(valores, window_size=15, model_type="linear")
+    esperado = forecast_with_model(model, scaler, valores, datas[-1], 30, "linear")
+
+    assert np.ndim(model.coef_) == 1
+    pd.testing.assert_frame_equal(forecast_df, esperado)
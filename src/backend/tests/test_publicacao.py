@@ -0,0 +1,84 @@
+import pytest
+import pandas as pd
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils import publicacao
+from utils.armazenamento import salvar_serie, anexar_serie
+from utils.dados import adicionar_colunas_calendario
+from utils.publicacao import (TravaLider, carregar_publicado, ler_manifesto, linhas_acrescentadas,
+                              publicar_manifesto)
+from utils.repositorio import RepositorioDados, acompanhar_publicacao
+
+
+def _serie(inicio, periodos, valor=1.0):
+    return pd.DataFrame({"data": pd.date_range(inicio, periods=periodos, freq="D"), "valor": valor})
+
+
+def test_manifesto_incrementa_versao(tmp_path):
+    dados = {"selic": _serie("2024-01-01", 3)}
+    assert ler_manifesto(str(tmp_path)) is None
+    assert publicar_manifesto(dados, str(tmp_path))["versao"] == 1
+    manifesto = publicar_manifesto(dados, str(tmp_path))
+    assert manifesto["versao"] == 2
+    assert manifesto["series"] == {"selic": {"linhas": 3}}
+
+
+def test_carregar_publicado_le_versao_do_manifesto_sem_copia(tmp_path):
+    diretorio = str(tmp_path)
+    salvar_serie("selic", _serie("2024-01-01", 3), diretorio)
+    manifesto = publicar_manifesto({"selic": _serie("2024-01-01", 3)}, diretorio)
+    # O líder já anexou uma linha, mas ainda não publicou a nova versão
+    anexar_serie("selic", _serie("2024-01-04", 1, 2.0), diretorio)
+
+    df = carregar_publicado(manifesto, diretorio)["selic"]
+
+    assert len(df) == 3
+    assert list(df["mes"]) == ["Janeiro"] * 3
+    assert not df["valor"].to_numpy().flags.writeable
+
+
+@pytest.mark.skipif(publicacao.fcntl is None, reason="trava entre processos indisponível nesta plataforma")
+def test_trava_tem_um_unico_lider(tmp_path):
+    primeira, segunda = TravaLider(str(tmp_path)), TravaLider(str(tmp_path))
+
+    assert primeira.tentar_adquirir()
+    assert not segunda.tentar_adquirir()
+    primeira.liberar()
+    assert segunda.tentar_adquirir()
+    segunda.liberar()
+
+
+def test_linhas_acrescentadas():
+    anterior = _serie("2024-01-01", 3)
+    assert list(linhas_acrescentadas(anterior, _serie("2024-01-01", 5))["data"].dt.day) == [4, 5]
+    assert linhas_acrescentadas(anterior, _serie("2023-12-30", 5)) is None
+    assert linhas_acrescentadas(None, anterior) is None
+
+
+def test_seguidor_acompanha_versoes_do_lider(tmp_path):
+    diretorio = str(tmp_path)
+    inicial = _serie("2024-01-01", 3)
+    salvar_serie("selic", inicial, diretorio)
+    versao = publicar_manifesto({"selic": inicial}, diretorio)["versao"]
+    repositorio = RepositorioDados({"selic": adicionar_colunas_calendario(inicial, "selic")})
+
+    # Nada de novo publicado: o Snapshot não muda
+    assert acompanhar_publicacao(repositorio, versao, diretorio) == versao
+    assert repositorio.atual.versao == 0
+
+    anexar_serie("selic", _serie("2024-01-04", 2, 2.0), diretorio)
+    versao = publicar_manifesto({"selic": _serie("2024-01-01", 5)}, diretorio)["versao"]
+    assert acompanhar_publicacao(repositorio, versao - 1, diretorio) == versao
+
+    snapshot = repositorio.atual
+    assert snapshot.versao == 1 and snapshot.incremental
+    assert len(snapshot.dados["selic"]) == 5
+    assert list(snapshot.linhas_novas["selic"]["valor"]) == [2.0, 2.0]
+
+    # Série regravada com outro histórico: o novo Snapshot não é incremental
+    salvar_serie("selic", _serie("2023-01-01", 4), diretorio)
+    versao = publicar_manifesto({"selic": _serie("2023-01-01", 4)}, diretorio)["versao"]
+    acompanhar_publicacao(repositorio, versao - 1, diretorio)
+    assert not repositorio.atual.incremental
@@ -0,0 +1,88 @@
+import pytest
+import asyncio
+import pandas as pd
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.repositorio import RepositorioDados, sincronizar_repositorio, atualizar_periodicamente
+
+
+@pytest.fixture
+def dados_iniciais():
+    return {
+        "selic": pd.DataFrame({
+            "data": pd.date_range("2024-01-01", periods=3, freq="D"),
+            "valor": [11.65, 11.65, 11.65]
+        })
+    }
+
+
+def _sincronizar_com_linha_nova(dados, diretorio=None):
+    nova = pd.DataFrame({"data": [pd.Timestamp("2024-01-04")], "valor": [10.5]})
+    return {"selic": pd.concat([dados["selic"], nova], ignore_index=True)}, {"selic": nova}
+
+
+def _sincronizar_sem_novidades(dados, diretorio=None):
+    return dados, {}
+
+
+def test_publicar_troca_snapshot_sem_alterar_o_anterior(dados_iniciais):
+    repositorio = RepositorioDados(dados_iniciais)
+    anterior = repositorio.atual
+
+    novo = sincronizar_repositorio(repositorio, sincronizar=_sincronizar_com_linha_nova)
+
+    assert repositorio.atual is novo
+    assert novo.versao == anterior.versao + 1
+    assert len(novo.dados["selic"]) == 4
+    assert len(anterior.dados["selic"]) == 3
+    assert list(novo.linhas_novas) == ["selic"]
+    with pytest.raises(TypeError):
+        novo.dados["ipca"] = pd.DataFrame()
+
+
+def test_sem_linhas_novas_mantem_versao(dados_iniciais):
+    repositorio = RepositorioDados(dados_iniciais)
+    anterior = repositorio.atual
+
+    assert sincronizar_repositorio(repositorio, sincronizar=_sincronizar_sem_novidades) is anterior
+
+
+def test_atualizar_periodicamente_publica_em_segundo_plano(dados_iniciais):
+    repositorio = RepositorioDados(dados_iniciais)
+
+    async def executar():
+        tarefa = asyncio.create_task(
+            atualizar_periodicamente(repositorio, intervalo=0.01, sincronizar=_sincronizar_com_linha_nova)
+        )
+        while repositorio.atual.versao == 0:
+            await asyncio.sleep(0.01)
+        tarefa.cancel()
+
+    asyncio.run(asyncio.wait_for(executar(), timeout=5))
+    assert repositorio.atual.versao >= 1
+
+
+def test_carga_inicial_baixa_so_o_que_faltou_no_disco(dados_iniciais, tmp_path):
+    from utils.repositorio import EstadoCarga, carga_inicial
+    repositorio = RepositorioDados(dados_iniciais)
+    estado = EstadoCarga(["selic", "ipca", "pib"])
+    estado.registrar(repositorio.atual, "disco")
+    pedidos = []
+
+    def carregar_falso(diretorio, urls):
+        pedidos.append(sorted(urls))
+        return {"ipca": pd.DataFrame({"data": [pd.Timestamp("2024-01-01")], "valor": [0.42]})}
+
+    carga_inicial(repositorio, estado, str(tmp_path), nomes=["selic", "ipca", "pib"],
+                  carregar=carregar_falso, sincronizar=_sincronizar_sem_novidades)
+
+    assert pedidos == [["ipca", "pib"]]
+    assert sorted(repositorio.atual.dados) == ["ipca", "selic"]
+    assert not repositorio.atual.incremental
+    relatorio = estado.relatorio(repositorio.atual)
+    assert relatorio["ipca"]["estado"] == "pronto" and relatorio["ipca"]["origem"] == "bcb"
+    assert relatorio["selic"]["origem"] == "disco"
+    assert relatorio["pib"]["estado"] == "erro"
+    assert not estado.pronto()
@@ -0,0 +1,317 @@
+import pytest
+import pandas as pd
+import sys
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import routes
+from utils.dados import URLS, adicionar_colunas_calendario
+from utils.repositorio import RepositorioDados, EstadoCarga
+from ml.model_registry import ModelRegistry
+from ml.forecast_pool import ForecastPool
+from ml.forecast_jobs import ForecastJobQueue
+
+
+@pytest.fixture
+def cliente(monkeypatch, tmp_path):
+    # Sem lifespan: a API sobe sem dados, como logo após a inicialização
+    monkeypatch.setattr(routes, "repositorio", RepositorioDados())
+    monkeypatch.setattr(routes, "estado_carga", EstadoCarga(URLS))
+    monkeypatch.setattr(routes, "model_registry", ModelRegistry(str(tmp_path / "models")))
+    # Threads em vez de processos: as funções falsas dos testes não precisam ser importáveis
+    monkeypatch.setattr(routes, "forecast_pool", ForecastPool(executor_factory=ThreadPoolExecutor))
+    monkeypatch.setattr(routes, "forecast_jobs", ForecastJobQueue(routes.executar_job_previsao))
+    app = FastAPI()
+    app.include_router(routes.router)
+    return TestClient(app)
+
+
+def _dados():
+    dados = {}
+    for nome in URLS:
+        df = pd.DataFrame({"data": pd.date_range("2024-01-01", periods=5, freq="D"), "valor": 1.5})
+        dados[nome] = adicionar_colunas_calendario(df, nome)
+    return dados
+
+
+def test_vivo_responde_sem_dados(cliente):
+    assert cliente.get("/vivo").json() == {"status": "ok"}
+
+
+def test_series_respondem_503_ate_carregar(cliente):
+    resposta = cliente.get("/selic")
+    assert resposta.status_code == 503
+    assert resposta.headers["retry-after"] == "5"
+    assert cliente.get("/filtro-pib/2024").status_code == 503
+    assert cliente.get("/alertas").status_code == 503
+
+    pronto = cliente.get("/pronto")
+    assert pronto.status_code == 503
+    assert pronto.json()["series"]["selic"]["estado"] == "carregando"
+
+
+def test_pronto_depois_da_carga(cliente):
+    snapshot = routes.repositorio.publicar(_dados())
+    routes.estado_carga.registrar(snapshot, "disco")
+
+    assert cliente.get("/selic").status_code == 200
+    assert cliente.get("/filtro/ipca", params={"ano": "2024", "mes": "janeiro"}).json()[0]["valor"] == 1.5
+
+    pronto = cliente.get("/pronto")
+    assert pronto.status_code == 200
+    serie = pronto.json()["series"]["selic"]
+    assert serie["estado"] == "pronto" and serie["origem"] == "disco"
+    assert serie["linhas"] == 5 and serie["ultima_data"] == "2024-01-05"
+    assert serie["idade_segundos"] >= 0
+
+
+def test_pronto_parcial_mantem_503(cliente):
+    dados = _dados()
+    del dados["pib"]
+    routes.estado_carga.registrar(routes.repositorio.publicar(dados), "bcb")
+    routes.estado_carga.marcar("pib", "erro", erro="falhou")
+
+    pronto = cliente.get("/pronto")
+    assert pronto.status_code == 503
+    assert pronto.json()["series"]["pib"] == {
+        "estado": "erro", "origem": None, "erro": "falhou", "linhas": 0, "ultima_data": None,
+        "verificado_em": None, "idade_segundos": None,
+    }
+    assert cliente.get("/cambio").status_code == 200
+
+
+def test_predict_reaproveita_previsao_em_cache(cliente, monkeypatch):
+    from ml.forecast_cache import ForecastCache
+    chamadas = []
+
+    def prever_falso(historical_data, periods, window_size, model_type):
+        chamadas.append(model_type)
+        return pd.DataFrame({"data": pd.date_range("2024-02-01", periods=periods), "valor": 2.0})
+
+    monkeypatch.setattr(routes, "predict_future_values", prever_falso)
+    monkeypatch.setattr(routes, "forecast_cache", ForecastCache())
+    historico = [{"data": f"{d:%Y-%m-%d}", "valor": 1.0} for d in pd.date_range("2024-01-01", periods=40)]
+    pedido = {"historical_data": historico, "periods": 3, "window_size": 15, "model_type": "linear"}
+
+    primeira = cliente.post("/predict/selic", json=pedido)
+    segunda = cliente.post("/predict/selic", json=pedido)
+
+    assert primeira.status_code == 200
+    assert primeira.json() == segunda.json()
+    assert chamadas == ["linear"]
+
+
+def test_predict_usa_modelo_registrado_sem_treinar(cliente, monkeypatch):
+    from ml.forecast_cache import ForecastCache
+
+    def prever_falso(*args, **kwargs):
+        raise AssertionError("não deveria treinar com modelo registrado")
+
+    monkeypatch.setattr(routes, "forecast_cache", ForecastCache())
+    datas = pd.date_range("2024-01-01", periods=60)
+    valores = [float(i) for i in range(60)]
+    routes.model_registry.train("selic", "linear", valores, datas[-1])
+    monkeypatch.setattr(routes, "predict_future_values", prever_falso)
+    historico = [{"data": f"{d:%Y-%m-%d}", "valor": v} for d, v in zip(datas, valores)]
+    pedido = {"historical_data": historico, "periods": 3, "window_size": 15, "model_type": "linear"}
+
+    resposta = cliente.post("/predict/selic", json=pedido)
+
+    assert resposta.status_code == 200
+    assert [p["data"] for p in resposta.json()] == ["2024-03-01", "2024-03-02", "2024-03-03"]
+
+
+def test_predict_expira_com_504(cliente, monkeypatch):
+    def prever_lento(historical_data, periods, window_size, model_type):
+        time.sleep(0.5)
+
+    monkeypatch.setattr(routes, "predict_future_values", prever_lento)
+    monkeypatch.setattr(routes, "forecast_pool", ForecastPool(timeout=0.05, executor_factory=ThreadPoolExecutor))
+    historico = [{"data": f"{d:%Y-%m-%d}", "valor": 1.0} for d in pd.date_range("2024-01-01", periods=40)]
+    pedido = {"historical_data": historico, "periods": 3, "window_size": 15, "model_type": "linear"}
+
+    resposta = cliente.post("/predict/selic", json=pedido)
+
+    assert resposta.status_code == 504
+
+
+def test_job_de_previsao_com_progresso_e_deduplicacao(cliente, monkeypatch):
+    def prever_falso(historical_data, periods, window_size, model_type, progress):
+        for epoca in (1, 2):
+            time.sleep(0.2)
+            progress(epoca, 2, 0.5 / epoca)
+        return pd.DataFrame({"data": pd.date_range("2024-02-10", periods=periods), "valor": 2.0})
+
+    monkeypatch.setattr(routes, "predict_future_values", prever_falso)
+    historico = [{"data": f"{d:%Y-%m-%d}", "valor": 1.0} for d in pd.date_range("2024-01-01", periods=40)]
+    pedido = {"historical_data": historico, "periods": 2, "window_size": 15, "model_type": "linear"}
+
+    with cliente:
+        criado = cliente.post("/predict/selic/jobs", json=pedido)
+        repetido = cliente.post("/predict/selic/jobs", json=pedido)
+        assert criado.status_code == 202
+        job_id = criado.json()["job_id"]
+        assert repetido.json()["job_id"] == job_id
+        assert criado.headers["location"] == f"/jobs/{job_id}"
+
+        with cliente.stream("GET", f"/jobs/{job_id}/events") as eventos:
+            corpo = "".join(eventos.iter_text())
+
+        assert "event: progress" in corpo
+        assert '"status": "done"' in corpo
+        assert cliente.get(f"/jobs/{job_id}").json()["status"] == "done"
+        resultado = cliente.get(f"/jobs/{job_id}/result")
+        assert resultado.status_code == 200
+        assert [p["data"] for p in resultado.json()] == ["2024-02-10", "2024-02-11"]
+
+
+def test_job_refeito_quando_a_versao_dos_dados_muda_e_fila_cheia_responde_503(cliente, monkeypatch):
+    monkeypatch.setattr(routes, "predict_future_values",
+                        lambda historical_data, periods, window_size, model_type, progress:
+                        pd.DataFrame({"data": pd.date_range("2024-02-10", periods=periods), "valor": 2.0}))
+    historico = [{"data": f"{d:%Y-%m-%d}", "valor": 1.0} for d in pd.date_range("2024-01-01", periods=40)]
+    pedido = {"historical_data": historico, "periods": 2, "window_size": 15, "model_type": "linear"}
+
+    with cliente:
+        primeiro = cliente.post("/predict/selic/jobs", json=pedido).json()["job_id"]
+        while cliente.get(f"/jobs/{primeiro}").json()["status"] != "done":
+            time.sleep(0.01)
+        assert cliente.post("/predict/selic/jobs", json=pedido).json()["job_id"] == primeiro
+
+        routes.repositorio.publicar(_dados())
+        assert cliente.post("/predict/selic/jobs", json=pedido).json()["job_id"] != primeiro
+
+        routes.forecast_jobs.max_pending = 0
+        cheia = cliente.post("/predict/selic/jobs", json={**pedido, "periods": 3})
+        assert cheia.status_code == 503
+        assert cheia.headers["retry-after"] == "30"
+
+
+def _prever_lento(historical_data, periods, window_size, model_type, progress):
+    time.sleep(0.5)
+
+
+def _prever_com_erro(historical_data, periods, window_size, model_type, progress):
+    raise RuntimeError("sem memória")
+
+
+def _prever_nada(historical_data, periods, window_size, model_type, progress):
+    return None
+
+
+@pytest.mark.parametrize("prever, status", [(_prever_lento, 504), (_prever_com_erro, 500), (_prever_nada, 400)])
+def test_resultado_de_job_que_falhou_usa_o_status_do_predict(cliente, monkeypatch, prever, status):
+    monkeypatch.setattr(routes, "predict_future_values", prever)
+    monkeypatch.setattr(routes, "forecast_pool", ForecastPool(timeout=0.05, executor_factory=ThreadPoolExecutor))
+    historico = [{"data": f"{d:%Y-%m-%d}", "valor": 1.0} for d in pd.date_range("2024-01-01", periods=40)]
+    pedido = {"historical_data": historico, "periods": 3, "window_size": 15, "model_type": "linear"}
+
+    with cliente:
+        job_id = cliente.post("/predict/selic/jobs", json=pedido).json()["job_id"]
+        while cliente.get(f"/jobs/{job_id}").json()["status"] != "failed":
+            time.sleep(0.01)
+        assert cliente.get(f"/jobs/{job_id}/result").status_code == status
+
+
+def test_job_inexistente_responde_404(cliente):
+    assert cliente.get("/jobs/nao-existe").status_code == 404
+
+
+def test_serie_respeita_if_none_match_em_lista_e_gzip_recusado(cliente):
+    routes.repositorio.publicar(_dados())
+    primeira = cliente.get("/selic")
+    etag = primeira.headers["etag"]
+
+    assert cliente.get("/selic", headers={"If-None-Match": f'"outro", W/{etag}'}).status_code == 304
+    resposta = cliente.get("/selic", headers={"Accept-Encoding": "gzip;q=0"})
+    assert resposta.status_code == 200
+    assert "content-encoding" not in resposta.headers
+
+
+def test_serie_por_periodo_devolve_so_o_recorte(cliente):
+    routes.repositorio.publicar(_dados())
+
+    resposta = cliente.get("/selic", params={"start_date": "2024-01-02", "end_date": "2024-01-04"})
+
+    assert resposta.status_code == 200
+    assert [r["data"] for r in resposta.json()] == ["2024-01-02T00:00:00", "2024-01-03T00:00:00",
+                                                    "2024-01-04T00:00:00"]
+    assert "etag" not in resposta.headers
+    so_inicio = cliente.get("/selic", params={"start_date": "2024-01-05"}).json()
+    assert [r["data"] for r in so_inicio] == ["2024-01-05T00:00:00"]
+
+
+def test_periodo_invertido_responde_400(cliente):
+    routes.repositorio.publicar(_dados())
+
+    resposta = cliente.get("/selic", params={"start_date": "2024-01-04", "end_date": "2024-01-02"})
+
+    assert resposta.status_code == 400
+    assert resposta.json()["detail"] == "start_date deve ser anterior ou igual a end_date"
+
+
+def test_corpo_gzip_tem_etag_proprio(cliente):
+    routes.repositorio.publicar(_dados())
+    comprimida = cliente.get("/selic", headers={"Accept-Encoding": "gzip"})
+    identidade = cliente.get("/selic", headers={"Accept-Encoding": "identity"})
+
+    assert comprimida.headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in identidade.headers
+    assert comprimida.headers["etag"] == identidade.headers["etag"][:-1] + '-gzip"'
+
+    # Qualquer um dos dois valida o conteúdo; o 304 traz o ETag da representação pedida
+    revalidada = cliente.get("/selic", headers={"Accept-Encoding": "identity",
+                                                "If-None-Match": comprimida.headers["etag"]})
+    assert revalidada.status_code == 304
+    assert revalidada.headers["etag"] == identidade.headers["etag"]
+
+
+def _dados_com_nan():
+    dados = _dados()
+    datas = pd.date_range("2024-01-01", periods=40, freq="D")
+    valores = [10.0 + (i % 7) for i in range(40)]
+    valores[5] = float("nan")
+    dados["selic"] = adicionar_colunas_calendario(pd.DataFrame({"data": datas, "valor": valores}), "selic")
+    return dados
+
+
+def test_grafico_descarta_nan_e_limita_pontos(cliente):
+    routes.repositorio.publicar(_dados_com_nan())
+
+    completo = cliente.get("/grafico/selic")
+    assert completo.status_code == 200
+    assert len(completo.json()) == 39
+    assert all(ponto["valor"] is not None for ponto in completo.json())
+
+    reduzido = cliente.get("/grafico/selic", params={"pontos": 3})
+    assert reduzido.status_code == 200
+    assert [p["data"] for p in reduzido.json()][::2] == ["2024-01-01T00:00:00", "2024-02-09T00:00:00"]
+
+    mensal = cliente.get("/grafico/selic", params={"frequencia": "mensal", "end_date": "2024-01-31"})
+    assert mensal.json() == [{"data": "2024-01-01T00:00:00", "valor": pytest.approx(
+        pd.Series([10.0 + (i % 7) for i in range(31) if i != 5]).mean())}]
+
+
+def test_grafico_parametros_invalidos_respondem_400(cliente):
+    routes.repositorio.publicar(_dados())
+    assert cliente.get("/grafico/selic", params={"frequencia": "horaria"}).status_code == 400
+    assert cliente.get("/grafico/poupanca").status_code == 400
+
+
+def test_agregados_usam_os_meses_da_serie(cliente):
+    routes.repositorio.publicar(_dados_com_nan())
+
+    resposta = cliente.get("/agregados/selic", params={"periodicidade": "mensal", "ano": "2024"})
+    assert resposta.status_code == 200
+    meses = resposta.json()
+    assert [m["mes"] for m in meses] == ["Janeiro", "Fevereiro"]
+    assert meses[0]["contagem"] == 30
+    assert meses[0]["mes"] in set(routes.repositorio.atual.dados["selic"]["mes"].astype(str))
+
+    assert cliente.get("/agregados/selic", params={"periodicidade": "semanal"}).status_code == 400
+    assert cliente.get("/agregados/poupanca").status_code == 400
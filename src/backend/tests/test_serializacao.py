@@ -0,0 +1,116 @@
+import pytest
+import gzip
+import pandas as pd
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from utils.dados import adicionar_colunas_calendario
+from utils.repositorio import RepositorioDados
+from utils.serializacao import serializar_registros, resposta_do_snapshot
+
+
+@pytest.fixture
+def selic():
+    df = pd.DataFrame({
+        "data": pd.date_range("2024-03-01", periods=5, freq="D"),
+        "valor": [10.65, 10.65, 10.4, 10.4, 10.4]
+    })
+    return adicionar_colunas_calendario(df, "selic")
+
+
+def test_serializacao_igual_a_do_fastapi(selic):
+    esperado = JSONResponse(jsonable_encoder(selic.to_dict(orient="records"))).body
+    assert serializar_registros(selic) == esperado
+
+
+def test_resposta_gerada_uma_vez_por_snapshot(selic):
+    repositorio = RepositorioDados({"selic": selic})
+
+    primeira = resposta_do_snapshot(repositorio.atual, "selic")
+    assert resposta_do_snapshot(repositorio.atual, "selic") is primeira
+    assert gzip.decompress(primeira.corpo_gzip) == primeira.corpo
+    # O corpo descomprimido é montado uma vez e reaproveitado nos pedidos seguintes
+    assert primeira.corpo is primeira.corpo
+
+    repositorio.publicar({"selic": selic.iloc[:3]}, {"selic": selic.iloc[:0]})
+    nova = resposta_do_snapshot(repositorio.atual, "selic")
+    assert nova is not primeira
+    assert nova.etag != primeira.etag
+
+
+def test_formato_colunar_omite_colunas_derivadas(selic):
+    import json
+    from utils.serializacao import serializar_colunar
+
+    colunas = json.loads(serializar_colunar(selic))
+
+    assert set(colunas) == {"data", "valor"}
+    assert colunas["data"][0] == (pd.Timestamp("2024-03-01") - pd.Timestamp("1970-01-01")).days
+    assert colunas["valor"] == list(selic["valor"])
+    assert len(serializar_colunar(selic)) < len(serializar_registros(selic)) / 2
+
+
+def test_negociar_formato():
+    from utils.serializacao import negociar_formato, FORMATO_COLUNAR
+
+    assert negociar_formato() == "registros"
+    assert negociar_formato(accept=f"{FORMATO_COLUNAR}, application/json") == "colunar"
+    assert negociar_formato("registros", accept=FORMATO_COLUNAR) == "registros"
+    with pytest.raises(ValueError):
+        negociar_formato("xml")
+
+
+def test_ndjson_em_blocos_equivale_aos_registros(selic):
+    import json
+    from utils.serializacao import gerar_ndjson
+
+    blocos = list(gerar_ndjson(selic, linhas_por_bloco=2))
+    linhas = b"".join(blocos).decode("utf-8").splitlines()
+
+    assert len(blocos) == 3
+    assert [json.loads(l) for l in linhas] == json.loads(serializar_registros(selic))
+
+
+def test_aceita_gzip_respeita_valores_q():
+    from utils.serializacao import aceita_gzip
+
+    assert aceita_gzip("gzip, deflate, br")
+    assert aceita_gzip("deflate;q=1.0, GZIP;q=0.5")
+    assert not aceita_gzip("gzip;q=0")
+    assert not aceita_gzip("gzip; q=0.0, br")
+    assert aceita_gzip("*")
+    assert not aceita_gzip("*, gzip;q=0")
+    assert not aceita_gzip("identity")
+    assert not aceita_gzip(None)
+
+
+def test_etag_confere_com_lista_e_etag_fraco():
+    from utils.serializacao import etag_confere
+
+    etag = '"abc"'
+    assert etag_confere('"abc"', etag)
+    assert etag_confere('W/"abc"', etag)
+    assert etag_confere('"xyz", W/"abc"', etag)
+    assert etag_confere("*", etag)
+    assert not etag_confere('"xyz"', etag)
+    assert not etag_confere(None, etag)
+    # A versão gzip valida o mesmo conteúdo, nos dois sentidos
+    assert etag_confere('"abc-gzip"', etag)
+    assert etag_confere('W/"abc-gzip"', '"abc-gzip"')
+    assert etag_confere('"abc"', '"abc-gzip"')
+    assert not etag_confere('"xyz-gzip"', etag)
+
+
+def test_nan_vira_null_em_todos_os_formatos():
+    import json
+    from utils.serializacao import serializar_colunar, gerar_ndjson
+
+    df = pd.DataFrame({"data": pd.date_range("2024-01-01", periods=3, freq="D"), "valor": [1.5, float("nan"), 2.0]})
+
+    assert [r["valor"] for r in json.loads(serializar_registros(df))] == [1.5, None, 2.0]
+    assert json.loads(serializar_colunar(df))["valor"] == [1.5, None, 2.0]
+    linhas = b"".join(gerar_ndjson(df)).decode().splitlines()
+    assert [json.loads(linha)["valor"] for linha in linhas] == [1.5, None, 2.0]
@@ -0,0 +1,25 @@
+import pytest
+import numpy as np
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from ml.windowing import sliding_windows
+
+
+def test_janelas_iguais_ao_laco_e_sem_copia():
+    serie = np.arange(20, dtype=float)
+
+    X, y = sliding_windows(serie, 5)
+
+    assert X.shape == (15, 5)
+    np.testing.assert_array_equal(X, np.array([serie[i:i + 5] for i in range(15)]))
+    np.testing.assert_array_equal(y, serie[5:])
+    assert np.shares_memory(X, serie) and np.shares_memory(y, serie)
+
+
+def test_serie_menor_que_a_janela_nao_gera_janelas():
+    X, y = sliding_windows(np.arange(5, dtype=float), 5)
+
+    assert X.shape == (0, 5)
+    assert y.shape == (0,)
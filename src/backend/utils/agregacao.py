@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+# Frequência aceita pela API -> regra de reamostragem do pandas (rótulo no início do período)
+FREQUENCIAS = {
+    "diaria": "D",
+    "semanal": "W-MON",
+    "mensal": "MS",
+    "trimestral": "QS",
+    "anual": "YS",
+}
+
+FUNCOES = {
+    "media": "mean",
+    "ultimo": "last",
+    "min": "min",
+    "max": "max",
+}
+
+PONTOS_PADRAO = 500
+
+
+def agregar(df, frequencia="mensal", funcao="media"):
+    """
+    Reamostra a série na frequência pedida aplicando a função de agregação.
+    Períodos sem observação são descartados.
+    """
+    if frequencia not in FREQUENCIAS:
+        raise ValueError(f"Frequência inválida: {frequencia}. Use: {', '.join(FREQUENCIAS)}")
+    if funcao not in FUNCOES:
+        raise ValueError(f"Função inválida: {funcao}. Use: {', '.join(FUNCOES)}")
+
+    serie = pd.Series(df['valor'].to_numpy(dtype='float64'), index=pd.DatetimeIndex(df['data']))
+    agregada = serie.resample(FREQUENCIAS[frequencia]).agg(FUNCOES[funcao]).dropna()
+    return pd.DataFrame({'data': agregada.index, 'valor': agregada.to_numpy()})
+
+
+def lttb(x, y, pontos):
+    """
+    Largest-Triangle-Three-Buckets: escolhe `pontos` índices que preservam a forma
+    visual da série (picos e vales), sempre mantendo o primeiro e o último ponto.
+    """
+    n = len(x)
+    if pontos >= n or pontos < 3:
+        return np.arange(n)
+
+    # pontos - 2 baldes entre o primeiro e o último ponto; o "próximo" do último balde é o ponto final
+    bordas = np.append(np.linspace(1, n - 1, pontos - 1).astype(int), n)
+    indices = np.empty(pontos, dtype=int)
+    indices[0], indices[-1] = 0, n - 1
+
+    anterior = 0
+    for i in range(pontos - 2):
+        inicio, fim = bordas[i], bordas[i + 1]
+        proximo_x = x[bordas[i + 1]:bordas[i + 2]].mean()
+        proximo_y = y[bordas[i + 1]:bordas[i + 2]].mean()
+        # Área (dobrada) do triângulo entre o ponto escolhido antes, cada candidato e a média do próximo balde
+        area = np.abs(
+            (x[anterior] - proximo_x) * (y[inicio:fim] - y[anterior])
+            - (x[anterior] - x[inicio:fim]) * (proximo_y - y[anterior])
+        )
+        anterior = inicio + int(np.argmax(area))
+        indices[i + 1] = anterior
+    return indices
+
+
+def reduzir_pontos(df, pontos=PONTOS_PADRAO):
+    """Reduz a série a no máximo `pontos` observações com LTTB."""
+    x = df['data'].to_numpy(dtype='datetime64[ns]').astype(np.int64).astype('float64')
+    y = df['valor'].to_numpy(dtype='float64')
+    return df.iloc[lttb(x, y, pontos)]
+
+
+def serie_para_grafico(df, frequencia=None, funcao="media", pontos=None):
+    """
+    Prepara a série para gráficos: agrega na frequência pedida e/ou reduz por LTTB.
+    Sem nenhum parâmetro, aplica LTTB com PONTOS_PADRAO pontos. Observações sem
+    valor finito (ou sem data) são descartadas antes: não há o que desenhar nelas
+    e o NaN tornaria arbitrária a comparação de áreas do LTTB.
+    """
+    valores = pd.to_numeric(df['valor'], errors='coerce').to_numpy(dtype='float64')
+    resultado = df.loc[np.isfinite(valores) & df['data'].notna().to_numpy(), ['data', 'valor']]
+    if frequencia is not None:
+        resultado = agregar(resultado, frequencia, funcao)
+    if pontos is not None or frequencia is None:
+        resultado = reduzir_pontos(resultado, pontos or PONTOS_PADRAO)
+    return resultado
@@ -1,62 +1,426 @@
 from .dados import carregar_dados
+import threading
+import numpy as np
 import pandas as pd
 
+def _valores_float(serie):
+    """Converte a coluna valor para float64, aceitando strings com vírgula decimal."""
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.to_numpy(dtype='float64')
+    return serie.astype(str).str.replace(",", ".").astype(float).to_numpy()
+
+
 def alerta_variacao_diaria(df, nome_serie, percentual_limite=5.0):
     """
     Detecta variações diárias (%) maiores que o limite definido.
     Retorna lista de alertas (datas e mensagens).
     """
-    df = df.copy()
-    # garante que valor está float
-    df['valor'] = df['valor'].astype(str).str.replace(",", ".").astype(float)
     df = df.sort_values('data')
-    # calcula variação percentual diária (diferença entre dias consecutivos)
-    df['variacao_pct'] = df['valor'].pct_change() * 100
-
-    # detecta variações maiores que limite absoluto
-    alertas = []
-    for idx, row in df.iterrows():
-        if abs(row['variacao_pct']) > percentual_limite:
-            alerta_msg = (
-                f"Alerta {nome_serie}: variação diária fora do comum em {row['data']} - "
-                f"variação de {row['variacao_pct']:.2f}%"
-            )
-            alertas.append(alerta_msg)
-    return alertas
+    regras = [{"tipo": "variacao", "limite": percentual_limite}]
+    return avaliar_regras(_valores_float(df['valor']), df['data'], nome_serie, regras)
 
 def alerta_valores_extremos(df, nome_serie, desvio_limite=2):
     """
     Detecta valores que estão muito acima ou abaixo da média, usando desvio padrão.
     Retorna lista de alertas.
     """
-    df = df.copy()
-    df['valor'] = df['valor'].astype(str).str.replace(",", ".").astype(float)
-    media = df['valor'].mean()
-    desvio = df['valor'].std()
+    regras = [{"tipo": "desvio", "limite": desvio_limite}]
+    return avaliar_regras(_valores_float(df['valor']), df['data'], nome_serie, regras)
+
+
+# Regras declarativas por série. Tipos suportados:
+#   variacao      - variação % entre observações consecutivas acima de `limite`
+#   desvio        - valor a mais de `limite` desvios padrão da média do histórico
+#   zscore_movel  - z-score em relação às `janela` observações anteriores acima de `limite`
+#   nivel         - valor abaixo de `minimo` ou acima de `maximo`
+REGRAS_ALERTAS = {
+    "selic": {"rotulo": "Selic", "regras": [
+        {"tipo": "variacao", "limite": 1.0},  # mais sensível para Selic
+        {"tipo": "desvio", "limite": 2},
+        {"tipo": "zscore_movel", "janela": 252, "limite": 3},
+    ]},
+    "cambio": {"rotulo": "Câmbio", "regras": [
+        {"tipo": "variacao", "limite": 3.0},
+        {"tipo": "desvio", "limite": 2},
+        {"tipo": "zscore_movel", "janela": 21, "limite": 4},
+    ]},
+    "ipca": {"rotulo": "IPCA", "regras": [
+        {"tipo": "variacao", "limite": 0.5},
+        {"tipo": "desvio", "limite": 2},
+        {"tipo": "nivel", "minimo": -0.5, "maximo": 1.0},
+    ]},
+    "pib": {"rotulo": "PIB", "regras": [
+        {"tipo": "variacao", "limite": 5.0},
+        {"tipo": "zscore_movel", "janela": 12, "limite": 3},
+    ]},
+    "divida": {"rotulo": "Dívida", "regras": [
+        {"tipo": "variacao", "limite": 5.0},
+        {"tipo": "zscore_movel", "janela": 12, "limite": 3},
+    ]},
+    "desemprego": {"rotulo": "Desemprego", "regras": [
+        {"tipo": "variacao", "limite": 5.0},
+        {"tipo": "nivel", "maximo": 12.0},
+    ]},
+}
+
+
+def _estatisticas_moveis(valores, janela):
+    """
+    Média e desvio padrão (ddof=1) das `janela` observações anteriores a cada ponto,
+    por somas acumuladas: O(n) independentemente do tamanho da janela.
+    Como no rolling do pandas, janelas com NaN ficam sem estatística, mas só elas:
+    os NaN entram como zero nas somas e uma contagem acumulada marca as janelas
+    incompletas. Janelas constantes têm desvio exatamente zero.
+    """
+    n = len(valores)
+    media = np.full(n, np.nan)
+    desvio = np.full(n, np.nan)
+    validos = ~np.isnan(valores)
+    if janela < 2 or n <= janela or not validos.any():
+        return media, desvio
+
+    # Centralizar na média da série reduz o cancelamento em s2 - s1²/janela
+    referencia = valores[validos].mean()
+    centrados = np.where(validos, valores - referencia, 0.0)
+    contagem = np.concatenate(([0], np.cumsum(validos)))
+    soma = np.concatenate(([0.0], np.cumsum(centrados)))
+    soma_quadrados = np.concatenate(([0.0], np.cumsum(centrados ** 2)))
+
+    fim = np.arange(janela, n)
+    completa = contagem[fim] - contagem[fim - janela] == janela
+    s1 = soma[fim] - soma[fim - janela]
+    s2 = soma_quadrados[fim] - soma_quadrados[fim - janela]
+    variancia = np.maximum(s2 - s1 ** 2 / janela, 0) / (janela - 1)
+
+    # Na janela constante as somas acumuladas deixam um resíduo de arredondamento:
+    # ela é reconhecida pelo trecho de valores iguais que termina no seu último ponto
+    indices = np.arange(n)
+    mudou = np.ones(n, dtype=bool)
+    mudou[1:] = valores[1:] != valores[:-1]
+    inicio_trecho = np.maximum.accumulate(np.where(mudou, indices, 0))
+    variancia[(fim - 1) - inicio_trecho[fim - 1] >= janela - 1] = 0.0
+
+    media[janela:] = np.where(completa, s1 / janela + referencia, np.nan)
+    desvio[janela:] = np.where(completa, np.sqrt(variancia), np.nan)
+    return media, desvio
+
 
+def avaliar_regras(valores, datas, rotulo, regras, inicio=0, media=None, desvio=None):
+    """
+    Avalia todas as regras de uma série numa única passada sobre o vetor `valores`.
+    Só são reportados pontos a partir de `inicio` (os anteriores servem de contexto
+    para variação e janelas móveis). `media`/`desvio` substituem as estatísticas
+    globais do vetor quando já são conhecidas (avaliação incremental).
+    """
     alertas = []
-    for idx, row in df.iterrows():
-        if row['valor'] > media + desvio_limite * desvio:
-            alertas.append(
-                f"Alerta {nome_serie}: valor muito alto em {row['data']} - {row['valor']:.2f}"
-            )
-        elif row['valor'] < media - desvio_limite * desvio:
-            alertas.append(
-                f"Alerta {nome_serie}: valor muito baixo em {row['data']} - {row['valor']:.2f}"
-            )
+    if len(valores) <= inicio:
+        return alertas
+
+    # Intermediários compartilhados entre as regras, calculados uma única vez
+    variacao_pct = None
+    moveis = {}
+
+    for regra in regras:
+        tipo = regra["tipo"]
+        if tipo == "variacao":
+            if variacao_pct is None:
+                variacao_pct = np.full(len(valores), np.nan)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    variacao_pct[1:] = (valores[1:] / valores[:-1] - 1) * 100
+            indices = np.flatnonzero(np.abs(variacao_pct[inicio:]) > regra["limite"]) + inicio
+            alertas += [
+                f"Alerta {rotulo}: variação diária fora do comum em {data} - "
+                f"variação de {variacao:.2f}%"
+                for data, variacao in zip(datas.iloc[indices], variacao_pct[indices])
+            ]
+
+        elif tipo == "desvio":
+            if media is None:
+                media = np.nanmean(valores) if len(valores) else np.nan
+                desvio = np.nanstd(valores, ddof=1) if len(valores) > 1 else np.nan
+            trecho = valores[inicio:]
+            acima = trecho > media + regra["limite"] * desvio
+            abaixo = trecho < media - regra["limite"] * desvio
+            indices = np.flatnonzero(acima | abaixo)
+            alertas += [
+                f"Alerta {rotulo}: valor muito alto em {data} - {valor:.2f}" if alto else
+                f"Alerta {rotulo}: valor muito baixo em {data} - {valor:.2f}"
+                for data, valor, alto in zip(datas.iloc[indices + inicio], trecho[indices], acima[indices])
+            ]
+
+        elif tipo == "zscore_movel":
+            janela = regra["janela"]
+            if janela not in moveis:
+                moveis[janela] = _estatisticas_moveis(valores, janela)
+            media_movel, desvio_movel = moveis[janela]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                zscore = (valores - media_movel) / desvio_movel
+            # Janela constante (desvio zero) não tem z-score definido
+            valido = desvio_movel > 0
+            indices = np.flatnonzero(valido[inicio:] & (np.abs(zscore[inicio:]) > regra["limite"])) + inicio
+            alertas += [
+                f"Alerta {rotulo}: valor atípico em {data} - {valor:.2f} "
+                f"(z-score {z:.2f} nas últimas {janela} observações)"
+                for data, valor, z in zip(datas.iloc[indices], valores[indices], zscore[indices])
+            ]
+
+        elif tipo == "nivel":
+            trecho = valores[inicio:]
+            acima = trecho > regra.get("maximo", np.inf)
+            abaixo = trecho < regra.get("minimo", -np.inf)
+            indices = np.flatnonzero(acima | abaixo)
+            alertas += [
+                f"Alerta {rotulo}: valor acima de {regra['maximo']} em {data} - {valor:.2f}" if alto else
+                f"Alerta {rotulo}: valor abaixo de {regra['minimo']} em {data} - {valor:.2f}"
+                for data, valor, alto in zip(datas.iloc[indices + inicio], trecho[indices], acima[indices])
+            ]
+
+        else:
+            raise ValueError(f"Tipo de regra de alerta desconhecido: {tipo}")
+
     return alertas
 
-def gerar_alertas(dados):
+
+def gerar_alertas(dados, regras=None):
     """
-    Recebe dict com DataFrames (selic, cambio, ipca) e retorna todos os alertas.
+    Recebe dict com DataFrames e retorna os alertas de todas as séries que
+    tiverem regras definidas em REGRAS_ALERTAS.
     """
+    regras = regras or REGRAS_ALERTAS
     alertas = []
-    alertas += alerta_variacao_diaria(dados['selic'], "Selic", percentual_limite=1.0)  # mais sensível para Selic
-    alertas += alerta_variacao_diaria(dados['cambio'], "Câmbio", percentual_limite=3.0)
-    alertas += alerta_variacao_diaria(dados['ipca'], "IPCA", percentual_limite=0.5)
+    for nome, config in regras.items():
+        if nome not in dados:
+            continue
+        df = dados[nome].sort_values('data')
+        alertas += avaliar_regras(_valores_float(df['valor']), df['data'], config["rotulo"], config["regras"])
+    return alertas
 
-    alertas += alerta_valores_extremos(dados['selic'], "Selic", desvio_limite=2)
-    alertas += alerta_valores_extremos(dados['cambio'], "Câmbio", desvio_limite=2)
-    alertas += alerta_valores_extremos(dados['ipca'], "IPCA", desvio_limite=2)
 
-    return alertas
+# Regras que só olham para a vizinhança de cada ponto (ponto anterior ou janela móvel):
+# os alertas já emitidos por elas não mudam quando chegam observações novas
+REGRAS_LOCAIS = {"variacao", "zscore_movel", "nivel"}
+
+
+def _estado_desvio(valores, datas):
+    """
+    Estado da regra de desvio de uma série: contagem, média e M2 (soma dos quadrados
+    dos desvios, como no algoritmo de Welford) dos valores válidos, os valores em
+    ordem crescente com a posição de cada um na série e as datas em ordem cronológica.
+    """
+    validos = np.flatnonzero(~np.isnan(valores))
+    ordem = np.argsort(valores[validos], kind='stable')
+    media = valores[validos].mean() if len(validos) else np.nan
+    return {
+        "n": len(validos),
+        "media": media,
+        "m2": float(((valores[validos] - media) ** 2).sum()) if len(validos) else 0.0,
+        "ordenados": valores[validos][ordem],
+        "posicoes": validos[ordem],
+        "datas": datas.reset_index(drop=True),
+        # Mensagem já formatada de cada (rótulo, posição, alto): não muda com observações novas
+        "mensagens": {},
+    }
+
+
+def _acrescentar_desvio(estado, novos, datas_novas):
+    """Novo estado com as observações `novos` anexadas: O(novas) nas estatísticas."""
+    inicio = len(estado["datas"])
+    validos = np.flatnonzero(~np.isnan(novos))
+    lote = novos[validos]
+    n = estado["n"] + len(lote)
+    media, m2 = estado["media"], estado["m2"]
+    if len(lote):
+        # Combinação de Welford/Chan: junta as estatísticas do lote às do histórico
+        media_lote = lote.mean()
+        m2_lote = float(((lote - media_lote) ** 2).sum())
+        if estado["n"] == 0:
+            media, m2 = media_lote, m2_lote
+        else:
+            delta = media_lote - media
+            media = media + delta * len(lote) / n
+            m2 = m2 + m2_lote + delta ** 2 * estado["n"] * len(lote) / n
+
+    ordem = np.argsort(lote, kind='stable')
+    lugares = np.searchsorted(estado["ordenados"], lote[ordem], side='right')
+    return {
+        "n": n,
+        "media": media,
+        "m2": m2,
+        "ordenados": np.insert(estado["ordenados"], lugares, lote[ordem]),
+        "posicoes": np.insert(estado["posicoes"], lugares, validos[ordem] + inicio),
+        "datas": pd.concat([estado["datas"], datas_novas.reset_index(drop=True)], ignore_index=True),
+        "mensagens": estado["mensagens"],
+    }
+
+
+def _alertas_desvio(estado, rotulo, limite):
+    """
+    Alertas da regra de desvio a partir do estado: os pontos fora da faixa
+    média ± limite·desvio saem das pontas do vetor ordenado (searchsorted),
+    sem percorrer a série. Mesmas mensagens e ordem de avaliar_regras.
+    """
+    if estado["n"] < 2:
+        return []
+    desvio = np.sqrt(estado["m2"] / (estado["n"] - 1))
+    ordenados = estado["ordenados"]
+    fim_baixos = np.searchsorted(ordenados, estado["media"] - limite * desvio, side='left')
+    inicio_altos = np.searchsorted(ordenados, estado["media"] + limite * desvio, side='right')
+    fora = np.concatenate((np.arange(fim_baixos), np.arange(inicio_altos, len(ordenados))))
+    fora = fora[np.argsort(estado["posicoes"][fora], kind='stable')]
+    posicoes = estado["posicoes"][fora].tolist()
+    altos = (fora >= inicio_altos).tolist()
+
+    # Só os pontos que entraram na faixa de alerta agora são formatados
+    mensagens = estado["mensagens"]
+    faltando = [i for i, chave in enumerate(zip(posicoes, altos)) if (rotulo, *chave) not in mensagens]
+    if faltando:
+        datas = estado["datas"].iloc[[posicoes[i] for i in faltando]]
+        for i, data, valor in zip(faltando, datas, ordenados[fora[faltando]]):
+            mensagens[(rotulo, posicoes[i], altos[i])] = (
+                f"Alerta {rotulo}: valor muito alto em {data} - {valor:.2f}" if altos[i] else
+                f"Alerta {rotulo}: valor muito baixo em {data} - {valor:.2f}"
+            )
+    return [mensagens[(rotulo, posicao, alto)] for posicao, alto in zip(posicoes, altos)]
+
+
+class AvaliadorAlertas:
+    """
+    Avaliação incremental dos alertas: guarda, por série, os alertas de cada regra,
+    as últimas observações de que as regras locais (variação, z-score móvel e nível)
+    precisam e, para a regra de desvio, a média e a variância acumuladas (Welford)
+    com os valores mantidos em ordem. Cada versão nova custa O(linhas novas) nas
+    estatísticas; os pontos fora da faixa de desvio, que muda com a média, saem por
+    busca binária no vetor ordenado. alertas() é igual ao resultado de gerar_alertas
+    sobre os mesmos dados, exceto por arredondamento de pontos exatamente na fronteira.
+    """
+
+    def __init__(self, regras=None):
+        self.regras = regras or REGRAS_ALERTAS
+        self.estado = {}
+
+    def _tamanho_cauda(self, nome):
+        janelas = [r["janela"] for r in self.regras[nome]["regras"] if r["tipo"] == "zscore_movel"]
+        return max(janelas + [1])
+
+    def _avaliar_serie(self, nome, df):
+        config = self.regras[nome]
+        df = df.sort_values('data')
+        valores = _valores_float(df['valor'])
+        desvio = None
+        if any(regra["tipo"] == "desvio" for regra in config["regras"]):
+            desvio = _estado_desvio(valores, df['data'])
+        self.estado[nome] = {
+            "cauda": valores[-self._tamanho_cauda(nome):],
+            "ultima_data": df['data'].iloc[-1] if len(df) else None,
+            "desvio": desvio,
+            "alertas": [
+                _alertas_desvio(desvio, config["rotulo"], regra["limite"]) if regra["tipo"] == "desvio" else
+                avaliar_regras(valores, df['data'], config["rotulo"], [regra])
+                for regra in config["regras"]
+            ],
+        }
+
+    def inicializar(self, dados):
+        """Avalia o histórico completo de cada série com regras."""
+        self.estado = {}
+        for nome in self.regras:
+            if nome in dados:
+                self._avaliar_serie(nome, dados[nome])
+        return self
+
+    def copia(self):
+        """Cópia independente: processar na cópia não altera este avaliador (os vetores nunca são alterados no lugar)."""
+        copia = AvaliadorAlertas(self.regras)
+        copia.estado = {nome: dict(e, alertas=list(e["alertas"])) for nome, e in self.estado.items()}
+        return copia
+
+    def processar(self, nome, df_novo, df_completo):
+        """
+        Acrescenta as linhas novas da série (df_novo). df_completo é a série já com
+        elas, só usada se a série ainda não tiver estado ou se as linhas novas não
+        vierem depois das conhecidas (aí a série é reavaliada inteira).
+        Retorna só os alertas das regras locais para as linhas novas.
+        """
+        config = self.regras.get(nome)
+        if config is None or df_novo is None or df_novo.empty:
+            return []
+        estado = self.estado.get(nome)
+        if estado is None or (estado["ultima_data"] is not None and df_novo['data'].min() <= estado["ultima_data"]):
+            self._avaliar_serie(nome, df_completo)
+            return []
+
+        df_novo = df_novo.sort_values('data')
+        novos = _valores_float(df_novo['valor'])
+        cauda = estado["cauda"]
+        if estado["desvio"] is not None:
+            estado["desvio"] = _acrescentar_desvio(estado["desvio"], novos, df_novo['data'])
+
+        # A cauda dá o contexto (ponto anterior e janelas móveis) sem reprocessar o histórico
+        valores = np.concatenate((cauda, novos))
+        datas = pd.concat([pd.Series([None] * len(cauda), dtype=object), df_novo['data'].astype(object)],
+                          ignore_index=True)
+        novos_alertas = []
+        for i, regra in enumerate(config["regras"]):
+            if regra["tipo"] in REGRAS_LOCAIS:
+                alertas = avaliar_regras(valores, datas, config["rotulo"], [regra], inicio=len(cauda))
+                estado["alertas"][i] = estado["alertas"][i] + alertas
+                novos_alertas += alertas
+            elif regra["tipo"] == "desvio":
+                estado["alertas"][i] = _alertas_desvio(estado["desvio"], config["rotulo"], regra["limite"])
+            else:
+                raise ValueError(f"Tipo de regra de alerta desconhecido: {regra['tipo']}")
+        estado["cauda"] = valores[-self._tamanho_cauda(nome):]
+        estado["ultima_data"] = df_novo['data'].iloc[-1]
+        return novos_alertas
+
+    def alertas(self):
+        """Todos os alertas, na mesma ordem de gerar_alertas."""
+        return [
+            alerta
+            for nome in self.regras if nome in self.estado
+            for alertas_da_regra in self.estado[nome]["alertas"]
+            for alerta in alertas_da_regra
+        ]
+
+
+# Alertas do último Snapshot calculado; só muda quando uma nova versão é publicada
+_cache_alertas = {"snapshot": None, "alertas": [], "avaliador": None}
+_trava_alertas = threading.Lock()
+
+
+def alertas_do_snapshot(snapshot):
+    """
+    Retorna os alertas do Snapshot, calculando-os uma única vez por versão dos dados.
+    Quando o Snapshot sucede diretamente o último calculado, só as linhas novas
+    passam pelas regras locais (AvaliadorAlertas); caso contrário, ou se a
+    avaliação incremental falhar, o cálculo é completo. O resultado é o mesmo de
+    gerar_alertas(snapshot.dados) nos dois caminhos (ver AvaliadorAlertas).
+    """
+    cache = _cache_alertas
+    if cache["snapshot"] is snapshot:
+        return cache["alertas"]
+
+    with _trava_alertas:
+        # Outra requisição pode ter calculado enquanto esperávamos a trava
+        anterior = cache["snapshot"]
+        if anterior is snapshot:
+            return cache["alertas"]
+
+        avaliador = None
+        if (anterior is not None and cache["avaliador"] is not None and snapshot.incremental
+                and snapshot.versao == anterior.versao + 1):
+            # Avança uma cópia: se falhar no meio, o avaliador em cache continua íntegro
+            try:
+                avaliador = cache["avaliador"].copia()
+                for nome, df_novo in snapshot.linhas_novas.items():
+                    avaliador.processar(nome, df_novo, snapshot.dados[nome])
+            except Exception as e:
+                print(f"Erro na avaliação incremental dos alertas, recalculando tudo: {e}")
+                avaliador = None
+
+        if avaliador is None:
+            avaliador = AvaliadorAlertas().inicializar(snapshot.dados)
+
+        alertas = avaliador.alertas()
+        cache.update(snapshot=snapshot, alertas=alertas, avaliador=avaliador)
+        return alertas
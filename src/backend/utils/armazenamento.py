@@ -0,0 +1,145 @@
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Diretório padrão do armazenamento local das séries (ao lado de data/models)
+DIRETORIO_PADRAO = os.path.join(os.path.dirname(__file__), '..', 'data', 'series')
+
+
+def _caminhos(nome, diretorio):
+    base = os.path.join(diretorio, nome)
+    return {
+        "data": f"{base}.data.bin",
+        "valor": f"{base}.valor.bin",
+        "meta": f"{base}.json",
+    }
+
+
+def _escrever_atomico(caminho, conteudo, modo="wb"):
+    """Escreve em arquivo temporário e troca pelo destino com os.replace."""
+    pasta = os.path.dirname(caminho)
+    fd, tmp = tempfile.mkstemp(dir=pasta, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, modo) as f:
+            f.write(conteudo)
+        os.replace(tmp, caminho)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _colunas_binarias(df):
+    datas = df['data'].to_numpy(dtype='datetime64[ns]').view('int64')
+    valores = df['valor'].to_numpy(dtype='float64')
+    return np.ascontiguousarray(datas), np.ascontiguousarray(valores)
+
+
+def ler_metadados(nome, diretorio=None):
+    """Retorna os metadados gravados da série ou None se ela não existir."""
+    diretorio = diretorio or DIRETORIO_PADRAO
+    caminho = _caminhos(nome, diretorio)["meta"]
+    if not os.path.exists(caminho):
+        return None
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Metadados inválidos para {nome}: {e}")
+        return None
+
+
+def _gravar_metadados(nome, diretorio, linhas, datas):
+    meta = {
+        "linhas": int(linhas),
+        "ultima_data": (
+            str(np.datetime64(int(datas[-1]), 'ns').astype('datetime64[D]')) if linhas else None
+        ),
+        "gravado_em": pd.Timestamp.now().isoformat(),
+    }
+    _escrever_atomico(
+        _caminhos(nome, diretorio)["meta"],
+        json.dumps(meta).encode("utf-8"),
+    )
+    return meta
+
+
+def salvar_serie(nome, df, diretorio=None):
+    """
+    Grava a série inteira (colunas data e valor) como vetores binários contíguos.
+    As colunas derivadas (mes, ano, trimestre) são recalculadas na leitura.
+    """
+    diretorio = diretorio or DIRETORIO_PADRAO
+    os.makedirs(diretorio, exist_ok=True)
+    caminhos = _caminhos(nome, diretorio)
+
+    datas, valores = _colunas_binarias(df)
+    _escrever_atomico(caminhos["data"], datas.tobytes())
+    _escrever_atomico(caminhos["valor"], valores.tobytes())
+    # Os metadados são gravados por último: o leitor só confia em `linhas`
+    return _gravar_metadados(nome, diretorio, len(datas), datas)
+
+
+def anexar_serie(nome, df_novo, diretorio=None):
+    """
+    Acrescenta linhas ao fim da série gravada, em O(linhas novas).
+    As linhas devem ser posteriores à última data já gravada.
+    """
+    diretorio = diretorio or DIRETORIO_PADRAO
+    meta = ler_metadados(nome, diretorio)
+    if meta is None:
+        return salvar_serie(nome, df_novo, diretorio)
+
+    datas, valores = _colunas_binarias(df_novo)
+    if len(datas) == 0:
+        return meta
+
+    caminhos = _caminhos(nome, diretorio)
+    linhas = meta["linhas"]
+    for chave, vetor in (("data", datas), ("valor", valores)):
+        with open(caminhos[chave], "r+b") as f:
+            # Descarta restos de uma escrita interrompida antes de anexar
+            f.truncate(linhas * 8)
+            f.seek(0, os.SEEK_END)
+            f.write(vetor.tobytes())
+    return _gravar_metadados(nome, diretorio, linhas + len(datas), datas)
+
+
+def carregar_serie(nome, diretorio=None, copiar=True, linhas=None):
+    """
+    Lê a série gravada via memória mapeada.
+    Retorna DataFrame com as colunas data e valor, ou None se não houver cache.
+    Com copiar=False as colunas apontam direto para o mapeamento (somente leitura),
+    e processos que leem o mesmo arquivo compartilham as páginas do sistema.
+    `linhas` limita a leitura a um prefixo (a versão registrada no manifesto).
+    """
+    diretorio = diretorio or DIRETORIO_PADRAO
+    meta = ler_metadados(nome, diretorio)
+    if meta is None:
+        return None
+
+    caminhos = _caminhos(nome, diretorio)
+    if not (os.path.exists(caminhos["data"]) and os.path.exists(caminhos["valor"])):
+        return None
+
+    # Nunca lê além do que os metadados confirmam (escritas interrompidas)
+    linhas = min(
+        meta.get("linhas", 0) if linhas is None else linhas,
+        meta.get("linhas", 0),
+        os.path.getsize(caminhos["data"]) // 8,
+        os.path.getsize(caminhos["valor"]) // 8,
+    )
+    if linhas <= 0:
+        return None
+
+    datas = np.memmap(caminhos["data"], dtype='int64', mode='r', shape=(linhas,))
+    valores = np.memmap(caminhos["valor"], dtype='float64', mode='r', shape=(linhas,))
+    if not copiar:
+        return pd.DataFrame({'data': datas.view('datetime64[ns]'), 'valor': valores}, copy=False)
+    return pd.DataFrame({
+        'data': pd.to_datetime(np.array(datas).view('datetime64[ns]')),
+        'valor': np.array(valores),
+    })
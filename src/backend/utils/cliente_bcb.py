@@ -0,0 +1,68 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (conexão, leitura) em segundos para cada requisição ao BCB
+TIMEOUT_PADRAO = (5, 60)
+MAX_CONEXOES = 8
+
+
+def criar_sessao(tentativas=3, backoff=0.5, max_conexoes=MAX_CONEXOES):
+    """
+    Sessão HTTP com pool de conexões e novas tentativas com backoff exponencial
+    para falhas de rede e respostas 429/5xx do BCB.
+    """
+    retry = Retry(
+        total=tentativas,
+        backoff_factor=backoff,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+        raise_on_status=False,
+    )
+    adaptador = HTTPAdapter(
+        pool_connections=max_conexoes,
+        pool_maxsize=max_conexoes,
+        max_retries=retry,
+    )
+    sessao = requests.Session()
+    sessao.mount("https://", adaptador)
+    sessao.mount("http://", adaptador)
+    return sessao
+
+
+def baixar(url, sessao=None, timeout=TIMEOUT_PADRAO):
+    """Faz um GET com timeout; cria uma sessão própria se nenhuma for informada."""
+    if sessao is None:
+        with criar_sessao() as sessao_local:
+            return sessao_local.get(url, timeout=timeout)
+    return sessao.get(url, timeout=timeout)
+
+
+def baixar_varios(urls, sessao=None, max_conexoes=MAX_CONEXOES, timeout=TIMEOUT_PADRAO):
+    """
+    Baixa várias URLs em paralelo num pool de threads limitado.
+    Recebe dict chave -> url e devolve dict chave -> Response, ou a exceção
+    levantada por aquela requisição (uma falha não derruba as demais).
+    """
+    if not urls:
+        return {}
+
+    sessao_propria = sessao is None
+    if sessao_propria:
+        sessao = criar_sessao(max_conexoes=max_conexoes)
+
+    def _baixar(url):
+        try:
+            return sessao.get(url, timeout=timeout)
+        except requests.RequestException as e:
+            return e
+
+    try:
+        with ThreadPoolExecutor(max_workers=min(max_conexoes, len(urls))) as executor:
+            futuros = {chave: executor.submit(_baixar, url) for chave, url in urls.items()}
+            return {chave: futuro.result() for chave, futuro in futuros.items()}
+    finally:
+        if sessao_propria:
+            sessao.close()
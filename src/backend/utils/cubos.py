@@ -0,0 +1,121 @@
+import pandas as pd
+
+from .dados import MESES
+from .indices import MESES_MINUSCULOS
+
+PERIODICIDADES = ("mensal", "trimestral", "anual")
+# Chave minúscula dos índices -> nome do mês como aparece na coluna mes das séries ("Março")
+NOME_MES = {nome.lower(): nome for nome in MESES}
+
+
+def _chave(periodicidade, codigo):
+    """Converte o código numérico do período na chave usada pelos índices."""
+    if periodicidade == "mensal":
+        ano, mes = divmod(int(codigo), 12)
+        return (str(ano), MESES_MINUSCULOS[mes + 1])
+    if periodicidade == "trimestral":
+        ano, trimestre = divmod(int(codigo), 4)
+        return (str(ano), str(trimestre + 1))
+    return str(int(codigo))
+
+
+def _resumir(periodicidade, codigos, valores):
+    """Contagem, soma, média, mínimo, máximo e último valor de cada período, em ordem cronológica."""
+    tabela = pd.Series(valores).groupby(codigos, sort=True).agg(["count", "sum", "min", "max", "last"])
+    tabela = tabela[tabela["count"] > 0]
+    return {
+        _chave(periodicidade, codigo): {
+            "contagem": int(contagem),
+            "soma": float(soma),
+            "media": float(soma) / int(contagem),
+            "minimo": float(minimo),
+            "maximo": float(maximo),
+            "ultimo": float(ultimo),
+        }
+        for codigo, contagem, soma, minimo, maximo, ultimo in zip(
+            tabela.index, *(tabela[coluna].to_numpy() for coluna in tabela.columns)
+        )
+    }
+
+
+def construir_cubo(df):
+    """
+    Agregados materializados da série por mês, trimestre e ano. Cada período leva a
+    {contagem, soma, media, minimo, maximo, ultimo}, com as mesmas chaves dos índices
+    (ver utils/indices.py). Retorna None se a série não tiver uma coluna de datas.
+    """
+    if df is None or df.empty or not pd.api.types.is_datetime64_any_dtype(df['data']):
+        return None
+
+    ordenado = df.sort_values('data', kind='stable')
+    datas = ordenado['data']
+    valores = pd.to_numeric(ordenado['valor'], errors='coerce').to_numpy(dtype='float64')
+    anos = datas.dt.year.to_numpy()
+    meses = datas.dt.month.to_numpy() - 1
+
+    return {
+        "mensal": _resumir("mensal", anos * 12 + meses, valores),
+        "trimestral": _resumir("trimestral", anos * 4 + meses // 3, valores),
+        "anual": _resumir("anual", anos, valores),
+        "ultima_data": datas.iloc[-1],
+    }
+
+
+def _combinar(atual, novo):
+    contagem = atual["contagem"] + novo["contagem"]
+    soma = atual["soma"] + novo["soma"]
+    return {
+        "contagem": contagem,
+        "soma": soma,
+        "media": soma / contagem,
+        "minimo": min(atual["minimo"], novo["minimo"]),
+        "maximo": max(atual["maximo"], novo["maximo"]),
+        "ultimo": novo["ultimo"],
+    }
+
+
+def atualizar_cubo(cubo, df_novo):
+    """
+    Incorpora linhas anexadas ao fim da série sem reprocessar o histórico: só os
+    períodos tocados pelas linhas novas são recombinados. O cubo recebido não é
+    alterado. Linhas anteriores à última data do cubo exigem reconstrução (retorna None).
+    """
+    if cubo is None:
+        return None
+    parcial = construir_cubo(df_novo)
+    if parcial is None:
+        return cubo
+    if df_novo['data'].min() <= cubo["ultima_data"]:
+        return None
+
+    atualizado = {"ultima_data": parcial["ultima_data"]}
+    for periodicidade in PERIODICIDADES:
+        periodos = dict(cubo[periodicidade])
+        for chave, resumo in parcial[periodicidade].items():
+            periodos[chave] = _combinar(periodos[chave], resumo) if chave in periodos else resumo
+        atualizado[periodicidade] = periodos
+    return atualizado
+
+
+def periodos_do_cubo(cubo, periodicidade="mensal", ano=None):
+    """
+    Lista os agregados de uma periodicidade como registros, opcionalmente de um só ano.
+    Os campos ano, mes e trimestre seguem os valores das colunas das séries.
+    """
+    if periodicidade not in PERIODICIDADES:
+        raise ValueError(f"Periodicidade inválida: {periodicidade}. Use: {', '.join(PERIODICIDADES)}")
+    if cubo is None:
+        return []
+
+    registros = []
+    for chave, resumo in cubo[periodicidade].items():
+        if periodicidade == "mensal":
+            campos = {"ano": chave[0], "mes": NOME_MES[chave[1]]}
+        elif periodicidade == "trimestral":
+            campos = {"ano": chave[0], "trimestre": chave[1]}
+        else:
+            campos = {"ano": chave}
+        if ano is not None and campos["ano"] != str(ano):
+            continue
+        registros.append({**campos, **resumo})
+    return registros
@@ -1,7 +1,11 @@
+import numpy as np
 import pandas as pd
 import requests
 from io import StringIO
 from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from .armazenamento import carregar_serie, salvar_serie, anexar_serie, ler_metadados
+from .cliente_bcb import MAX_CONEXOES, baixar, baixar_varios, criar_sessao
 
 # URLs das APIs do Banco Central
 URLS = {
@@ -23,15 +27,45 @@ import pandas as pd
 
 def converter_data_safe(df, coluna="data"):
     try:
-        # Deixe o pandas inferir automaticamente o formato
-        df[coluna] = pd.to_datetime(df[coluna], errors='coerce', utc=False)
+        # O BCB publica as datas no formato brasileiro (dia/mês/ano)
+        df[coluna] = pd.to_datetime(df[coluna], errors='coerce', utc=False, dayfirst=True)
         return df
     except Exception as e:
         print(f"Erro ao converter datas: {e}")
         return df
 
 
-def carregar_dados():
+MESES = list(MAPA_MESES.values())
+TRIMESTRES = ["1", "2", "3", "4"]
+# Tipos categóricos compartilhados por todas as séries (códigos int8, categorias únicas)
+TIPO_MES = pd.CategoricalDtype(MESES)
+TIPO_TRIMESTRE = pd.CategoricalDtype(TRIMESTRES)
+
+
+def adicionar_colunas_calendario(df, nome):
+    """
+    Recalcula as colunas derivadas (mes, ano e, no PIB, trimestre) a partir de `data`.
+    As colunas são categóricas, montadas direto dos códigos numéricos do calendário:
+    os valores continuam sendo os textos de sempre ("Março", "2024", "1").
+    """
+    meses = df['data'].dt.month.to_numpy() - 1
+    codigos_ano, anos = pd.factorize(df['data'].dt.year.to_numpy(), sort=True)
+    df['mes'] = pd.Categorical.from_codes(meses, dtype=TIPO_MES)
+    df['ano'] = pd.Categorical.from_codes(codigos_ano, categories=[str(ano) for ano in anos])
+    if nome == "pib":
+        df['trimestre'] = pd.Categorical.from_codes(meses // 3, dtype=TIPO_TRIMESTRE)
+    return df
+
+
+def carregar_dados(diretorio=None, usar_cache=True, urls=None, max_conexoes=MAX_CONEXOES):
+    """
+    Carrega as séries do armazenamento local e baixa do BCB apenas as que faltarem.
+    Os downloads (inclusive cada janela de selic e câmbio) são feitos em paralelo,
+    então o tempo de inicialização fica limitado pela série mais lenta.
+    Séries baixadas são gravadas no armazenamento para as próximas inicializações;
+    o complemento com dados novos fica a cargo de `atualizar_dados`.
+    """
+    urls = urls or URLS
     dados = {}
     hoje = pd.Timestamp.today()
 
@@ -49,133 +83,237 @@ def carregar_dados():
         ]
     }
 
-    for nome, url_base in URLS.items():
+    # Monta a lista de downloads das séries que não estão no armazenamento
+    pendentes = {}
+    for nome, url_base in urls.items():
+        if usar_cache:
+            df_cache = carregar_serie(nome, diretorio)
+            if df_cache is not None:
+                dados[nome] = adicionar_colunas_calendario(df_cache, nome)
+                continue
+
+        if nome in limites_especiais:
+            for i, (data_inicial, data_final) in enumerate(limites_especiais[nome]):
+                pendentes[(nome, i)] = f"{url_base}&dataInicial={data_inicial}&dataFinal={data_final}"
+        else:
+            pendentes[(nome, 0)] = url_base
+
+    respostas = baixar_varios(pendentes, max_conexoes=max_conexoes)
+
+    for nome in urls:
+        chaves = sorted(chave for chave in respostas if chave[0] == nome)
+        if not chaves:
+            continue
+
         try:
-            if nome in limites_especiais:
-                dfs = []
-                for data_inicial, data_final in limites_especiais[nome]:
-                    url = f"{url_base}&dataInicial={data_inicial}&dataFinal={data_final}"
-                    response = requests.get(url)
-                    if response.status_code == 200:
-                        df = pd.read_csv(StringIO(response.text), sep=';', decimal='.')
-
-                        # Conversão robusta de datas
-                        df = converter_data_safe(df, coluna='data')
-
-                        
-                        # Remove linhas com datas inválidas
-                        df = df.dropna(subset=['data'])
-                        
-                        if df['valor'].dtype == object:
-                            df['valor'] = df['valor'].str.replace(',', '.', regex=False).astype(float)
-                        df['mes'] = df['data'].dt.month_name().map(MAPA_MESES)
-                        df['ano'] = df['data'].dt.year.astype(str)
-                        if nome == "pib":
-                            df['trimestre'] = df['data'].dt.month.apply(lambda m: str((m - 1) // 3 + 1))
-                        dfs.append(df)
-                dados[nome] = pd.concat(dfs).drop_duplicates(subset='data')
-            else:
-                response = requests.get(url_base)
-                if response.status_code == 200:
-                    df = pd.read_csv(StringIO(response.text), sep=';', decimal='.')
-                    
-                    # Conversão robusta de datas
-                    df = converter_data_safe(df, coluna='data')
-
-                    
-                    # Remove linhas com datas inválidas
-                    df = df.dropna(subset=['data'])
-                    
-                    if df['valor'].dtype == object:
-                        df['valor'] = df['valor'].str.replace(',', '.', regex=False).astype(float)
-                    df['mes'] = df['data'].dt.month_name().map(MAPA_MESES)
-                    df['ano'] = df['data'].dt.year.astype(str)
-                    if nome == "pib":
-                        df['trimestre'] = df['data'].dt.month.apply(lambda m: str((m - 1) // 3 + 1))
-                    dados[nome] = df
-                else:
-                    print(f"Erro ao acessar dados de {nome}: HTTP {response.status_code}")
+            dfs = []
+            for chave in chaves:
+                response = respostas[chave]
+                if isinstance(response, Exception):
+                    raise response
+                if response.status_code != 200:
+                    raise RuntimeError(f"HTTP {response.status_code}")
+                dfs.append(_ler_csv_bcb(response.text))
+            # Janelas vizinhas compartilham a data de fronteira
+            df = pd.concat(dfs, ignore_index=True).drop_duplicates(subset='data', ignore_index=True)
+            dados[nome] = adicionar_colunas_calendario(df, nome)
         except Exception as e:
+            # Série incompleta não é gravada, senão a sincronização nunca buscaria o trecho que faltou
             print(f"Erro ao carregar dados de {nome}: {e}")
+            continue
+
+        try:
+            salvar_serie(nome, dados[nome], diretorio)
+        except Exception as e:
+            print(f"Erro ao gravar {nome} no armazenamento local: {e}")
     return dados
 
 
-def atualizar_dados(dados_existentes):
-    novos_dados = {}
-    atualizaveis = ['selic', 'cambio']
+def _datas_brasileiras(coluna):
+    """
+    Converte datas "dd/mm/aaaa" lendo os dígitos direto dos bytes, sem passar pelo
+    parser de strings do pandas. Se alguma linha fugir do formato (ou for uma data
+    inexistente, como 31/02), cai no `pd.to_datetime` com formato explícito.
+    """
+    try:
+        bytes_ = np.frombuffer(coluna.to_numpy(dtype='S11').tobytes(), dtype=np.uint8).reshape(-1, 11)
+    except (UnicodeEncodeError, ValueError):
+        bytes_ = None
+    if bytes_ is not None and len(bytes_):
+        digitos = bytes_[:, [0, 1, 3, 4, 6, 7, 8, 9]].astype(np.int64) - ord('0')
+        no_formato = (
+            ((digitos >= 0) & (digitos <= 9)).all()
+            and (bytes_[:, [2, 5]] == ord('/')).all()
+            and (bytes_[:, 10] == 0).all()
+        )
+        if no_formato:
+            dia = digitos[:, 0] * 10 + digitos[:, 1]
+            mes = digitos[:, 2] * 10 + digitos[:, 3]
+            ano = digitos[:, 4] * 1000 + digitos[:, 5] * 100 + digitos[:, 6] * 10 + digitos[:, 7]
+            meses = ((ano - 1970) * 12 + mes - 1).astype('datetime64[M]')
+            datas = meses.astype('datetime64[D]') + (dia - 1)
+            if ((mes >= 1) & (mes <= 12) & (dia >= 1)).all() and (datas.astype('datetime64[M]') == meses).all():
+                return pd.Series(datas.astype('datetime64[ns]'), index=coluna.index, name=coluna.name)
+    return pd.to_datetime(coluna, format='%d/%m/%Y', errors='coerce')
 
-    for nome in dados_existentes.keys():
-        if nome not in atualizaveis:
-            novos_dados[nome] = dados_existentes[nome]
-            continue
 
+def _ler_csv_bcb(texto):
+    """
+    Etapa única de leitura do CSV do BCB: vírgula decimal convertida pelo próprio
+    leitor e datas no formato fixo dia/mês/ano, sem inferência (ver
+    `_datas_brasileiras`). Devolve só data e
+    valor; as colunas de calendário são acrescentadas uma vez, após juntar as janelas.
+    """
+    df = pd.read_csv(StringIO(texto), sep=';', decimal=',')
+    df['data'] = _datas_brasileiras(df['data'])
+    df = df.dropna(subset=['data'])
+    if not pd.api.types.is_numeric_dtype(df['valor']):
+        # Valores já com ponto decimal (ou mistos) não são convertidos pelo leitor
+        df['valor'] = df['valor'].str.replace(',', '.', regex=False).astype(float)
+    return df
+
+
+def _janelas_consulta(inicio, fim, anos=10):
+    """Divide [inicio, fim] em janelas de no máximo `anos` anos (limite da API do BCB)."""
+    janelas = []
+    while inicio <= fim:
+        limite = min(inicio + pd.DateOffset(years=anos) - timedelta(days=1), fim)
+        janelas.append((inicio, limite))
+        inicio = limite + timedelta(days=1)
+    return janelas
+
+
+def marca_dagua(df):
+    """Última data presente na série (marca d'água da sincronização)."""
+    if df is None or df.empty:
+        return None
+    return df['data'].iloc[-1]
+
+
+def sincronizar_serie(nome, df_existente, diretorio=None, hoje=None, sessao=None):
+    """
+    Busca no BCB apenas a janela posterior à marca d'água da série.
+    Retorna (df_atualizado, df_novo); df_novo vazio quando não há dados novos.
+    Não altera df_existente, para que leitores concorrentes sigam com a versão anterior.
+    """
+    hoje = (hoje or pd.Timestamp.today()).normalize()
+    ultima_data = marca_dagua(df_existente)
+    vazio = df_existente.iloc[0:0]
+    if ultima_data is None or ultima_data >= hoje:
+        return df_existente, vazio
+
+    partes = []
+    for inicio, fim in _janelas_consulta(ultima_data + timedelta(days=1), hoje):
+        url = f"{URLS[nome]}&dataInicial={inicio:%d/%m/%Y}&dataFinal={fim:%d/%m/%Y}"
         try:
-            df_existente = dados_existentes[nome]
-            ultima_data = df_existente['data'].max()
+            response = baixar(url, sessao)
+        except requests.RequestException as e:
+            print(f"Erro ao atualizar {nome}: {e}")
+            break
+        if response.status_code == 404:
+            # O BCB responde 404 quando a janela ainda não tem observações
+            continue
+        if response.status_code != 200:
+            print(f"Erro ao atualizar {nome}: HTTP {response.status_code}")
+            break
+        if response.text.strip():
+            partes.append(_ler_csv_bcb(response.text))
 
-            data_inicial_dt = ultima_data
-            data_final_dt = pd.Timestamp.today() - timedelta(days=1)
+    if not partes:
+        return df_existente, vazio
 
-            # Impede chamada inválida à API
-            if data_inicial_dt >= data_final_dt:
-                novos_dados[nome] = df_existente
-                continue
+    df_novo = pd.concat(partes, ignore_index=True)
+    # Só a parte nova é filtrada; o histórico já está ordenado e sem duplicatas
+    df_novo = df_novo[df_novo['data'] > ultima_data].drop_duplicates(subset='data', ignore_index=True)
+    if df_novo.empty:
+        return df_existente, vazio
+
+    # Calendário recalculado sobre a série inteira para manter as categorias de ano consistentes
+    df_atualizado = adicionar_colunas_calendario(
+        pd.concat([df_existente[['data', 'valor']], df_novo], ignore_index=True), nome
+    )
+
+    meta = ler_metadados(nome, diretorio)
+    if meta is not None and meta.get("ultima_data") == f"{ultima_data:%Y-%m-%d}":
+        anexar_serie(nome, df_novo, diretorio)
+    else:
+        # Armazenamento defasado ou ausente: regrava a série completa
+        salvar_serie(nome, df_atualizado, diretorio)
+
+    return df_atualizado, df_atualizado.iloc[len(df_existente):]
 
-            data_inicial = data_inicial_dt.strftime("%d/%m/%Y")
-            data_final = data_final_dt.strftime("%d/%m/%Y")
-            url = f"{URLS[nome]}&dataInicial={data_inicial}&dataFinal={data_final}"
 
-            response = requests.get(url)
-            if response.status_code == 200:
-                df_novo = pd.read_csv(StringIO(response.text), sep=";", decimal=".")
+def sincronizar_dados(dados_existentes, diretorio=None, hoje=None):
+    """
+    Sincroniza todas as séries com o BCB de forma incremental.
+    Retorna (novos_dados, linhas_novas), onde linhas_novas mapeia o nome da série
+    para o DataFrame com as observações recém-ingeridas.
+    """
+    novos_dados = {}
+    linhas_novas = {}
+
+    with criar_sessao() as sessao, ThreadPoolExecutor(max_workers=MAX_CONEXOES) as executor:
+        futuros = {
+            nome: executor.submit(sincronizar_serie, nome, df_existente, diretorio, hoje, sessao)
+            for nome, df_existente in dados_existentes.items()
+        }
+        for nome, futuro in futuros.items():
+            try:
+                novos_dados[nome], df_novo = futuro.result()
                 if not df_novo.empty:
-                    # Conversão robusta de datas
-                    df = converter_data_safe(df, coluna='data')
-
-                    
-                    # Remove linhas com datas inválidas
-                    df_novo = df_novo.dropna(subset=['data'])
-                    
-                    if df_novo['valor'].dtype == object:
-                        df_novo['valor'] = df_novo['valor'].str.replace(',', '.', regex=False).astype(float)
-                    df_novo['mes'] = df_novo['data'].dt.month_name().map(MAPA_MESES)
-                    df_novo['ano'] = df_novo['data'].dt.year.astype(str)
-                    if nome == "pib":
-                        df_novo['trimestre'] = df_novo['data'].dt.month.apply(lambda m: str((m - 1) // 3 + 1))
-                    dados_atualizado = pd.concat([df_existente, df_novo]).drop_duplicates(subset='data')
-                    novos_dados[nome] = dados_atualizado
-                else:
-                    novos_dados[nome] = df_existente
-            else:
-                print(f"Erro ao atualizar {nome}: HTTP {response.status_code}")
-                novos_dados[nome] = df_existente
-        except Exception as e:
-            print(f"Erro ao atualizar dados de {nome}: {e}")
-            novos_dados[nome] = dados_existentes[nome]
+                    linhas_novas[nome] = df_novo
+            except Exception as e:
+                print(f"Erro ao atualizar dados de {nome}: {e}")
+                novos_dados[nome] = dados_existentes[nome]
+
+    return novos_dados, linhas_novas
+
 
+def atualizar_dados(dados_existentes, diretorio=None):
+    novos_dados, _ = sincronizar_dados(dados_existentes, diretorio)
     return novos_dados
 
 
-def filtrar_por_ano_mes(df, ano: str, mes: str):
+def filtrar_por_ano_mes(df, ano: str, mes: str, indice=None):
+    """
+    Filtra a série por ano e mês. Com o índice do Snapshot (ver utils/indices.py)
+    a busca é O(1) e devolve uma fatia, sem varrer nem copiar a coluna `mes`.
+    """
+    if indice is not None:
+        fatia = indice["mensal"].get((str(ano), mes.lower()))
+        return df.iloc[fatia] if fatia is not None else df.iloc[0:0]
     return df[(df['ano'] == ano) & (df['mes'].str.lower() == mes.lower())]
 
-def media_mensal(df, ano, mes):
-    ano = str(ano)
-    mes = mes.lower()
-    df_mes = df[(df['ano'] == ano) & (df['mes'].str.lower() == mes)]
-    if df_mes.empty:
-        return f"Nenhum dado encontrado para {mes}/{ano}."
-    return round(df_mes['valor'].mean(), 2)
-
-def media_anual(df, ano):
-    ano = str(ano)
-    df_ano = df[df['ano'] == ano]
-    if df_ano.empty:
-        return f"Nenhum dado encontrado para o ano {ano}."
-    return round(df_ano['valor'].mean(), 2)
-
-def filtrar_pib_por_ano_trimestre(df_pib, ano: str, trimestre: str = None):
+def filtrar_por_periodo(df, inicio=None, fim=None):
+    """
+    Linhas com data entre `inicio` e `fim` (inclusive). Como as séries são mantidas
+    ordenadas por data, os limites são achados por busca binária e o resultado é
+    uma fatia, sem varrer o histórico.
+    """
+    if inicio is None and fim is None:
+        return df
+    datas = df['data']
+    if not datas.is_monotonic_increasing:
+        mascara = pd.Series(True, index=df.index)
+        if inicio is not None:
+            mascara &= datas >= pd.Timestamp(inicio)
+        if fim is not None:
+            mascara &= datas <= pd.Timestamp(fim)
+        return df[mascara]
+
+    primeiro = 0 if inicio is None else datas.searchsorted(pd.Timestamp(inicio), side='left')
+    ultimo = len(df) if fim is None else datas.searchsorted(pd.Timestamp(fim), side='right')
+    return df.iloc[primeiro:ultimo]
+
+def filtrar_pib_por_ano_trimestre(df_pib, ano: str, trimestre: str = None, indice=None):
+    if indice is not None:
+        if trimestre is None:
+            fatia = indice["anual"].get(str(ano))
+        else:
+            fatia = indice["trimestral"].get((str(ano), str(trimestre)))
+        return df_pib.iloc[fatia] if fatia is not None else df_pib.iloc[0:0]
+
     if trimestre is None:
         return df_pib[df_pib['ano'] == ano]
     else:
-        return df_pib[(df_pib['ano'] == ano) & (df_pib['trimestre'] == trimestre)]
+        return df_pib[(df_pib['ano'] == ano) & (df_pib['trimestre'] == trimestre)]
\ No newline at end of file
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from .dados import MAPA_MESES
+
+# Número do mês -> nome em português, em minúsculas (chave dos índices mensais)
+MESES_MINUSCULOS = {i + 1: nome.lower() for i, nome in enumerate(MAPA_MESES.values())}
+
+
+def _faixas_contiguas(codigos):
+    """Devolve (inicio, fim) de cada sequência de códigos iguais num vetor ordenado."""
+    if len(codigos) == 0:
+        return np.array([], dtype=int), np.array([], dtype=int)
+    inicios = np.flatnonzero(np.concatenate(([True], codigos[1:] != codigos[:-1])))
+    fins = np.concatenate((inicios[1:], [len(codigos)]))
+    return inicios, fins
+
+
+def construir_indices(df):
+    """
+    Índice de uma série ordenada por data: dicionários que levam
+    (ano, mes) e (ano, trimestre) à fatia de linhas correspondente, e ano à fatia do ano.
+    Retorna None se a série não estiver ordenada por uma coluna de datas.
+    """
+    if df is None or df.empty or not pd.api.types.is_datetime64_any_dtype(df['data']):
+        return None
+    if not df['data'].is_monotonic_increasing:
+        return None
+
+    anos = df['data'].dt.year.to_numpy()
+    meses = df['data'].dt.month.to_numpy()
+
+    mensal = {}
+    inicios, fins = _faixas_contiguas(anos * 12 + meses)
+    for inicio, fim in zip(inicios, fins):
+        mensal[(str(anos[inicio]), MESES_MINUSCULOS[meses[inicio]])] = slice(int(inicio), int(fim))
+
+    trimestral = {}
+    inicios, fins = _faixas_contiguas(anos * 4 + (meses - 1) // 3)
+    for inicio, fim in zip(inicios, fins):
+        trimestral[(str(anos[inicio]), str((meses[inicio] - 1) // 3 + 1))] = slice(int(inicio), int(fim))
+
+    anual = {}
+    inicios, fins = _faixas_contiguas(anos)
+    for inicio, fim in zip(inicios, fins):
+        anual[str(anos[inicio])] = slice(int(inicio), int(fim))
+
+    return {"mensal": mensal, "trimestral": trimestral, "anual": anual}
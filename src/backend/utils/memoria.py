@@ -0,0 +1,42 @@
+import sys
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def pico_memoria_processo():
+    """Pico de memória residente do processo em bytes, ou None se o sistema não informar."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KiB; macOS, em bytes
+    return pico if sys.platform == "darwin" else pico * 1024
+
+
+def relatorio_memoria(snapshot):
+    """
+    Bytes ocupados por série no Snapshot: cada coluna do DataFrame (contando o
+    conteúdo das categorias) e as respostas HTTP já serializadas em cache.
+    """
+    series = {}
+    for nome, df in snapshot.dados.items():
+        colunas = {coluna: int(tamanho) for coluna, tamanho in df.memory_usage(deep=True).items()}
+        respostas = sum(
+            resposta.tamanho for (serie, _), resposta in snapshot.respostas.items() if serie == nome
+        )
+        series[nome] = {
+            "linhas": len(df),
+            "colunas": colunas,
+            "dataframe": sum(colunas.values()),
+            "respostas_em_cache": respostas,
+            "total": sum(colunas.values()) + respostas,
+        }
+
+    return {
+        "versao": snapshot.versao,
+        "series": series,
+        "total": sum(serie["total"] for serie in series.values()),
+        "pico_processo": pico_memoria_processo(),
+    }
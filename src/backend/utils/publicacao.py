@@ -0,0 +1,140 @@
+import json
+import os
+import time
+
+import pandas as pd
+
+from .armazenamento import DIRETORIO_PADRAO, _escrever_atomico, carregar_serie
+from .dados import adicionar_colunas_calendario
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos, cada processo se comporta como líder
+    fcntl = None
+
+# Manifesto com a versão publicada dos dados, gravado pelo processo líder
+ARQUIVO_MANIFESTO = "manifesto.json"
+ARQUIVO_TRAVA = "lider.lock"
+
+
+class TravaLider:
+    """
+    Elege um único processo (entre os workers do uvicorn) para falar com o BCB e
+    gravar o armazenamento. A trava é um flock no diretório das séries: fica com o
+    processo enquanto ele viver e é liberada pelo sistema se ele morrer, quando
+    outro worker pode assumir na próxima tentativa.
+    """
+
+    def __init__(self, diretorio=None):
+        self.diretorio = diretorio or DIRETORIO_PADRAO
+        self._arquivo = None
+
+    @property
+    def lider(self):
+        return self._arquivo is not None or fcntl is None
+
+    def tentar_adquirir(self):
+        """Tenta virar líder sem bloquear. Retorna True se este processo é o líder."""
+        if self.lider:
+            return True
+        os.makedirs(self.diretorio, exist_ok=True)
+        arquivo = open(os.path.join(self.diretorio, ARQUIVO_TRAVA), "a")
+        try:
+            fcntl.flock(arquivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            arquivo.close()
+            return False
+        self._arquivo = arquivo
+        return True
+
+    def liberar(self):
+        if self._arquivo is not None:
+            self._arquivo.close()
+            self._arquivo = None
+
+
+def ler_manifesto(diretorio=None):
+    """Retorna o manifesto publicado ({versao, series, publicado_em}) ou None."""
+    caminho = os.path.join(diretorio or DIRETORIO_PADRAO, ARQUIVO_MANIFESTO)
+    if not os.path.exists(caminho):
+        return None
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Manifesto inválido: {e}")
+        return None
+
+
+def publicar_manifesto(dados, diretorio=None):
+    """
+    Registra uma nova versão dos dados já gravados no armazenamento, com o número
+    de linhas de cada série. Chamado pelo líder depois de gravar as séries.
+    """
+    diretorio = diretorio or DIRETORIO_PADRAO
+    os.makedirs(diretorio, exist_ok=True)
+    anterior = ler_manifesto(diretorio)
+    manifesto = {
+        "versao": (anterior["versao"] + 1) if anterior else 1,
+        "series": {nome: {"linhas": len(df)} for nome, df in dados.items()},
+        "publicado_em": pd.Timestamp.now().isoformat(),
+    }
+    _escrever_atomico(
+        os.path.join(diretorio, ARQUIVO_MANIFESTO),
+        json.dumps(manifesto).encode("utf-8"),
+    )
+    return manifesto
+
+
+def carregar_publicado(manifesto, diretorio=None):
+    """
+    Abre, somente para leitura e sem cópia, as séries da versão do manifesto.
+    Cada série é lida até o número de linhas registrado, mesmo que o líder já
+    tenha anexado mais, para que todos os workers sirvam a mesma versão.
+    """
+    dados = {}
+    for nome, info in manifesto["series"].items():
+        df = carregar_serie(nome, diretorio, copiar=False, linhas=info["linhas"])
+        if df is not None:
+            dados[nome] = adicionar_colunas_calendario(df, nome)
+    return dados
+
+
+def aguardar_manifesto(diretorio=None, tempo_limite=120, intervalo=1.0):
+    """Espera o líder publicar a primeira versão. Retorna o manifesto ou None se expirar."""
+    limite = time.monotonic() + tempo_limite
+    while True:
+        manifesto = ler_manifesto(diretorio)
+        if manifesto is not None or time.monotonic() >= limite:
+            return manifesto
+        time.sleep(intervalo)
+
+
+def linhas_acrescentadas(df_anterior, df_novo):
+    """
+    Linhas que df_novo tem a mais no fim em relação a df_anterior, ou None quando
+    a série foi regravada (o prefixo não confere) e precisa ser tratada como nova.
+    """
+    if df_anterior is None or len(df_novo) < len(df_anterior):
+        return None
+    if len(df_anterior) and df_novo['data'].iloc[len(df_anterior) - 1] != df_anterior['data'].iloc[-1]:
+        return None
+    return df_novo.iloc[len(df_anterior):]
+
+
+def carregar_ultima_versao(nomes, diretorio=None):
+    """
+    Última versão boa gravada em disco, lida sem acesso à rede: a do manifesto ou,
+    se ele ainda não existir, o que houver gravado de cada série.
+    Retorna (versao_do_manifesto ou None, dados).
+    """
+    manifesto = ler_manifesto(diretorio)
+    if manifesto is not None:
+        return manifesto["versao"], carregar_publicado(manifesto, diretorio)
+
+    dados = {}
+    for nome in nomes:
+        df = carregar_serie(nome, diretorio, copiar=False)
+        if df is not None:
+            dados[nome] = adicionar_colunas_calendario(df, nome)
+    return None, dados
@@ -0,0 +1,261 @@
+import asyncio
+import os
+import threading
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Mapping
+
+import pandas as pd
+
+from .dados import URLS, carregar_dados, sincronizar_dados
+from .indices import construir_indices
+from .cubos import construir_cubo, atualizar_cubo
+from .publicacao import (aguardar_manifesto, carregar_publicado, ler_manifesto, linhas_acrescentadas,
+                         publicar_manifesto)
+
+# Intervalo (em segundos) entre as sincronizações em segundo plano
+INTERVALO_ATUALIZACAO = int(os.getenv("RELATAI_INTERVALO_ATUALIZACAO", "3600"))
+# Intervalo (em segundos) com que os workers seguidores conferem o manifesto do líder
+INTERVALO_VERIFICACAO = int(os.getenv("RELATAI_INTERVALO_VERIFICACAO", "30"))
+# Espera (em segundos) entre tentativas de carga enquanto faltarem séries
+INTERVALO_NOVA_TENTATIVA = int(os.getenv("RELATAI_INTERVALO_NOVA_TENTATIVA", "60"))
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    Versão imutável dos dados servidos pela API.
+    Os DataFrames nunca são alterados depois de publicados: uma atualização
+    sempre gera um novo Snapshot.
+    """
+    versao: int
+    dados: Mapping[str, pd.DataFrame]
+    criado_em: pd.Timestamp
+    # Linhas ingeridas em relação à versão anterior (nome da série -> DataFrame)
+    linhas_novas: Mapping[str, pd.DataFrame] = field(default_factory=dict)
+    # Índices ano/mês/trimestre -> fatia de linhas, construídos na publicação
+    indices: Mapping[str, Any] = field(default_factory=dict)
+    # Agregados por mês/trimestre/ano (ver utils/cubos.py), atualizados incrementalmente
+    cubos: Mapping[str, Any] = field(default_factory=dict)
+    # Respostas HTTP já serializadas desta versão (ver utils/serializacao.py)
+    respostas: dict = field(default_factory=dict, compare=False)
+    # False quando alguma série foi regravada em vez de só ganhar linhas no fim:
+    # quem mantém estado incremental (alertas, cubos) deve recalcular do zero
+    incremental: bool = True
+
+
+class RepositorioDados:
+    """
+    Guarda o Snapshot atual. Leitores só leem a referência `atual` (troca atômica
+    de um atributo) e nunca bloqueiam; escritores são serializados por uma trava.
+    """
+
+    def __init__(self, dados=None):
+        self._trava = threading.Lock()
+        self._atual = self._criar_snapshot(0, dados or {}, {})
+
+    @staticmethod
+    def _criar_snapshot(versao, dados, linhas_novas, anterior=None, incremental=True):
+        if not incremental:
+            anterior = None
+        return Snapshot(
+            versao=versao,
+            dados=MappingProxyType(dict(dados)),
+            criado_em=pd.Timestamp.now(),
+            linhas_novas=MappingProxyType(dict(linhas_novas)),
+            indices=MappingProxyType({nome: construir_indices(df) for nome, df in dados.items()}),
+            cubos=MappingProxyType({
+                nome: RepositorioDados._cubo(nome, df, linhas_novas, anterior) for nome, df in dados.items()
+            }),
+            incremental=incremental,
+        )
+
+    @staticmethod
+    def _cubo(nome, df, linhas_novas, anterior):
+        """
+        Reaproveita o cubo da versão anterior quando a série não mudou e, se ela só
+        ganhou linhas no fim, combina apenas as linhas novas. Nos demais casos, reconstrói.
+        """
+        if anterior is not None and anterior.cubos.get(nome) is not None:
+            df_anterior = anterior.dados.get(nome)
+            if df is df_anterior:
+                return anterior.cubos[nome]
+            novas = linhas_novas.get(nome)
+            if novas is not None and df_anterior is not None and len(df_anterior) + len(novas) == len(df):
+                cubo = atualizar_cubo(anterior.cubos[nome], novas)
+                if cubo is not None:
+                    return cubo
+        return construir_cubo(df)
+
+    @property
+    def atual(self) -> Snapshot:
+        return self._atual
+
+    def publicar(self, dados, linhas_novas=None, incremental=True) -> Snapshot:
+        """Publica um novo Snapshot com versão incrementada e o torna o atual."""
+        with self._trava:
+            novo = self._criar_snapshot(self._atual.versao + 1, dados, linhas_novas or {}, self._atual, incremental)
+            self._atual = novo
+        return novo
+
+
+class EstadoCarga:
+    """
+    Situação de carga de cada série, exposta nas rotas de saúde: "carregando"
+    enquanto não há dados, "pronto" quando há (mesmo vindos do disco) e "erro"
+    quando a última tentativa falhou sem nenhum dado para servir.
+    """
+
+    def __init__(self, nomes):
+        self._trava = threading.Lock()
+        self._series = {
+            nome: {"estado": "carregando", "origem": None, "verificado_em": None, "erro": None} for nome in nomes
+        }
+
+    def marcar(self, nome, estado, origem=None, erro=None):
+        with self._trava:
+            atual = self._series.setdefault(nome, {})
+            atual.update(
+                estado=estado,
+                origem=origem or atual.get("origem"),
+                verificado_em=pd.Timestamp.now() if estado == "pronto" else atual.get("verificado_em"),
+                erro=erro,
+            )
+
+    def registrar(self, snapshot, origem, nomes=None):
+        """Marca como prontas as séries presentes no Snapshot (por padrão, todas)."""
+        for nome in (snapshot.dados if nomes is None else nomes):
+            if nome in snapshot.dados:
+                self.marcar(nome, "pronto", origem)
+
+    def pronto(self):
+        return all(serie["estado"] == "pronto" for serie in self._series.values())
+
+    def relatorio(self, snapshot):
+        agora = pd.Timestamp.now()
+        with self._trava:
+            series = {nome: dict(serie) for nome, serie in self._series.items()}
+        for nome, serie in series.items():
+            df = snapshot.dados.get(nome)
+            verificado_em = serie.pop("verificado_em")
+            serie["linhas"] = 0 if df is None else len(df)
+            serie["ultima_data"] = None if df is None or df.empty else f"{df['data'].iloc[-1]:%Y-%m-%d}"
+            serie["verificado_em"] = None if verificado_em is None else verificado_em.isoformat()
+            serie["idade_segundos"] = None if verificado_em is None else round((agora - verificado_em).total_seconds())
+        return series
+
+
+def sincronizar_repositorio(repositorio, diretorio=None, sincronizar=sincronizar_dados):
+    """
+    Sincroniza os dados do Snapshot atual e publica uma nova versão somente
+    se houver linhas novas. Retorna o Snapshot vigente ao final.
+    """
+    base = repositorio.atual
+    novos_dados, linhas_novas = sincronizar(dict(base.dados), diretorio)
+    if not linhas_novas:
+        return base
+    return repositorio.publicar(novos_dados, linhas_novas)
+
+
+def acompanhar_publicacao(repositorio, versao_vista=None, diretorio=None):
+    """
+    Caminho dos workers seguidores: se o líder publicou uma versão nova do manifesto,
+    abre as séries do armazenamento (sem cópia) e publica um Snapshot local.
+    Retorna a versão do manifesto que passou a ser servida.
+    """
+    manifesto = ler_manifesto(diretorio)
+    if manifesto is None or manifesto["versao"] == versao_vista:
+        return versao_vista
+
+    base = repositorio.atual
+    dados = carregar_publicado(manifesto, diretorio)
+    linhas_novas = {}
+    incremental = True
+    for nome, df in dados.items():
+        novas = linhas_acrescentadas(base.dados.get(nome), df)
+        if novas is None:
+            incremental = False
+        elif len(novas):
+            linhas_novas[nome] = novas
+    repositorio.publicar(dados, linhas_novas, incremental=incremental and set(dados) == set(base.dados))
+    return manifesto["versao"]
+
+
+def carga_inicial(repositorio, estado, diretorio=None, trava=None, versao_vista=None, nomes=None,
+                  carregar=carregar_dados, sincronizar=sincronizar_dados):
+    """
+    Completa, em segundo plano, o que foi servido a partir do disco. O líder baixa
+    as séries que faltam e sincroniza as demais com o BCB; os seguidores esperam o
+    manifesto do líder. Retorna a versão do manifesto vista.
+    """
+    nomes = list(URLS) if nomes is None else nomes
+    if trava is not None and not trava.tentar_adquirir():
+        aguardar_manifesto(diretorio)
+        versao_vista = acompanhar_publicacao(repositorio, versao_vista, diretorio)
+        estado.registrar(repositorio.atual, "lider")
+        return versao_vista
+
+    base = repositorio.atual
+    faltantes = {nome: URLS[nome] for nome in nomes if nome not in base.dados}
+    baixados = carregar(diretorio, urls=faltantes) if faltantes else {}
+    dados, linhas_novas = sincronizar({**base.dados, **baixados}, diretorio)
+
+    if baixados or linhas_novas:
+        repositorio.publicar(dados, linhas_novas, incremental=not baixados)
+    # Publica o manifesto também quando o disco ainda não tinha um, para liberar os seguidores
+    if trava is not None and repositorio.atual.dados and (baixados or linhas_novas or versao_vista is None):
+        versao_vista = publicar_manifesto(repositorio.atual.dados, diretorio)["versao"]
+    estado.registrar(repositorio.atual, "bcb", list(baixados) + list(linhas_novas))
+    for nome in faltantes:
+        if nome not in baixados:
+            estado.marcar(nome, "erro", erro="Não foi possível baixar a série do BCB")
+    return versao_vista
+
+
+async def manter_dados(repositorio, estado, diretorio=None, trava=None, versao_vista=None,
+                       intervalo_nova_tentativa=INTERVALO_NOVA_TENTATIVA):
+    """
+    Tarefa do lifespan: repete a carga inicial até todas as séries estarem prontas
+    e então passa ao laço de atualização periódica.
+    """
+    while True:
+        try:
+            versao_vista = await asyncio.to_thread(
+                carga_inicial, repositorio, estado, diretorio, trava, versao_vista
+            )
+        except Exception as e:
+            print(f"Erro na carga inicial dos dados: {e}")
+        if estado.pronto():
+            break
+        await asyncio.sleep(intervalo_nova_tentativa)
+    await atualizar_periodicamente(repositorio, diretorio=diretorio, trava=trava, versao_vista=versao_vista,
+                                   estado=estado)
+
+
+async def atualizar_periodicamente(repositorio, intervalo=INTERVALO_ATUALIZACAO, diretorio=None,
+                                   sincronizar=sincronizar_dados, trava=None, versao_vista=None,
+                                   intervalo_verificacao=INTERVALO_VERIFICACAO, estado=None):
+    """
+    Laço de atualização em segundo plano, iniciado no lifespan do FastAPI.
+    Com vários workers, só o dono da `trava` (ver utils/publicacao.py) sincroniza com
+    o BCB e publica o manifesto; os demais acompanham o manifesto e, se o líder cair,
+    um deles assume. O trabalho pesado roda numa thread para não bloquear o event loop.
+    """
+    while True:
+        lider = trava is None or trava.tentar_adquirir()
+        await asyncio.sleep(intervalo if lider else intervalo_verificacao)
+        try:
+            if lider:
+                base = repositorio.atual
+                snapshot = await asyncio.to_thread(sincronizar_repositorio, repositorio, diretorio, sincronizar)
+                if trava is not None and snapshot is not base:
+                    versao_vista = publicar_manifesto(snapshot.dados, diretorio)["versao"]
+                if estado is not None:
+                    estado.registrar(snapshot, "bcb")
+                print(f"Dados sincronizados: versão {snapshot.versao}")
+            else:
+                versao_vista = await asyncio.to_thread(acompanhar_publicacao, repositorio, versao_vista, diretorio)
+                if estado is not None:
+                    estado.registrar(repositorio.atual, "lider")
+        except Exception as e:
+            print(f"Erro na atualização em segundo plano: {e}")
@@ -0,0 +1,182 @@
+import gzip
+import hashlib
+import json
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+# Tipo de mídia do formato colunar: {"data": [dias desde 1970-01-01], "valor": [...]}
+FORMATO_COLUNAR = "application/vnd.relatai.colunar+json"
+# Um registro JSON por linha, enviado em blocos (streaming)
+FORMATO_NDJSON = "application/x-ndjson"
+LINHAS_POR_BLOCO = 2000
+# Sufixo do ETag do corpo gzip: com Content-Encoding é outra representação (RFC 9110)
+SUFIXO_ETAG_GZIP = "-gzip"
+
+
+@dataclass(frozen=True)
+class RespostaSerializada:
+    """
+    Corpo JSON já codificado de uma série e seu ETag. A versão gzip (cerca de 1/8
+    do JSON) é gerada junto; o corpo descomprimido só é montado no primeiro pedido
+    sem gzip e depois fica guardado, como a versão gzip.
+    """
+    corpo_gzip: bytes
+    etag: str
+    media_type: str = "application/json"
+
+    @cached_property
+    def corpo(self):
+        return gzip.decompress(self.corpo_gzip)
+
+    @property
+    def etag_gzip(self):
+        """ETag da versão gzip: o mesmo do corpo descomprimido com SUFIXO_ETAG_GZIP."""
+        return f'{self.etag[:-1]}{SUFIXO_ETAG_GZIP}"'
+
+    @property
+    def tamanho(self):
+        """Bytes dos corpos guardados (o descomprimido só conta depois de montado)."""
+        return len(self.corpo_gzip) + len(self.__dict__.get("corpo", b""))
+
+
+def _registros(df):
+    df = df.copy()
+    for coluna in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[coluna]):
+            df[coluna] = df[coluna].dt.strftime('%Y-%m-%dT%H:%M:%S')
+        elif pd.api.types.is_float_dtype(df[coluna]) and not np.isfinite(df[coluna].to_numpy()).all():
+            # NaN/infinito não existem em JSON: vão como null
+            df[coluna] = df[coluna].astype(object).where(np.isfinite(df[coluna].to_numpy()), None)
+    return df.to_dict(orient="records")
+
+
+def _json(dados):
+    # allow_nan=False: qualquer NaN que escape vira erro em vez de JSON inválido
+    return json.dumps(dados, ensure_ascii=False, separators=(",", ":"), allow_nan=False)
+
+
+def serializar_registros(df):
+    """
+    Codifica o DataFrame como lista de registros JSON, no mesmo formato que o
+    FastAPI produz para `df.to_dict(orient="records")` (datas em ISO 8601).
+    """
+    return _json(_registros(df)).encode("utf-8")
+
+
+def gerar_ndjson(df, linhas_por_bloco=LINHAS_POR_BLOCO):
+    """
+    Gera a série em NDJSON, um bloco de linhas por vez: o primeiro byte sai após
+    o primeiro bloco e a memória usada não depende do tamanho do histórico.
+    """
+    for inicio in range(0, len(df), linhas_por_bloco):
+        bloco = _registros(df.iloc[inicio:inicio + linhas_por_bloco])
+        linhas = "".join(_json(r) + "\n" for r in bloco)
+        yield linhas.encode("utf-8")
+
+
+def serializar_colunar(df):
+    """
+    Codifica só as colunas data e valor como vetores paralelos. As datas vão como
+    inteiros (dias desde 1970-01-01) e mes/ano/trimestre, deriváveis da data, são omitidos.
+    """
+    dias = df['data'].to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').astype(np.int64)
+    valores = df['valor'].to_numpy(dtype='float64')
+    lista = valores.tolist()
+    if not np.isfinite(valores).all():
+        lista = [v if finito else None for v, finito in zip(lista, np.isfinite(valores))]
+    return _json({"data": dias.tolist(), "valor": lista}).encode("utf-8")
+
+
+SERIALIZADORES = {
+    "registros": (serializar_registros, "application/json"),
+    "colunar": (serializar_colunar, FORMATO_COLUNAR),
+}
+
+
+def preparar_resposta(df, formato="registros"):
+    serializar, media_type = SERIALIZADORES[formato]
+    corpo = serializar(df)
+    return RespostaSerializada(
+        corpo_gzip=gzip.compress(corpo, compresslevel=6, mtime=0),
+        etag=f'"{hashlib.blake2b(corpo, digest_size=16).hexdigest()}"',
+        media_type=media_type,
+    )
+
+
+def resposta_do_snapshot(snapshot, nome, formato="registros"):
+    """
+    Retorna a RespostaSerializada da série, gerada uma única vez por Snapshot e formato.
+    Como cada versão dos dados tem seu próprio Snapshot, o cache nunca fica obsoleto.
+    """
+    resposta = snapshot.respostas.get((nome, formato))
+    if resposta is None:
+        resposta = preparar_resposta(snapshot.dados[nome], formato)
+        snapshot.respostas[(nome, formato)] = resposta
+    return resposta
+
+
+def _valores_q(cabecalho):
+    """Itens de um cabeçalho como Accept-Encoding ("gzip;q=0.5, br") com seus valores q."""
+    itens = {}
+    for parte in (cabecalho or "").split(","):
+        nome, *parametros = [p.strip() for p in parte.split(";")]
+        if not nome:
+            continue
+        q = 1.0
+        for parametro in parametros:
+            chave, _, valor = parametro.partition("=")
+            if chave.strip().lower() == "q":
+                try:
+                    q = float(valor)
+                except ValueError:
+                    q = 0.0
+        itens[nome.lower()] = q
+    return itens
+
+
+def aceita_gzip(accept_encoding):
+    """Se o cliente aceita gzip, respeitando q=0 (recusa explícita) e o curinga *."""
+    itens = _valores_q(accept_encoding)
+    if "gzip" in itens:
+        return itens["gzip"] > 0
+    return itens.get("*", 0) > 0
+
+
+def _etag_base(etag):
+    """ETag sem o prefixo W/ e sem o sufixo da versão gzip."""
+    etag = etag.removeprefix("W/")
+    sufixo = f'{SUFIXO_ETAG_GZIP}"'
+    return etag[:-len(sufixo)] + '"' if etag.endswith(sufixo) else etag
+
+
+def etag_confere(if_none_match, etag):
+    """
+    Compara If-None-Match com o ETag atual: aceita lista separada por vírgulas,
+    o curinga * e ETags fracos (W/"..."), com a comparação fraca que a RFC 9110
+    define para esse cabeçalho. O ETag da versão gzip e o do corpo descomprimido
+    conferem entre si: os dois validam o mesmo conteúdo.
+    """
+    if not if_none_match:
+        return False
+    base = _etag_base(etag)
+    for candidato in if_none_match.split(","):
+        candidato = candidato.strip()
+        if candidato == "*" or _etag_base(candidato) == base:
+            return True
+    return False
+
+
+def negociar_formato(formato=None, accept=None):
+    """Escolhe o formato pelo parâmetro `formato` ou, na falta dele, pelo cabeçalho Accept."""
+    if formato:
+        if formato not in SERIALIZADORES and formato != "ndjson":
+            raise ValueError(f"Formato inválido: {formato}. Use: {', '.join(SERIALIZADORES)} ou ndjson")
+        return formato
+    if accept and FORMATO_COLUNAR in accept:
+        return "colunar"
+    if accept and FORMATO_NDJSON in accept:
+        return "ndjson"
+    return "registros"
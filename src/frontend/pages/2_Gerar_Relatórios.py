@@ -9,7 +9,7 @@ import json
 
 # Adicionar diretório utils ao path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from utils.data_processing import process_api_data, calculate_statistics
+from utils.data_processing import process_api_data, calculate_statistics, COLUMNAR_MEDIA_TYPE
 from utils.nlp_utils import generate_market_insights
 import requests
 
@@ -203,7 +203,8 @@ def get_historical_data(endpoint: str, start_date: datetime, end_date: datetime)
             params={
                 "start_date": start_date.strftime("%Y-%m-%d"),
                 "end_date": end_date.strftime("%Y-%m-%d")
-            }
+            },
+            headers={"Accept": f"{COLUMNAR_MEDIA_TYPE}, application/json"}
         )
         response.raise_for_status()
         return response.json()
@@ -10,7 +10,7 @@ import numpy as np
 
 # Adicionar diretório utils ao path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from utils.data_processing import process_api_data, calculate_statistics
+from utils.data_processing import process_api_data, calculate_statistics, COLUMNAR_MEDIA_TYPE
 from utils.ml_client import predict_future_values
 from utils.nlp_utils import generate_market_insights, generate_forecast_analysis
 
@@ -22,11 +22,18 @@ st.markdown("Acompanhe as tendências e previsões para SELIC, IPCA e Câmbio fo
 
 # --- Função para buscar dados da API ---
 API_BASE_URL = "https://two025-1-relatai.onrender.com"
+# A previsão usa só os 30 pontos mais recentes; 3 anos cobrem 30 meses mesmo nas séries mensais
+JANELA_PREVISAO_DIAS = 3 * 365
 
 def fetch_api_data(endpoint: str, params: dict = None):
     """Busca dados de um endpoint da API e retorna o JSON, ou None em caso de erro."""
     try:
-        response = requests.get(f"{API_BASE_URL}/{endpoint.lstrip('/')}", params=params)
+        # Pede o formato colunar (menor e mais rápido de decodificar); rotas sem suporte o ignoram
+        response = requests.get(
+            f"{API_BASE_URL}/{endpoint.lstrip('/')}",
+            params=params,
+            headers={"Accept": f"{COLUMNAR_MEDIA_TYPE}, application/json"}
+        )
         response.raise_for_status()
         return response.json()
     except requests.exceptions.RequestException as e:
@@ -39,6 +46,24 @@ def fetch_api_data(endpoint: str, params: dict = None):
         st.error(f"Ocorreu um erro inesperado ao buscar dados de '{endpoint}': {e}")
         return None
 
+def fetch_chart_data(endpoint: str, end_date=None, points: int = 500):
+    """
+    Busca só a série já reduzida pelo servidor (LTTB, até `points` pontos) para o gráfico.
+    Retorna None se a rota de gráficos não responder.
+    """
+    params = {"pontos": points}
+    if end_date is not None:
+        params["end_date"] = end_date.isoformat()
+    try:
+        response = requests.get(f"{API_BASE_URL}/grafico/{endpoint.lstrip('/')}", params=params, timeout=30)
+        response.raise_for_status()
+        chart_df = process_api_data(response.json())
+        if chart_df is not None and not chart_df.empty:
+            return chart_df
+    except (requests.exceptions.RequestException, ValueError):
+        pass
+    return None
+
 def predict_future_values(historical_data, periods=30, model_type="deepseek", indicator_name=""):
     """
     Gera previsões simples baseadas em tendência linear e média móvel
@@ -173,9 +198,16 @@ def display_indicator_data(indicator_name: str, api_endpoint: str, tab_container
             st.caption(f"Será gerada uma previsão para: {selected_date.strftime('%d/%m/%Y')} ({dias_futuro} dias no futuro)")
 
         if st.button(f"Carregar Análise da {indicator_name} para {selected_date.strftime('%d/%m/%Y')}", key=f"{api_endpoint}_btn_indicadores"):
-            # Para qualquer data, precisamos dos dados históricos
+            # O gráfico usa só a série reduzida; os dados brutos vão para as estatísticas
+            # (cortados no servidor até a data escolhida) ou, só os recentes, para a previsão
             with st.spinner(f"Buscando dados históricos da {indicator_name}..."):
-                historical_data = fetch_api_data(api_endpoint)
+                if selected_date <= data_atual:
+                    chart_df = fetch_chart_data(api_endpoint, end_date=selected_date)
+                    historical_data = fetch_api_data(api_endpoint, {"end_date": selected_date.isoformat()})
+                else:
+                    chart_df = fetch_chart_data(api_endpoint)
+                    inicio_recente = data_atual - datetime.timedelta(days=JANELA_PREVISAO_DIAS)
+                    historical_data = fetch_api_data(api_endpoint, {"start_date": inicio_recente.isoformat()})
             
             if not historical_data:
                 st.error(f"Não foi possível obter dados históricos para {indicator_name}.")
@@ -202,7 +234,7 @@ def display_indicator_data(indicator_name: str, api_endpoint: str, tab_container
                 
                 # Mostrar gráfico histórico
                 st.subheader("Dados Históricos")
-                fig = px.line(df_filtered, x='data', y='valor', title=f"Histórico - {indicator_name}", 
+                fig = px.line(chart_df if chart_df is not None else df_filtered, x='data', y='valor', title=f"Histórico - {indicator_name}", 
                 line_shape='spline')
                 fig.update_traces(mode='lines', line=dict(smoothing=1.3, width=3))
                 st.plotly_chart(fig, use_container_width=True)
@@ -226,7 +258,7 @@ def display_indicator_data(indicator_name: str, api_endpoint: str, tab_container
             else:
                 # Mostrar apenas o gráfico histórico para contexto
                 st.subheader("Dados Históricos (Contexto)")
-                fig = px.line(df, x='data', y='valor', title=f"Histórico - {indicator_name}", 
+                fig = px.line(chart_df if chart_df is not None else df, x='data', y='valor', title=f"Histórico - {indicator_name}", 
                 line_shape='spline')
                 st.plotly_chart(fig, use_container_width=True)
                 
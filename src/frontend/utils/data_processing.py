@@ -1,5 +1,27 @@
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Formato colunar da API: {"data": [dias desde 1970-01-01], "valor": [...]}
+COLUMNAR_MEDIA_TYPE = "application/vnd.relatai.colunar+json"
+
+def is_columnar(data):
+    return isinstance(data, dict) and isinstance(data.get('data'), list) and isinstance(data.get('valor'), list)
+
+def decode_columnar(data):
+    """Converte a resposta colunar da API em DataFrame sem passar por dicionários por linha."""
+    return pd.DataFrame({
+        'data': pd.to_datetime(np.asarray(data['data'], dtype='int64'), unit='D'),
+        'valor': np.asarray(data['valor'], dtype='float64')
+    })
+
+def to_records(data):
+    """Garante a lista de registros (formato aceito pelo /predict), mesmo vindo do formato colunar."""
+    if not is_columnar(data):
+        return data
+    df = decode_columnar(data)
+    df['data'] = df['data'].dt.strftime('%Y-%m-%d')
+    return df.to_dict(orient='records')
 
 def process_api_data(data):
     try:
@@ -9,6 +31,15 @@ def process_api_data(data):
         
         print(f"Tipo de dados recebidos: {type(data)}")
         
+        if is_columnar(data):
+            # Datas e valores já chegam tipados: só resta limpar e ordenar
+            df = decode_columnar(data).dropna()
+            if len(df) < 2:
+                print("Aviso: Dados insuficientes após limpeza")
+                return None
+            print(f"Dados colunares processados com sucesso: {len(df)} registros válidos")
+            return df.sort_values('data')
+        
         # Converter para DataFrame
         df = pd.DataFrame(data)
         print(f"Colunas no DataFrame: {df.columns.tolist()}")
@@ -76,15 +107,13 @@ def calculate_statistics(df):
     
     return stats
 
+def sliding_windows(values, window_size):
+    """Janelas X[i] = values[i:i+window_size] e alvos y[i] = values[i+window_size], como visões sem cópia."""
+    values = np.asarray(values)
+    return sliding_window_view(values[:-1], window_size), values[window_size:]
+
 def prepare_data_for_ml(df, window_size=5):
     if df is None or df.empty or len(df) <= window_size:
         return None, None
     
-    values = df['valor'].values
-    
-    X, y = [], []
-    for i in range(len(values) - window_size):
-        X.append(values[i:i + window_size])
-        y.append(values[i + window_size])
-    
-    return np.array(X), np.array(y)
\ No newline at end of file
+    return sliding_windows(df['valor'].to_numpy(), window_size)
\ No newline at end of file
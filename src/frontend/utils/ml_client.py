@@ -3,6 +3,7 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import logging
+from utils.data_processing import to_records
 
 # Configurar logging para debug
 logging.basicConfig(level=logging.INFO)
@@ -12,6 +13,8 @@ API_BASE_URL = "https://two025-1-relatai.onrender.com"
 
 def predict_future_values(historical_data, periods=90, window_size=15, model_type="deepseek", indicator_name="selic"):
     try:
+        historical_data = to_records(historical_data)
+
         # Verificar se temos dados históricos
         if not historical_data or len(historical_data) < 2:
             logger.error(f"Dados históricos insuficientes para {indicator_name}")